@@ -1,99 +1,243 @@
 #!/usr/bin/env python3
 
+import asyncio
 import json
 import logging
 import os
-import time
+import signal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from queue import Queue
 from threading import Thread
 
 from dotenv import dotenv_values
 
-#from input.keyboard_input import KeyboardInput
-from input.inky_input import InkyInput
+import log_pipeline
+import metrics
+import parallel_decoder
+import registry
 from input_processor import InputProcessor
-from message.daisy_message_source import DaisyMessageSource
+from message.multiplexed_message_source import MultiplexedMessageSource
 from message_processor import MessageProcessor
-from renderer.image_renderer import ImageRenderer
-from renderer.inky_renderer import InkyRenderer
+from scheduling import AsyncioScheduler, AsyncQueue
 from screen.ship_map_screen import ShipMapScreen
 from screen.ship_table_screen import ShipTableScreen
 from screen.ship_zone_screen import ShipZoneScreen
 from screen_manager import ScreenManager
 from ship_tracker import ShipTracker
+from track_history import TrackHistory
+from update_channel import CoalescingBuffer, CoalescingQueue
 
 
+def create_message_source(config:dict[str,any]) -> any:
+    # Sources are only imported once chosen, so their libraries are optional
+    source_type:str = config["type"]
+    source_class:type = registry.sources.get(source_type)
+
+    if source_type == "daisy":
+        return source_class(config.get("combined_read", env.get("DAISY_COMBINED_READ", "0") == "1"))
+
+    if source_type == "mqtt":
+        return source_class(config.get("addr", env.get("MQTT_ADDR")), int(config.get("port", env.get("MQTT_PORT", 1883))),
+                            config.get("topics", env.get("MQTT_AIS_TOPIC")), int(config.get("qos", env.get("MQTT_QOS", 0))))
+
+    if source_type == "file":
+        return source_class(config["path"], config.get("speed", 1), config.get("repeat", 1))
+
+    return source_class(**config.get("options", {}))
+
+def create_message_processor(message_queue:any) -> MessageProcessor:
+    # With more than one source, duplicates heard by several are dropped
+    configs:list[dict[str,any]] = prefs.get("SOURCES", [{"type": "daisy"}])
+    sources:dict[str,any] = {config.get("name", config["type"]): create_message_source(config) for config in configs}
+
+    source:any = next(iter(sources.values()))
+    if len(sources) > 1:
+        source = MultiplexedMessageSource(sources, float(prefs.get("DEDUP_WINDOW", 15)))
+
+    return MessageProcessor(source, message_queue, decode_workers, decode_pool)
+
+def create_ship_tracker(message_queue:any, vessel_queue:any) -> ShipTracker:
+    global ship_tracker
+
+    # Init the tracker to keep a record of vessels we've seen
+    ship_tracker = ShipTracker(int(env["MAX_DYN_SIZE"]), env["DB_NAME"], message_queue, vessel_queue,
+                               write_behind=env.get("DB_WRITE_BEHIND", "0") == "1",
+                               flush_interval=float(env.get("DB_FLUSH_INTERVAL", 5)),
+                               batch_size=int(env.get("DB_BATCH_SIZE", 200)),
+                               history=track_history,
+                               predict_horizon=float(env.get("PREDICT_HORIZON", 600)),
+                               nearby_margin=float(env.get("ZONE_NEARBY_MARGIN", 2)))
+
+    # Set the notification zones up from the env
+    zones:list[dict[str,any]] = prefs.get("ZONES",[])
+    for zone in zones:
+        ship_tracker.add_zone((zone["name"], zone["lat"], zone["lon"], zone["radius"]))
+
+    return ship_tracker
+
+def create_track_history() -> TrackHistory:
+    return TrackHistory(int(env.get("TRACK_POINTS", 240)),
+                        int(env.get("TRACK_MEMORY_KB", 2048)) * 1024,
+                        min_interval=float(env.get("TRACK_MIN_INTERVAL", 30)),
+                        min_distance=float(env.get("TRACK_MIN_DISTANCE", 50)),
+                        persist=env.get("TRACK_PERSIST", "0") == "1")
+
+def create_screen_manager(command_queue:any, renderer_type:str = "image", scheduler:any = None) -> ScreenManager:
+    renderer_class:type = registry.renderers.get(renderer_type)
+    renderer:any = renderer_class("output.jpg", scheduler=scheduler) if renderer_type == "image" else renderer_class(scheduler=scheduler)
+    screens:list[ShipZoneScreen|ShipTableScreen|ShipMapScreen] = [
+        ShipZoneScreen(env["IMG_DIR"], renderer, scheduler=scheduler, card_cache_size=int(env.get("ZONE_CARD_CACHE", 16)), thumb_dir=env.get("THUMB_DIR")),
+        ShipTableScreen(env["IMG_DIR"], renderer, scheduler=scheduler),
+        ShipMapScreen(env["IMG_DIR"], renderer, env["MAPBOX_API_KEY"], prefs.get("MAP_BOUNDS", []), prefs.get("MAPBOX_LIGHT_STYLE",""), prefs.get("MAPBOX_DARK_STYLE",""), scheduler=scheduler, map_dir=prefs.get("MAP_DIR"), history=track_history),
+    ]
+
+    return ScreenManager(screens, command_queue)
+
+def start_metrics(message_queue:any, command_queue:any):
+    metrics.gauge("ais_queue_depth", "Items waiting on a pipeline queue", message_queue.qsize, queue="messages")
+    metrics.gauge("ais_queue_depth", "Items waiting on a pipeline queue", command_queue.qsize, queue="vessel_updates")
+
+    port:int = int(env.get("METRICS_PORT") or 0)
+    if port > 0:
+        metrics.start_server(port)
+
+    dump_interval:float = float(env.get("METRICS_DUMP_INTERVAL") or 0)
+    if dump_interval > 0:
+        metrics.start_dump(dump_interval)
+
+def create_input_processor(command_queue:any) -> InputProcessor:
+    device:any = registry.inputs.create(prefs.get("INPUT", env.get("INPUT", "inky")), debounce=float(env.get("INPUT_DEBOUNCE", 0.05)))
+    return InputProcessor(device, command_queue, long_press=float(env.get("INPUT_LONG_PRESS", 1.0)))
+
 def begin_message_processing():
     try:
-        #mqtt_source:MQTTMessageSource = MQTTMessageSource(env["MQTT_ADDR"], int(env["MQTT_PORT"]), env["MQTT_AIS_TOPIC"])
-        i2c_source:DaisyMessageSource = DaisyMessageSource()
-        message_processor:MessageProcessor = MessageProcessor(i2c_source, ais_message_queue)
-        message_processor.begin_processing()
+        create_message_processor(ais_message_queue).begin_processing()
     except Exception as ex:
         logger.exception("Message Processing Exception", exc_info=ex)
 
 def begin_ship_tracking():
     try:
-        # Init the tracker to keep a record of vessels we've seen
-        ship_tracker:ShipTracker = ShipTracker(int(env["MAX_DYN_SIZE"]), env["DB_NAME"], ais_message_queue, vessel_update_queue)
-
-        # Set the notification zones up from the env
-        zones:list[dict[str,any]] = prefs.get("ZONES",[])
-        for zone in zones:
-            ship_tracker.add_zone((zone["name"], zone["lat"], zone["lon"], zone["radius"]))
-
-        ship_tracker.begin_processing()
+        create_ship_tracker(ais_message_queue, vessel_update_queue).begin_processing()
     except Exception as ex:
         logger.exception("Ship Tracking Exception", exc_info=ex)
 
 def begin_screen_updates(renderer_type:str = "image"):
     try:
-        renderer:ImageRenderer|InkyRenderer = ImageRenderer("output.jpg") if renderer_type == "image" else InkyRenderer()
-        screens:list[ShipZoneScreen|ShipTableScreen|ShipMapScreen] = [
-            ShipZoneScreen(env["IMG_DIR"], renderer),
-            ShipTableScreen(env["IMG_DIR"], renderer),
-            ShipMapScreen(env["IMG_DIR"], renderer, env["MAPBOX_API_KEY"], prefs.get("MAP_BOUNDS", []), prefs.get("MAPBOX_LIGHT_STYLE",""), prefs.get("MAPBOX_DARK_STYLE","")),
-        ]
-
-        screen_manager:ScreenManager = ScreenManager(screens, vessel_update_queue)
-        screen_manager.begin_processing()
+        create_screen_manager(vessel_update_queue, renderer_type).begin_processing()
     except Exception as ex:
         logger.exception("Screen Update Exception", exc_info=ex)
 
-logger:logging.Logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, handlers=[logging.FileHandler('ais.log'),logging.StreamHandler()],format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",datefmt="%Y-%m-%d %H:%M:%S")
+def run_threads():
+    start_metrics(ais_message_queue, vessel_update_queue)
+
+    # The stages run until the process ends, so they're daemons and never
+    # hold up shutdown
+    msg_proc_thread:Thread = Thread(target=begin_message_processing, daemon=True)
+    msg_proc_thread.start()
+
+    ship_track_thread:Thread = Thread(target=begin_ship_tracking, daemon=True)
+    ship_track_thread.start()
+
+    screen_update_thread:Thread = Thread(target=begin_screen_updates, args=[prefs.get("RENDERER", env.get("RENDERER", "inky"))], daemon=True)
+    screen_update_thread.start()
+
+    # Buttons are waited on here, and go straight to the screens
+    create_input_processor(vessel_update_queue).begin_processing()
+
+async def run_async():
+    # Everything is scheduled on one event loop. Each kind of blocking I/O
+    # gets workers of its own so I2C, SQLite and the display never wait
+    # behind each other. Message sources get one worker each.
+    loop:asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    bus_executor:ThreadPoolExecutor = ThreadPoolExecutor(len(prefs.get("SOURCES", [None])), thread_name_prefix="bus")
+    db_executor:ThreadPoolExecutor = ThreadPoolExecutor(1, thread_name_prefix="db")
+    display_executor:ThreadPoolExecutor = ThreadPoolExecutor(1, thread_name_prefix="display")
+    input_executor:ThreadPoolExecutor = ThreadPoolExecutor(1, thread_name_prefix="input")
+
+    message_queue:AsyncQueue = AsyncQueue(loop)
+    command_queue:AsyncQueue = AsyncQueue(loop, CoalescingBuffer())
+    start_metrics(message_queue, command_queue)
+
+    async def run_stage(name:str, stage:any):
+        try:
+            await stage
+        except Exception as ex:
+            logger.exception(f"{name} Exception", exc_info=ex)
+
+    message_processor:MessageProcessor = create_message_processor(message_queue)
+    tracker:ShipTracker = await loop.run_in_executor(db_executor, create_ship_tracker, message_queue, command_queue)
+    screen_manager:ScreenManager = create_screen_manager(command_queue, prefs.get("RENDERER", env.get("RENDERER", "inky")), AsyncioScheduler(loop, display_executor))
+
+    await asyncio.gather(
+        run_stage("Message Processing", message_processor.begin_processing_async(bus_executor)),
+        run_stage("Ship Tracking", tracker.begin_processing_async(db_executor)),
+        run_stage("Screen Update", screen_manager.begin_processing_async()),
+        run_stage("Input", create_input_processor(command_queue).begin_processing_async(input_executor)),
+    )
+
+def handle_terminate(signum, frame):
+    raise SystemExit(0)
 
-if not os.path.exists(".env"):
-    logger.critical(".env file does not exist!")
-    os._exit(-1)
-
-env:dict[str,str|None] = dotenv_values(".env")
 prefs:dict[str,any] = {}
 
 if os.path.exists("user_prefs.json"):
     with open("user_prefs.json") as prefs_file:
         prefs = json.load(prefs_file)
 
-ais_message_queue:Queue = Queue()
-vessel_update_queue:Queue = Queue()
+env:dict[str,str|None] = dotenv_values(".env")
 
-msg_proc_thread:Thread = Thread(target=begin_message_processing)
-msg_proc_thread.start()
+# Decode workers are forked from this process, so they're started before
+# any thread is, and can't inherit a lock some thread was holding
+decode_workers:int = int(env.get("DECODE_WORKERS", 0))
+decode_pool:ProcessPoolExecutor|None = parallel_decoder.create_pool(decode_workers) if decode_workers > 0 else None
 
-ship_track_thread:Thread = Thread(target=begin_ship_tracking)
-ship_track_thread.start()
+# Log lines are written out on a background thread. Per-message lines are
+# rate limited to LOG_RATE a second, with bursts of up to LOG_BURST.
+logger:logging.Logger = logging.getLogger(__name__)
+log_listener:any = log_pipeline.start('ais.log', rate=float(prefs.get("LOG_RATE", 1)), burst=int(prefs.get("LOG_BURST", 10)))
+log_pipeline.set_levels(prefs.get("LOG_LEVELS", {}))
 
-screen_update_thread:Thread = Thread(target=begin_screen_updates, args=[prefs.get("RENDERER","inky")])
-screen_update_thread.start()
+if not os.path.exists(".env"):
+    logger.critical(".env file does not exist!")
+    log_listener.stop()
+    os._exit(-1)
 
-#input_processor:InputProcessor = InputProcessor(KeyboardInput())
-input_processor:InputProcessor = InputProcessor(InkyInput())
+ais_message_queue:Queue = Queue()
+vessel_update_queue:CoalescingQueue = CoalescingQueue()
+ship_tracker:ShipTracker|None = None
+# Shared by the tracker, which records positions, and the map, which draws them
+track_history:TrackHistory = create_track_history()
+
+signal.signal(signal.SIGTERM, handle_terminate)
+
+exit_code:int = 0
+
+try:
+    if prefs.get("RUNTIME", "threads") == "asyncio":
+        asyncio.run(run_async())
+    else:
+        run_threads()
+except (KeyboardInterrupt, SystemExit):
+    logger.info("Shutting down")
+except Exception as ex:
+    logger.exception("Fatal error", exc_info=ex)
+    exit_code = 1
+finally:
+    # Make sure any batched database writes and queued log lines reach
+    # disk before exit. Each step is tried on its own, so one failing, or
+    # a second Ctrl-C, can't stop the process from exiting.
+    try:
+        if ship_tracker is not None:
+            ship_tracker.close()
+    except BaseException as ex:
+        logger.exception("Failed to close the ship tracker", exc_info=ex)
+        exit_code = exit_code or 1
 
-while True:
-    key_val: int = input_processor.get_key()
-    if key_val == 3:
-        vessel_update_queue.put(("mode",))
-    elif key_val is not None:
-        vessel_update_queue.put(("screen",key_val))
+    try:
+        log_listener.stop()
+    except BaseException:
+        exit_code = exit_code or 1
 
-    time.sleep(0.5)
\ No newline at end of file
+    # Executor workers in the asyncio runtime would be joined at
+    # interpreter exit while still blocked on I/O, so leave without it
+    os._exit(exit_code)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Compare vessel registry write rates with and without write-behind.
+
+Each mode writes the same stream of position and static reports to a fresh
+database file so the per-commit fsync cost is included.
+
+Run from the repository root:
+    python -m benchmark.database_benchmark --messages 5000 --fleet 300
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from vessel_database import VesselDatabase, WriteBehindVesselDatabase
+
+
+def make_messages(count:int, fleet_size:int) -> list[tuple[dict[str,any],bool]]:
+    rand:random.Random = random.Random(1)
+    messages:list[tuple[dict[str,any],bool]] = []
+    for _ in range(count):
+        mmsi:int = 200000000 + rand.randrange(fleet_size)
+        if rand.random() < 0.1:
+            messages.append(({"msg_type": 5, "mmsi": mmsi, "shipname": f"VESSEL {mmsi}", "callsign": "ABCD",
+                              "ship_type": 70, "to_bow": 50, "to_stern": 20, "to_port": 5, "to_starboard": 5}, True))
+        else:
+            messages.append(({"msg_type": 1, "mmsi": mmsi, "lat": 50.5, "lon": -1.0}, False))
+    return messages
+
+
+def bench(db:VesselDatabase, messages:list[tuple[dict[str,any],bool]]) -> float:
+    start:float = time.perf_counter()
+    for message, allow_update in messages:
+        db.record_ship(message, allow_update)
+        db.flush_if_due()
+    db.close()
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--fleet", type=int, default=300)
+    parser.add_argument("--flush-interval", type=float, default=5.0)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dir", default=None, help="Directory for the test databases, e.g. on the SD card")
+    args:argparse.Namespace = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    messages:list[tuple[dict[str,any],bool]] = make_messages(args.messages, args.fleet)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        commit_rate:float = bench(VesselDatabase(os.path.join(tmp_dir, "commit.db")), messages)
+        behind_rate:float = bench(WriteBehindVesselDatabase(os.path.join(tmp_dir, "behind.db"), args.flush_interval, args.batch_size), messages)
+
+    print(f"per-message commit: {commit_rate:>10.0f} rows/s")
+    print(f"write-behind:       {behind_rate:>10.0f} rows/s ({behind_rate / commit_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
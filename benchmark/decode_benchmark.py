@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare NMEA decode throughput inline and on a pool of worker processes.
+
+Lines are pushed through MessageProcessor as fast as possible and timed
+until the last record comes out the other end. Without a capture file a
+built-in mix of position and static reports is repeated.
+
+Run from the repository root:
+    python -m benchmark.decode_benchmark --lines 50000 --workers 0 1 2 4
+    python -m benchmark.decode_benchmark --capture capture.nmea
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from message_processor import MessageProcessor
+
+SAMPLE_LINES:list[bytes] = [
+    b"!AIVDM,1,1,,A,15M67FC000G?ufbE`FepT@3n00Sa,0*5C",
+    b"!AIVDM,1,1,,B,13u?etPv2;0n:dDPwUM1U1Cb069D,0*23",
+    b"!AIVDM,2,1,3,B,55?MbV02;H;s<HtKR20EHE:0@T4@Dn2222222216L961O5Gf0NSQEp6ClRp8,0*1C",
+    b"!AIVDM,2,2,3,B,88888888880,2*25",
+    b"!AIVDM,1,1,,A,B6CdCm0t3`tba35f@V9faHi7kP06,0*58",
+]
+
+
+class LineSource:
+    def __init__(self, lines:list[bytes]):
+        self.lines:list[bytes] = lines
+        self.handle_message = None
+
+    def begin_processing(self):
+        for line in self.lines:
+            self.handle_message(line)
+
+
+class CountingHandler:
+    def __init__(self):
+        self.count:int = 0
+        self.target:int|None = None
+        self.done:threading.Event = threading.Event()
+
+    def put(self, record:any):
+        self.count += 1
+        if self.count == self.target:
+            self.done.set()
+
+
+def count_records(lines:list[bytes]) -> int:
+    handler:CountingHandler = CountingHandler()
+    MessageProcessor(LineSource(lines), handler).begin_processing()
+    return handler.count
+
+
+def bench(lines:list[bytes], expected:int, workers:int) -> float:
+    handler:CountingHandler = CountingHandler()
+    handler.target = expected
+    processor:MessageProcessor = MessageProcessor(LineSource(lines), handler, workers)
+
+    start:float = time.perf_counter()
+    processor.begin_processing()
+    handler.done.wait()
+    elapsed:float = time.perf_counter() - start
+
+    if processor.decoder is not None:
+        processor.decoder.close()
+    return expected / elapsed
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--capture", default=None, help="NMEA capture to decode instead of the built-in sample")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args:argparse.Namespace = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    if args.capture:
+        with open(args.capture, "rb") as capture:
+            lines:list[bytes] = [line.strip() for line in capture if line.strip()]
+    else:
+        lines = (SAMPLE_LINES * (args.lines // len(SAMPLE_LINES) + 1))[:args.lines]
+
+    expected:int = count_records(lines)
+    print(f"{len(lines)} lines, {expected} records")
+
+    inline_rate:float|None = None
+    for workers in args.workers:
+        rate:float = bench(lines, expected, workers)
+        if workers == 0:
+            inline_rate = rate
+
+        label:str = "inline" if workers == 0 else f"{workers} workers"
+        relative:str = f" ({rate / inline_rate:.1f}x)" if inline_rate and workers else ""
+        print(f"{label:<10} {rate:>10.0f} records/s{relative}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for drawing vessels on the map screen.
+
+Compares the old per-vessel loop, which re-sorted the vessel list on every
+update and parsed, projected and labelled one vessel at a time, with the
+batch projection and grid label placement used by ShipMapScreen.
+
+Run from the repository root:
+    python -m benchmark.map_render_benchmark --vessels 20 100 300 1000
+"""
+
+import argparse
+import datetime
+import logging
+import random
+import statistics
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from renderer.null_renderer import NullRenderer
+from screen.ship_map_screen import ShipMapScreen
+from track_history import TrackHistory
+from vessel_state import VesselSnapshot
+
+BOUNDS:list[float] = [-122.6, 37.7, -122.2, 37.9]
+
+
+def make_ships(count:int, rand:random.Random, now:float) -> list[VesselSnapshot]:
+    ships:list[VesselSnapshot] = []
+    for i in range(count):
+        ships.append(VesselSnapshot(str(235000000 + i), f"VESSEL {i}", None, 70, None, 0, 0, 0, 0, 0, 0,
+                                    rand.uniform(37.7, 37.9), rand.uniform(-122.6, -122.2), 10.0, 90.0, 90, None, None,
+                                    int(now) - rand.randrange(240), now, 0, 0))
+    return ships
+
+
+def legacy_update(visible:dict[str,VesselSnapshot], ship:VesselSnapshot, max_tracked:int) -> dict[str,VesselSnapshot]:
+    visible[ship.mmsi] = ship
+    return dict(sorted(visible.items(), key=lambda item: item[1].ts, reverse=True)[:max_tracked])
+
+
+def legacy_draw(screen:ShipMapScreen, visible:dict[str,VesselSnapshot]) -> Image.Image:
+    img:Image.Image = Image.new("RGB", (screen.width, screen.height), color=screen.BLUE)
+    draw:ImageDraw.ImageDraw = ImageDraw.Draw(img)
+    now:datetime.datetime = datetime.datetime.now()
+
+    for ship in visible.values():
+        if (now - datetime.datetime.fromtimestamp(ship.ts)).total_seconds() > screen.time_window:
+            continue
+        if ship.lat is None or ship.lon is None or not screen.projection.contains(ship.lat, ship.lon):
+            continue
+
+        x, y = screen.projection.project(ship.lat, ship.lon)
+        draw.ellipse([x - 2.5, y - 2.5, x + 2.5, y + 2.5], screen.BLACK)
+        width, height = screen.hanken_bold_8.getbbox(ship.name)[2:]
+        draw.text((x - width / 2, y - 7.5 - height), ship.name, screen.RED, font=screen.hanken_bold_8)
+
+    return img
+
+
+def time_it(func:any, repeat:int) -> float:
+    times:list[float] = []
+    for _ in range(repeat):
+        start:float = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vessels", type=int, nargs="+", default=[20, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args:argparse.Namespace = parser.parse_args()
+
+    # Keep the screen's per-frame log lines out of the timings
+    logging.disable(logging.INFO)
+
+    print(f"{'vessels':>8} {'old update':>11} {'new update':>11} {'old draw':>9} {'new draw':>9} {'labels':>7}")
+    with tempfile.TemporaryDirectory() as map_dir:
+        # Write empty basemaps so the screen doesn't try to fetch them
+        for name in ("light", "dark"):
+            Image.new("RGB", (480, 800)).save(f"{map_dir}/{name}.png")
+
+        for count in args.vessels:
+            now:float = time.time()
+            ships:list[VesselSnapshot] = make_ships(count, random.Random(1), now)
+
+            screen:ShipMapScreen = ShipMapScreen(map_dir, NullRenderer(), "", BOUNDS, "", "", max_tracked=count,
+                                                 map_dir=map_dir, history=TrackHistory())
+
+            def new_updates():
+                for ship in ships:
+                    screen.update(("update", ship))
+
+            visible:dict[str,VesselSnapshot] = {}
+            def old_updates():
+                nonlocal visible
+                for ship in ships:
+                    visible = legacy_update(visible, ship, count)
+
+            old_update:float = time_it(old_updates, args.repeat) / count
+            new_update:float = time_it(new_updates, args.repeat) / count
+
+            screen.active = True
+            old_draw:float = time_it(lambda: legacy_draw(screen, visible), args.repeat)
+            new_draw:float = time_it(screen._render_screen, args.repeat)
+
+            draw:ImageDraw.ImageDraw = ImageDraw.Draw(Image.new("RGB", (screen.width, screen.height)))
+            texts:list[int] = []
+            draw.text = lambda *text_args, **kwargs: texts.append(1)
+            screen._ShipMapScreen__draw_ships(draw, screen._ShipMapScreen__locate_ships(time.time())[1])
+
+            print(f"{count:>8} {old_update * 1000:>9.1f}us {new_update * 1000:>9.1f}us {old_draw:>7.1f}ms {new_draw:>7.1f}ms {len(texts):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Measure MQTTMessageSource ingestion with single and batched payloads.
+
+A fake client stands in for the broker and delivers payloads straight to
+the source's callbacks, so only our handling is timed: splitting the
+payload, assembly and decoding in MessageProcessor. Each batch size is
+run through the batch path and, for comparison, line by line.
+
+Run from the repository root:
+    python -m benchmark.mqtt_benchmark --lines 20000 --batch-sizes 1 10 50
+"""
+
+import argparse
+import logging
+import time
+from types import SimpleNamespace
+
+from benchmark.decode_benchmark import SAMPLE_LINES, CountingHandler
+from message.mqtt_message_source import MQTTMessageSource
+from message_processor import MessageProcessor
+
+
+class FakeClient:
+    """Just enough of paho's Client to connect and deliver payloads."""
+
+    def __init__(self, payloads:list[bytes], topic:str):
+        self.payloads:list[bytes] = payloads
+        self.topic:str = topic
+        self.subscriptions:list[tuple[str,int]] = []
+
+        self.on_connect = None
+        self.on_message = None
+
+    def reconnect_delay_set(self, min_delay:int, max_delay:int):
+        pass
+
+    def connect_async(self, host:str, port:int, keepalive:int):
+        pass
+
+    def subscribe(self, topics:list[tuple[str,int]]):
+        self.subscriptions = topics
+
+    def loop_forever(self, retry_first_connection:bool = False):
+        self.on_connect(self, None, None, 0, None)
+        for payload in self.payloads:
+            self.on_message(self, None, SimpleNamespace(topic=self.topic, payload=payload))
+
+
+def make_payloads(lines:list[bytes], batch_size:int) -> list[bytes]:
+    # Keep multipart messages within one payload, as a gateway would
+    payloads:list[bytes] = []
+    batch:list[bytes] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size and b",2,1," not in line:
+            payloads.append(b"\n".join(batch) + b"\n")
+            batch = []
+
+    if batch:
+        payloads.append(b"\n".join(batch) + b"\n")
+    return payloads
+
+
+def bench(payloads:list[bytes], batched:bool) -> tuple[float,int]:
+    handler:CountingHandler = CountingHandler()
+    source:MQTTMessageSource = MQTTMessageSource("localhost", 1883, "ais/a,ais/b", qos=1, client=FakeClient(payloads, "ais/a"))
+    MessageProcessor(source, handler)
+
+    if not batched:
+        source.handle_messages = None
+
+    start:float = time.perf_counter()
+    source.begin_processing()
+    return handler.count / (time.perf_counter() - start), handler.count
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50])
+    args:argparse.Namespace = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    lines:list[bytes] = (SAMPLE_LINES * (args.lines // len(SAMPLE_LINES) + 1))[:args.lines]
+
+    for batch_size in args.batch_sizes:
+        payloads:list[bytes] = make_payloads(lines, batch_size)
+        batch_rate, count = bench(payloads, True)
+        line_rate, _ = bench(payloads, False)
+        print(f"batch size {batch_size:>4}: {len(payloads):>6} payloads, {count} messages, "
+              f"batched {batch_rate:>8.0f} msg/s, line by line {line_rate:>8.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Headless end-to-end throughput benchmark.
+
+Replays an NMEA capture through MessageProcessor -> ShipTracker ->
+ScreenManager, with the zone and table screens drawing to a null
+renderer, and reports messages per second and per-stage latency.
+
+Run from the repository root:
+    python -m benchmark.pipeline_benchmark capture.nmea --speed 0
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from collections import deque
+from queue import Queue
+from threading import Thread
+
+from message.file_message_source import FileMessageSource
+from message_processor import MessageProcessor
+from renderer.null_renderer import NullRenderer
+from screen.ship_table_screen import ShipTableScreen
+from screen.ship_zone_screen import ShipZoneScreen
+from screen_manager import ScreenManager
+from ship_tracker import ShipTracker
+
+
+class TimedQueue(Queue):
+    """FIFO queue that records how long each item waited in it."""
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.put_times:deque[float] = deque()
+        self.waits:list[float] = []
+
+    def _put(self, item):
+        self.put_times.append(time.perf_counter())
+        super()._put(item)
+
+    def _get(self):
+        self.waits.append(time.perf_counter() - self.put_times.popleft())
+        return super()._get()
+
+
+class StageTimer:
+    """Wraps a callable and records how long each call takes."""
+
+    def __init__(self, func:any):
+        self.func:any = func
+        self.times:list[float] = []
+
+    def __call__(self, *args):
+        start:float = time.perf_counter()
+        try:
+            return self.func(*args)
+        finally:
+            self.times.append(time.perf_counter() - start)
+
+
+def describe(name:str, samples:list[float]):
+    if len(samples) < 2:
+        print(f"{name:<28} {len(samples):>8} samples")
+        return
+
+    cuts:list[float] = statistics.quantiles(samples, n=100)
+    print(f"{name:<28} {len(samples):>8} samples  p50 {cuts[49] * 1000:>8.3f}ms  p95 {cuts[94] * 1000:>8.3f}ms  p99 {cuts[98] * 1000:>8.3f}ms  max {max(samples) * 1000:>8.3f}ms")
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="NMEA capture file, one sentence per line")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed, 1 for real time, 0 for as fast as possible")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-tracked", type=int, default=100)
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--prefs", default="user_prefs.json", help="Zones are loaded from here if it exists")
+    args:argparse.Namespace = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    ais_message_queue:TimedQueue = TimedQueue()
+    vessel_update_queue:TimedQueue = TimedQueue()
+
+    source:FileMessageSource = FileMessageSource(args.capture, args.speed, args.repeat)
+    message_processor:MessageProcessor = MessageProcessor(source, ais_message_queue)
+    decode_timer:StageTimer = StageTimer(source.handle_message)
+    source.handle_message = decode_timer
+
+    db_dir:tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+    ship_tracker:ShipTracker = ShipTracker(args.max_tracked, os.path.join(db_dir.name, "bench.db"), ais_message_queue, vessel_update_queue, write_behind=args.write_behind)
+    if os.path.exists(args.prefs):
+        with open(args.prefs) as prefs_file:
+            for zone in json.load(prefs_file).get("ZONES", []):
+                ship_tracker.add_zone((zone["name"], zone["lat"], zone["lon"], zone["radius"]))
+
+    # Receive time is carried on the record, so latency can be taken as
+    # soon as the tracker has finished with it
+    receive_latency:list[float] = []
+    update_vessel:any = ship_tracker.update_vessel
+    def timed_update(record):
+        update_vessel(record)
+        receive_latency.append(time.time() - record.received)
+    tracker_timer:StageTimer = StageTimer(timed_update)
+    ship_tracker.update_vessel = tracker_timer
+
+    renderer:NullRenderer = NullRenderer()
+    screens:list[any] = [ShipZoneScreen("img", renderer), ShipTableScreen("img", renderer)]
+    screen_manager:ScreenManager = ScreenManager(screens, vessel_update_queue)
+    screen_timers:list[StageTimer] = []
+    for screen in screens:
+        screen_timers.append(StageTimer(screen.update))
+        screen.update = screen_timers[-1]
+
+    Thread(target=ship_tracker.begin_processing, daemon=True).start()
+    Thread(target=screen_manager.begin_processing, daemon=True).start()
+
+    start:float = time.perf_counter()
+    message_processor.begin_processing()
+    replayed:float = time.perf_counter() - start
+
+    # Wait for the downstream stages to drain
+    while ais_message_queue.qsize() or vessel_update_queue.qsize() or len(tracker_timer.times) < len(ais_message_queue.waits):
+        time.sleep(0.01)
+    elapsed:float = time.perf_counter() - start
+
+    lines:int = len(decode_timer.times)
+    decoded:int = len(ais_message_queue.waits)
+    print(f"lines {lines}, decoded messages {decoded}, vessel events {len(vessel_update_queue.waits)}, frames {renderer.frames}")
+    print(f"replay {replayed:.2f}s, drained {elapsed:.2f}s, {lines / elapsed:.0f} lines/s, {decoded / elapsed:.0f} messages/s")
+    describe("decode (per line)", decode_timer.times)
+    describe("ais_message_queue wait", ais_message_queue.waits)
+    describe("tracker (per message)", tracker_timer.times)
+    describe("receive to tracker", receive_latency)
+    describe("vessel_update_queue wait", vessel_update_queue.waits)
+    for screen, timer in zip(screens, screen_timers):
+        describe(f"{type(screen).__name__}.update", timer.times)
+
+    ship_tracker.close()
+    db_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
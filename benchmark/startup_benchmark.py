@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Measure import cost at startup with python -X importtime.
+
+Each module is imported in a fresh interpreter, so the times are for a
+cold start of that module and everything it pulls in. The core modules
+are what ais.py always imports. Backends are only imported when chosen
+in user_prefs.json or .env, so each is listed on its own.
+
+Time to the first frame is logged by the renderer at startup ("First
+frame shown ...") and exported as ais_first_frame_seconds.
+
+Run from the repository root, ideally on the Pi:
+    python -m benchmark.startup_benchmark --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+import registry
+
+CORE_MODULES:list[str] = [
+    "dotenv", "metrics", "registry", "input_processor", "message.multiplexed_message_source",
+    "message_processor", "scheduling", "screen.ship_map_screen", "screen.ship_table_screen",
+    "screen.ship_zone_screen", "screen_manager", "ship_tracker", "track_history", "update_channel",
+]
+
+
+def import_time(modules:list[str]) -> float|None:
+    """Cumulative import time of modules in seconds, or None if any failed."""
+    result:subprocess.CompletedProcess = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+                                                        capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+
+    # Lines are "import time: self | cumulative | name", with the names of
+    # nested imports indented. Anything a module imports that was already
+    # loaded by an earlier one isn't counted again.
+    total:int = 0
+    for line in result.stderr.splitlines():
+        fields:list[str] = line.split("|")
+        if len(fields) == 3 and fields[2].strip() in modules and not fields[2][1:].startswith(" "):
+            total += int(fields[1])
+
+    return total / 1e6
+
+
+def median_time(modules:list[str], runs:int) -> float|None:
+    times:list[float|None] = [import_time(modules) for _ in range(runs)]
+    if None in times:
+        return None
+    return statistics.median(times)
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args:argparse.Namespace = parser.parse_args()
+
+    core:float|None = median_time(CORE_MODULES, args.runs)
+    print(f"{'core (all together)':<48} {core * 1000:>8.1f}ms" if core is not None else "core failed to import")
+
+    for module in CORE_MODULES:
+        elapsed:float|None = median_time([module], args.runs)
+        print(f"  {module:<46} {elapsed * 1000:>8.1f}ms" if elapsed is not None else f"  {module:<46} failed")
+
+    for kind, backends in [("source", registry.sources), ("renderer", registry.renderers), ("input", registry.inputs)]:
+        for name, target in backends.targets.items():
+            module:str = target.partition(":")[0]
+            elapsed = median_time([module], args.runs)
+            label:str = f"{kind} {name} ({module})"
+            print(f"{label:<48} {elapsed * 1000:>8.1f}ms" if elapsed is not None else f"{label:<48}   not available")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the vessel photo thumbnail cache.
+
+Times getting a zone card sized photo by opening and resizing the full
+size original every time, as ShipZoneScreen used to, against reading the
+derivative from the disk cache and from the in-memory LRU.
+
+Run from the repository root:
+    python -m benchmark.thumbnail_benchmark --size 4000x3000 --photos 10
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from PIL import Image
+
+from screen.ship_zone_screen import ShipZoneScreen
+from screen.thumbnail_cache import ThumbnailCache, resize_to_fit
+
+
+def time_each(paths:list[str], get:any) -> float:
+    times:list[float] = []
+    for path in paths:
+        start:float = time.perf_counter()
+        get(path)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="4000x3000", help="photo size as WIDTHxHEIGHT")
+    parser.add_argument("--photos", type=int, default=10)
+    args:argparse.Namespace = parser.parse_args()
+
+    photo_width, photo_height = (int(value) for value in args.size.lower().split("x"))
+    width, height = ShipZoneScreen.photo_size(480)
+
+    with tempfile.TemporaryDirectory() as img_dir:
+        paths:list[str] = []
+        for i in range(args.photos):
+            path:str = os.path.join(img_dir, str(235000000 + i))
+            Image.radial_gradient("L").resize((photo_width, photo_height)).convert("RGB").save(path, "JPEG")
+            paths.append(path)
+
+        def original(path:str):
+            with Image.open(path) as pic:
+                resize_to_fit(pic, width, height)
+
+        uncached:float = time_each(paths, original)
+
+        ThumbnailCache(os.path.join(img_dir, ".thumbs")).warm(img_dir, width, height)
+        disk:float = time_each(paths, lambda path: ThumbnailCache(os.path.join(img_dir, ".thumbs")).get(path, width, height))
+
+        cache:ThumbnailCache = ThumbnailCache(os.path.join(img_dir, ".thumbs"), memory_entries=args.photos)
+        for path in paths:
+            cache.get(path, width, height)
+        memory:float = time_each(paths, lambda path: cache.get(path, width, height))
+
+    print(f"{args.photos} photos of {photo_width}x{photo_height} fitted to {width}x{height}")
+    print(f"open and resize: {uncached:8.2f} ms")
+    print(f"disk cache:      {disk:8.2f} ms ({uncached / disk:.0f}x)")
+    print(f"memory cache:    {memory:8.3f} ms ({uncached / memory:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the ShipTracker tracked-vessel table.
+
+Compares the old sort-and-copy trim with the LRU table used by ShipTracker,
+then times full update_vessel calls against an in-memory database.
+
+Run from the repository root:
+    python -m benchmark.tracker_benchmark --sizes 100 1000 5000
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from message.ais_record import AISRecord
+from ship_tracker import ShipTracker
+
+
+class NullQueue:
+    def put(self, item):
+        pass
+
+
+def make_messages(count:int, fleet_size:int) -> list[dict[str,any]]:
+    rand:random.Random = random.Random(1)
+    messages:list[dict[str,any]] = []
+    for _ in range(count):
+        messages.append({
+            "msg_type": 1,
+            "mmsi": 200000000 + rand.randrange(fleet_size),
+            "lat": rand.uniform(50.0, 51.0),
+            "lon": rand.uniform(-1.5, -0.5),
+            "speed": rand.uniform(0, 20),
+            "course": rand.uniform(0, 360),
+        })
+    return messages
+
+
+def bench_sorted_trim(messages:list[dict[str,any]], max_tracked:int) -> float:
+    # Start from a full table, as a long running tracker would be
+    vessels:dict[int,dict[str,any]] = {mmsi: {"ts": -1} for mmsi in range(max_tracked)}
+    start:float = time.perf_counter()
+    for i, message in enumerate(messages):
+        vessels[message["mmsi"]] = {**message, "ts": i}
+        vessels = dict(sorted(vessels.items(), key=lambda item: item[1]['ts'], reverse=True)[:max_tracked])
+    return len(messages) / (time.perf_counter() - start)
+
+
+def bench_tracker(messages:list[dict[str,any]], max_tracked:int) -> float:
+    tracker:ShipTracker = ShipTracker(max_tracked, ":memory:", None, NullQueue())
+    records:list[AISRecord] = [AISRecord.from_decoded(dict(message)) for message in messages]
+    for record in records[:max_tracked * 2]:
+        tracker.update_vessel(record)
+
+    start:float = time.perf_counter()
+    for record in records:
+        tracker.update_vessel(record)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def bench_lru_trim(messages:list[dict[str,any]], max_tracked:int) -> float:
+    tracker:ShipTracker = ShipTracker(max_tracked, ":memory:", None, NullQueue())
+    track = tracker._ShipTracker__track_vessel
+    for mmsi in range(max_tracked):
+        track(mmsi, {})
+
+    start:float = time.perf_counter()
+    for message in messages:
+        track(message["mmsi"], message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000, 5000])
+    parser.add_argument("--messages", type=int, default=20000)
+    args:argparse.Namespace = parser.parse_args()
+
+    # Keep the tracker's per-message log lines out of the timings
+    logging.disable(logging.INFO)
+
+    print(f"{'size':>6} {'sorted trim/s':>14} {'lru trim/s':>14} {'update_vessel/s':>16}")
+    for size in args.sizes:
+        # Twice as many vessels as table slots so eviction is exercised
+        messages:list[dict[str,any]] = make_messages(args.messages, size * 2)
+
+        # The old trim is O(n log n) per update, so cap its sample
+        sorted_rate:float = bench_sorted_trim(messages[:max(200, 1000000 // size)], size)
+        lru_rate:float = bench_lru_trim(messages, size)
+        tracker_rate:float = bench_tracker(messages, size)
+        print(f"{size:>6} {sorted_rate:>14.0f} {lru_rate:>14.0f} {tracker_rate:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
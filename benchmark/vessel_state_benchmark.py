@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Compare memory and allocations of merged ship dicts and VesselState.
+
+The old tracker built a filtered copy of each decoded message and merged
+it with the previous ship dict into a new dict per message. VesselState
+is updated in place and hands out one snapshot tuple per message. Both
+are fed the same full pyais messages.
+
+Run from the repository root:
+    python -m benchmark.vessel_state_benchmark --fleet 500 --messages 20000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from pyais import decode
+
+from vessel_state import VesselState
+
+KEY_FILTER:list[str] = ["mmsi", "msg_type", "sentences", "callsign", "shipname",
+                        "ship_type", "to_bow", "to_stern", "to_port", "to_starboard"]
+
+
+def make_messages(count:int, fleet_size:int) -> list[dict[str,any]]:
+    template:dict[str,any] = decode(b"!AIVDM,1,1,,A,15M67FC000G?ufbE`FepT@3n00Sa,0*5C").asdict()
+    rand:random.Random = random.Random(1)
+    messages:list[dict[str,any]] = []
+    for _ in range(count):
+        messages.append({**template, "mmsi": 200000000 + rand.randrange(fleet_size),
+                         "lat": rand.uniform(50.0, 51.0), "lon": rand.uniform(-1.5, -0.5),
+                         "speed": rand.uniform(0, 20), "course": rand.uniform(0, 360)})
+    return messages
+
+
+def make_row(mmsi:int) -> dict[str,any]:
+    return {"mmsi": str(mmsi), "imo": "0", "name": f"VESSEL {mmsi}", "callsign": "ABCD", "type": 70,
+            "bow": 50, "stern": 20, "port": 5, "starboard": 5, "first_sight": 0, "last_sight": 0}
+
+
+def dict_update(vessels:dict[int,any], row:dict[str,any], message:dict[str,any], received:float) -> dict[str,any]:
+    dynamic_data:dict[str,any] = {k: v for k, v in message.items() if k not in KEY_FILTER}
+    ship_prev:dict[str,any] = vessels.get(message["mmsi"], {})
+    ship:dict[str,any] = dict(row)
+    ship["zone"] = None
+    ship = {**ship_prev, **ship, **dynamic_data, **{"ts": int(received), "received": received}}
+    vessels[message["mmsi"]] = ship
+    return ship
+
+
+def state_update(vessels:dict[int,any], row:dict[str,any], message:dict[str,any], received:float) -> tuple:
+    state:VesselState|None = vessels.get(message["mmsi"])
+    if state is None:
+        state = vessels[message["mmsi"]] = VesselState(row["mmsi"])
+        state.apply_static(row)
+    else:
+        state.last_sight = row["last_sight"]
+
+    state.apply_dynamic(message)
+    state.zone = None
+    state.ts = int(received)
+    state.received = received
+    state.version += 1
+    return state.snapshot()
+
+
+def bench(update:any, messages:list[dict[str,any]], rows:dict[int,dict[str,any]]) -> tuple[float,float,float]:
+    # Speed, without tracing overhead
+    vessels:dict[int,any] = {}
+    start:float = time.perf_counter()
+    for message in messages:
+        update(vessels, rows[message["mmsi"]], message, 0.0)
+    per_message:float = (time.perf_counter() - start) / len(messages)
+
+    # Peak memory allocated during a single update, with the state warm
+    tracemalloc.start()
+    peak_total:int = 0
+    for message in messages:
+        before:int = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result:any = update(vessels, rows[message["mmsi"]], message, 0.0)
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+        del result
+    tracemalloc.stop()
+
+    # Memory held for the fleet, counting what the tracker keeps and the
+    # latest object handed to the screens for each vessel
+    tracemalloc.start()
+    vessels = {}
+    handed_out:dict[int,any] = {}
+    for message in messages:
+        handed_out[message["mmsi"]] = update(vessels, rows[message["mmsi"]], message, 0.0)
+    retained:int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return per_message * 1e6, peak_total / len(messages), retained / len(vessels)
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fleet", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=20000)
+    args:argparse.Namespace = parser.parse_args()
+
+    messages:list[dict[str,any]] = make_messages(args.messages, args.fleet)
+    rows:dict[int,dict[str,any]] = {message["mmsi"]: make_row(message["mmsi"]) for message in messages}
+
+    print(f"{'':<14} {'us/message':>10} {'bytes/message':>14} {'bytes/vessel':>13}")
+    for name, update in [("merged dict", dict_update), ("VesselState", state_update)]:
+        speed, allocated, retained = bench(update, messages, rows)
+        print(f"{name:<14} {speed:>10.2f} {allocated:>14.0f} {retained:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
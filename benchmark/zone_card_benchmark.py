@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the ShipZoneScreen card cache.
+
+Times how long a zone event takes to turn into a frame for the renderer,
+with the card drawn from scratch and with it already drawn in the
+background from the vessel's earlier updates.
+
+Run from the repository root:
+    python -m benchmark.zone_card_benchmark --vessels 20 --rounds 5
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from renderer.null_renderer import NullRenderer
+from screen.ship_zone_screen import ShipZoneScreen
+from vessel_state import VesselSnapshot
+
+
+def make_ship(i:int) -> VesselSnapshot:
+    return VesselSnapshot(str(235000000 + i), f"VESSEL {i}", f"ABC{i}", 70, "0", 50 + i, 20, 5, 6 + i,
+                          0, 0, 50.5, -1.0, 10.5, 90.0, 90, "SOUTHAMPTON", "Zone", 0, time.time(), 1, 1)
+
+
+def time_zone_hits(screen:ShipZoneScreen, ships:list[VesselSnapshot]) -> list[float]:
+    times:list[float] = []
+    for ship in ships:
+        # Let the next zone event through rather than skip the same ship
+        screen.visible_ship = None
+        start:float = time.perf_counter()
+        screen.update(("zone", ship, None))
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vessels", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args:argparse.Namespace = parser.parse_args()
+
+    # Keep the screen's per-event log lines out of the timings
+    logging.disable(logging.INFO)
+
+    ships:list[VesselSnapshot] = [make_ship(i) for i in range(args.vessels)]
+
+    with tempfile.TemporaryDirectory() as img_dir:
+        cold:list[float] = []
+        for _ in range(args.rounds):
+            screen:ShipZoneScreen = ShipZoneScreen(img_dir, NullRenderer(), card_cache_size=0)
+            screen.active = True
+            cold += time_zone_hits(screen, ships)
+
+        screen = ShipZoneScreen(img_dir, NullRenderer(), card_cache_size=args.vessels)
+        screen.cards.interval = 0
+        screen.active = True
+        for ship in ships:
+            screen.update(("update", ship))
+        while len(screen.cards) < len(ships):
+            time.sleep(0.01)
+
+        warm:list[float] = []
+        for _ in range(args.rounds):
+            warm += time_zone_hits(screen, ships)
+
+    cold_ms:float = statistics.median(cold) * 1000
+    warm_ms:float = statistics.median(warm) * 1000
+    print(f"zone hit, drawn on demand: {cold_ms:7.2f} ms")
+    print(f"zone hit, card prefetched: {warm_ms:7.2f} ms ({cold_ms / warm_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
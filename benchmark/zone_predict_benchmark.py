@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for zone-entry prediction.
+
+Times ZoneIndex.predict, which only tests zones filed under the grid cells
+a vessel's projected path crosses, against testing the path against every
+zone, for a growing number of zones.
+
+Run from the repository root:
+    python -m benchmark.zone_predict_benchmark --zones 10 100 1000 10000
+"""
+
+import argparse
+import random
+import time
+
+from zone_index import ZoneIndex
+
+
+def make_index(count:int, rand:random.Random) -> ZoneIndex:
+    index:ZoneIndex = ZoneIndex()
+    for i in range(count):
+        index.add(f"zone {i}", rand.uniform(49.0, 52.0), rand.uniform(-3.0, 1.0), rand.uniform(0.2, 2.0))
+    return index
+
+
+def make_reports(count:int, rand:random.Random) -> list[tuple[float,float,float,float]]:
+    return [(rand.uniform(49.0, 52.0), rand.uniform(-3.0, 1.0), rand.uniform(1, 25), rand.uniform(0, 360)) for _ in range(count)]
+
+
+def bench_predict(index:ZoneIndex, reports:list[tuple[float,float,float,float]], horizon:float) -> tuple[float,int]:
+    hits:int = 0
+    start:float = time.perf_counter()
+    for lat, lon, speed, course in reports:
+        if index.predict(lat, lon, speed, course, horizon) is not None:
+            hits += 1
+    return len(reports) / (time.perf_counter() - start), hits
+
+
+def bench_all_zones(index:ZoneIndex, reports:list[tuple[float,float,float,float]], horizon:float) -> tuple[float,int]:
+    # Same test, with the grid swapped for a list of every zone
+    every:list[int] = list(range(len(index)))
+    index._ZoneIndex__path_candidates = lambda *args: every
+    try:
+        return bench_predict(index, reports, horizon)
+    finally:
+        del index._ZoneIndex__path_candidates
+
+
+def main():
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--reports", type=int, default=5000)
+    parser.add_argument("--horizon", type=float, default=600)
+    args:argparse.Namespace = parser.parse_args()
+
+    print(f"{'zones':>8} {'grid/s':>12} {'all zones/s':>12} {'speed-up':>9} {'hits':>6}")
+    for count in args.zones:
+        rand:random.Random = random.Random(1)
+        index:ZoneIndex = make_index(count, rand)
+        reports:list[tuple[float,float,float,float]] = make_reports(args.reports, rand)
+
+        grid, hits = bench_predict(index, reports, args.horizon)
+        brute, brute_hits = bench_all_zones(index, reports, args.horizon)
+        assert hits == brute_hits
+
+        print(f"{count:>8} {grid:>12,.0f} {brute:>12,.0f} {grid / brute:>8.1f}x {hits:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,43 @@
 import logging
+from datetime import timedelta
 
 import gpiod
 import gpiodevice
+from gpiod.edge_event import EdgeEvent
 from gpiod.line import Bias, Direction, Edge
 
 
 class InkyInput:
-    def __init__(self):
+    def __init__(self, debounce:float = 0.05):
         self.logger: logging.Logger = logging.getLogger(__name__)
 
         buttons: list[int] = [24, 16, 6, 5]
-        line_settings: any = gpiod.LineSettings(direction=Direction.INPUT, bias=Bias.PULL_UP, edge_detection=Edge.FALLING)
+        # Both edges, so the processor can tell how long a button was held.
+        # The buttons pull the line low while pressed. The kernel drops
+        # contact bounce, only reporting a level once it has held for
+        # debounce seconds.
+        line_settings: any = gpiod.LineSettings(direction=Direction.INPUT, bias=Bias.PULL_UP, edge_detection=Edge.BOTH,
+                                                debounce_period=timedelta(seconds=debounce))
         chip: any = gpiodevice.find_chip_by_platform()
         self.offsets: list[any] = [chip.line_offset_from_id(id) for id in buttons]
         line_config: dict[any, any] = dict.fromkeys(self.offsets, line_settings)
         self.request: any = chip.request_lines(consumer="inky7-buttons", config=line_config)
 
-    def get_key(self) -> int|None:
-        events: any = self.request.read_edge_events()
-        if len(events) > 0:
+    def read_events(self, timeout:float|None) -> list[tuple[int,bool,float]]:
+        """Wait up to timeout seconds, or forever if None, for buttons to
+        change, returning (button, pressed, monotonic time) for each edge."""
+        if not self.request.wait_edge_events(timeout):
+            return []
+
+        events: list[tuple[int,bool,float]] = []
+        for event in self.request.read_edge_events():
             try:
-                index: int = self.offsets.index(events[-1].line_offset)
-                if index >= 0 and index < 4:
-                    return index
+                index: int = self.offsets.index(event.line_offset)
             except ValueError as e:
                 self.logger.exception("Button read exception", exc_info=e)
+                continue
+
+            # Edge timestamps are from the monotonic clock by default
+            events.append((index, event.event_type == EdgeEvent.Type.FALLING_EDGE, event.timestamp_ns / 1e9))
 
-        return None
\ No newline at end of file
+        return events
@@ -1,11 +1,28 @@
+import queue
+import time
+
 import keyboard
 
 class KeyboardInput:
-    def get_key(self) -> int|None:
+    def __init__(self, debounce:float = 0.0):
+        # Keys don't bounce. debounce is taken so any input can be created
+        # the same way.
         keys: list[str] = ['1','2','3','4']
 
-        for k in keys:
-            if keyboard.is_pressed(k):
-                return keys.index(k)
-        
-        return None
\ No newline at end of file
+        # The keyboard hook calls back on its own thread for every key
+        # down and up, which is queued for read_events
+        self.events: queue.SimpleQueue = queue.SimpleQueue()
+        for index, key in enumerate(keys):
+            keyboard.hook_key(key, lambda event, index=index: self.events.put((index, event.event_type == keyboard.KEY_DOWN, time.monotonic())))
+
+    def read_events(self, timeout:float|None) -> list[tuple[int,bool,float]]:
+        try:
+            events: list[tuple[int,bool,float]] = [self.events.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
@@ -1,12 +1,98 @@
+import asyncio
+import logging
+import time
+
+import metrics
+
+# Buttons A-C pick a screen and D toggles dark mode. Holding D redraws
+# the whole display, to clear any ghosting.
+PRESS_COMMANDS:dict[int,tuple] = {0: ("screen",0), 1: ("screen",1), 2: ("screen",2), 3: ("mode",)}
+LONG_PRESS_COMMANDS:dict[int,tuple] = {3: ("refresh",)}
+
+
 class InputProcessor:
-    def __init__(self, processor:any):
-        self.processor: any = processor
-        self.prev_key: int = None
-
-    def get_key(self) -> int:
-        new_key: int = self.processor.get_key()
-        if new_key != self.prev_key:
-            self.prev_key = new_key
-            return new_key
-        
-        return None
\ No newline at end of file
+    """Turns button presses into screen commands as they happen.
+
+    The device blocks in read_events(timeout) until there are edges to
+    report, as a list of (button, pressed, time.monotonic() timestamp).
+    Contact bounce is the device's to filter out. An edge that leaves a
+    button where it already was, like key repeat or a release missed
+    before startup, is dropped, so a real release is never lost.
+
+    A button with no long press command sends its command as soon as it
+    goes down. One with a long press command sends it once held for
+    long_press seconds, or its short command if let go before then."""
+
+    def __init__(self, device:any, command_queue:any, long_press:float = 1.0,
+                 commands:dict[int,tuple] = PRESS_COMMANDS, long_commands:dict[int,tuple] = LONG_PRESS_COMMANDS):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.device:any = device
+        self.command_queue:any = command_queue
+
+        self.long_press:float = long_press
+        self.commands:dict[int,tuple] = commands
+        self.long_commands:dict[int,tuple] = long_commands
+
+        # Buttons that are down -> when they went down, or None once their
+        # command has been sent
+        self.held:dict[int,float|None] = {}
+
+        self.presses:metrics.Counter = metrics.counter("ais_input_presses_total", "Button presses turned into commands", kind="short")
+        self.long_presses:metrics.Counter = metrics.counter("ais_input_presses_total", "Button presses turned into commands", kind="long")
+
+    def begin_processing(self):
+        while True:
+            self.handle_events(self.device.read_events(self.__timeout()))
+
+    async def begin_processing_async(self, executor:any = None):
+        loop:asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+        while True:
+            events:list[tuple[int,bool,float]] = await loop.run_in_executor(executor, self.device.read_events, self.__timeout())
+            self.handle_events(events)
+
+    def __timeout(self) -> float|None:
+        # Only wake without an edge when a held button becomes a long press
+        waiting:list[float] = [pressed for pressed in self.held.values() if pressed is not None]
+        if not waiting:
+            return None
+
+        return max(0.0, min(waiting) + self.long_press - time.monotonic())
+
+    def handle_events(self, events:list[tuple[int,bool,float]]):
+        for button, pressed, timestamp in events:
+            if pressed:
+                # Key repeat sends more presses while a key is held
+                if button in self.held:
+                    continue
+
+                if button in self.long_commands:
+                    self.held[button] = timestamp
+                else:
+                    self.held[button] = None
+                    self.__send(self.commands.get(button), self.presses)
+            else:
+                down:float|None = self.held.pop(button, None)
+                if down is None:
+                    continue
+
+                # Both edges can arrive together if reading fell behind
+                if timestamp - down >= self.long_press:
+                    self.__send(self.long_commands[button], self.long_presses)
+                else:
+                    self.__send(self.commands.get(button), self.presses)
+
+        now:float = time.monotonic()
+        for button, pressed in self.held.items():
+            if pressed is not None and now - pressed >= self.long_press:
+                self.held[button] = None
+                self.__send(self.long_commands[button], self.long_presses)
+
+    def __send(self, command:tuple|None, counter:metrics.Counter):
+        if command is None:
+            return
+
+        self.logger.debug(f"Button command {command}")
+        self.command_queue.put(command)
+        counter.inc()
@@ -0,0 +1,120 @@
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+import metrics
+
+FORMAT:str = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DATE_FORMAT:str = "%Y-%m-%d %H:%M:%S"
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket sampling for records logged with extra={"rate_key": ...}.
+
+    Each key gets its own bucket, refilled at rate records per second up
+    to burst, so one noisy line can't crowd out another. Records without
+    a key always pass. Dropped records are counted per key."""
+
+    def __init__(self, rate:float = 1.0, burst:int = 10):
+        super().__init__()
+
+        self.rate:float = rate
+        self.burst:int = burst
+
+        # Loggers are called from every thread
+        self.lock:threading.Lock = threading.Lock()
+        # key -> [tokens, last refill]
+        self.buckets:dict[str,list[float]] = {}
+        self.suppressed:dict[str,metrics.Counter] = {}
+
+    def filter(self, record:logging.LogRecord) -> bool:
+        key:str|None = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+
+        now:float = time.monotonic()
+
+        with self.lock:
+            bucket:list[float]|None = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+
+            counter:metrics.Counter|None = self.suppressed.get(key)
+            if counter is None:
+                counter = self.suppressed[key] = metrics.counter("ais_log_suppressed_total", "Log records dropped by rate limiting", key=key)
+            counter.inc()
+
+        return False
+
+    def suppressed_counts(self) -> dict[str,int]:
+        with self.lock:
+            return {key: int(counter.get()) for key, counter in self.suppressed.items()}
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    # The listener is in the same process, so records can be passed as
+    # they are. Formatting is left to the writer thread rather than done
+    # here on the caller's thread, as QueueHandler would by default.
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def start(log_file:str, level:int = logging.INFO, rate:float = 1.0, burst:int = 10, summary_interval:float = 60) -> logging.handlers.QueueListener:
+    """Send all logging through a queue to a background writer thread.
+
+    The file and console handlers only run on the writer thread, so a
+    slow SD card never holds up the pipeline. Stop the returned listener
+    on shutdown to write out anything still queued."""
+    formatter:logging.Formatter = logging.Formatter(FORMAT, DATE_FORMAT)
+    handlers:list[logging.Handler] = [logging.FileHandler(log_file), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue:queue.SimpleQueue = queue.SimpleQueue()
+    listener:logging.handlers.QueueListener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    rate_limit:RateLimitFilter = RateLimitFilter(rate, burst)
+    queue_handler:_LocalQueueHandler = _LocalQueueHandler(log_queue)
+    queue_handler.addFilter(rate_limit)
+
+    root:logging.Logger = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener.start()
+
+    if summary_interval > 0:
+        threading.Thread(target=_log_summaries, args=[rate_limit, summary_interval], daemon=True).start()
+
+    return listener
+
+def set_levels(levels:dict[str,str]):
+    """Set levels per subsystem, e.g. {"message.daisy_message_source": "WARNING"}."""
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+def _log_summaries(rate_limit:RateLimitFilter, interval:float):
+    # Traffic only shows up in the log as a count, however busy it gets
+    logger:logging.Logger = logging.getLogger(__name__)
+    previous:dict[str,int] = {}
+
+    while True:
+        time.sleep(interval)
+
+        counts:dict[str,int] = rate_limit.suppressed_counts()
+        dropped:dict[str,int] = {key: count - previous.get(key, 0) for key, count in counts.items() if count != previous.get(key, 0)}
+        previous = counts
+
+        if dropped:
+            logger.info(f"Suppressed in the last {interval:.0f}s: {', '.join(f'{key} {count}' for key, count in dropped.items())}")
@@ -0,0 +1,31 @@
+import json
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class AISRecord:
+    """A decoded AIS message passed between stages in this process.
+
+    Records are handed over as-is on in-memory queues. Use to_json only
+    when a record needs to leave the process."""
+
+    msg_type:int
+    mmsi:int
+    fields:dict[str,any]
+    received:float = field(default_factory=time.time)
+
+    @classmethod
+    def from_decoded(cls, decoded:dict[str,any], received:float|None = None) -> "AISRecord":
+        # pyais leaves some text fields as raw bytes
+        for key, value in decoded.items():
+            if isinstance(value, bytes):
+                decoded[key] = value.decode('utf-8', errors='ignore')
+
+        if received is None:
+            received = time.time()
+
+        return cls(decoded["msg_type"], decoded["mmsi"], decoded, received)
+
+    def to_json(self) -> str:
+        return json.dumps(self.fields)
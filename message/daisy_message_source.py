@@ -1,7 +1,11 @@
-from smbus2 import SMBus
+from smbus2 import SMBus, i2c_msg
+import asyncio
 import time
 import logging
 
+import metrics
+from message.line_buffer import LineBuffer
+
 class DaisyMessageSource:
     DEVICE_ADDR = 0x33
 
@@ -13,26 +17,70 @@ class DaisyMessageSource:
     MESSAGE_BUFF_ADDR = 0xFF
 
     MAX_BLOCK_SIZE = 32
-    READ_INTERVAL = 0.05
+    MAX_TRANSFER_SIZE = 512
+    BUFFER_SIZE = 4096
+
+    # Polling speeds up to MIN_READ_INTERVAL while data is arriving and
+    # backs off towards MAX_READ_INTERVAL while the radio is quiet
+    MIN_READ_INTERVAL = 0.01
+    MAX_READ_INTERVAL = 0.2
     ERROR_WAIT_TIME = 0.01
 
-    def __init__(self):
+    def __init__(self, combined_read:bool = False):
         self.logger:logging.Logger = logging.getLogger(__name__)
         self.bus = SMBus(1)
         self.handle_message = None
 
+        # Read registers and messages as single write+read transfers.
+        # Only for firmware that auto-increments the register address.
+        self.combined_read:bool = combined_read
+
+        self.buffer:LineBuffer = LineBuffer(self.BUFFER_SIZE)
+        self.read_interval:float = self.MIN_READ_INTERVAL
+
+        self.bytes_read:metrics.Counter = metrics.counter("ais_source_bytes_total", "Bytes read from the source", source="daisy")
+        self.lines_read:metrics.Counter = metrics.counter("ais_source_lines_total", "Lines passed on by the source", source="daisy")
+
     def read_byte(self, addr):
         self.bus.write_byte(self.DEVICE_ADDR, addr)
         return self.bus.read_byte(self.DEVICE_ADDR)
-    
-    def read_block(self, size: int) -> str:
-        buff = bytearray()
+
+    def read_available(self) -> int:
+        if self.combined_read:
+            try:
+                data:bytes = self.__transfer(self.BYTES_AVAIL_H_ADDR, 2)
+                return (data[0] << 8) | data[1]
+            except OSError as ex:
+                self.logger.warning(f"Combined I2C read failed, falling back to single reads: {ex}")
+                self.combined_read = False
+
+        high = self.read_byte(self.BYTES_AVAIL_H_ADDR)
+        low = self.read_byte(self.BYTES_AVAIL_L_ADDR)
+        return (high << 8) | low
+
+    def read_block(self, size: int):
+        """Read size bytes from the device straight into the line buffer."""
+        max_size:int = self.MAX_TRANSFER_SIZE if self.combined_read else self.MAX_BLOCK_SIZE
+
         while size > 0:
-            buff_size = min(size, self.MAX_BLOCK_SIZE)
-            block = self.bus.read_i2c_block_data(self.DEVICE_ADDR, self.MESSAGE_BUFF_ADDR, buff_size)
-            buff.extend(block)
+            buff_size = min(size, max_size)
+            if self.combined_read:
+                block = self.__transfer(self.MESSAGE_BUFF_ADDR, buff_size)
+            else:
+                block = self.bus.read_i2c_block_data(self.DEVICE_ADDR, self.MESSAGE_BUFF_ADDR, buff_size)
+
+            if not self.buffer.extend(block):
+                self.logger.warning(f"Dropping {len(self.buffer)} bytes with no line ending")
+                self.buffer.clear()
+                self.buffer.extend(block)
+
             size -= buff_size
-        return bytes(buff)
+
+    def __transfer(self, addr:int, size:int) -> bytes:
+        write = i2c_msg.write(self.DEVICE_ADDR, [addr])
+        read = i2c_msg.read(self.DEVICE_ADDR, size)
+        self.bus.i2c_rdwr(write, read)
+        return bytes(read)
 
     def log_device_info(self):
         device_type = self.read_byte(self.DEVICE_TYPE_ADDR)
@@ -40,6 +88,31 @@ class DaisyMessageSource:
         version_minor = self.read_byte(self.FIRMWARE_MINOR_ADDR)
         self.logger.info(f"dAISy device ID: 0x{device_type:02X}, firmware v{version_major}.{version_minor}")
 
+    def poll(self) -> bool:
+        """Move whatever the device has buffered into the line buffer.
+
+        Returns False if there was nothing to read, after which the poll
+        interval has been lengthened."""
+        available = self.read_available()
+
+        if available == 0:
+            self.read_interval = min(self.read_interval * 2, self.MAX_READ_INTERVAL)
+            return False
+
+        self.read_interval = self.MIN_READ_INTERVAL
+
+        self.logger.debug(f"Bytes available: {available}")
+        self.bytes_read.inc(available)
+        self.read_block(available)
+        return True
+
+    def __dispatch_lines(self):
+        for complete in self.buffer.lines():
+            # Formatted lazily, and only if the rate limit lets it through
+            self.logger.info("MSG: %s", complete, extra={"rate_key": "msg"})
+            self.lines_read.inc()
+            self.handle_message(complete)
+
     def begin_processing(self):
         self.log_device_info()
 
@@ -48,27 +121,38 @@ class DaisyMessageSource:
             return
 
         self.bus.write_byte(self.DEVICE_ADDR, self.MESSAGE_BUFF_ADDR)
-        message = b""
 
         while True:
             try:
-                high = self.read_byte(self.BYTES_AVAIL_H_ADDR)
-                low = self.read_byte(self.BYTES_AVAIL_L_ADDR)
-                available = (high << 8) | low
-
-                if available == 0:
-                    time.sleep(self.READ_INTERVAL)
+                if not self.poll():
+                    time.sleep(self.read_interval)
                     continue
 
-                self.logger.debug(f"Bytes available: {available}")
-                message += self.read_block(available)
+                self.__dispatch_lines()
+
+            except OSError as ex:
+                self.logger.warning(f"Error reading from I2C: {ex}")
+                time.sleep(self.ERROR_WAIT_TIME)
+
+    async def begin_processing_async(self, executor:any = None):
+        """Poll the device from the event loop, with bus I/O in executor."""
+        loop:asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, self.log_device_info)
+
+        if self.handle_message is None:
+            self.logger.critical("Cannot begin message processing with no message handler")
+            return
+
+        await loop.run_in_executor(executor, self.bus.write_byte, self.DEVICE_ADDR, self.MESSAGE_BUFF_ADDR)
+
+        while True:
+            try:
+                if not await loop.run_in_executor(executor, self.poll):
+                    await asyncio.sleep(self.read_interval)
+                    continue
 
-                while b"\r\n" in message:
-                    complete, _, remainder = message.partition(b"\r\n")
-                    self.logger.info(f"MSG: {complete}")
-                    self.handle_message(complete)
-                    message = remainder
+                self.__dispatch_lines()
 
             except OSError as ex:
                 self.logger.warning(f"Error reading from I2C: {ex}")
-                time.sleep(self.ERROR_WAIT_TIME)
\ No newline at end of file
+                await asyncio.sleep(self.ERROR_WAIT_TIME)
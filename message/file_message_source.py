@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import mmap
+import os
+import time
+
+import metrics
+
+
+class FileMessageSource:
+    """Replays a recorded NMEA capture file.
+
+    Lines may carry a receive time either in an NMEA tag block (c:) or as a
+    leading unix timestamp followed by a space. With speed set to 1 lines
+    are replayed in real time, higher values replay faster and 0 replays
+    as fast as the pipeline will take them."""
+
+    def __init__(self, path:str, speed:float = 0, repeat:int = 1):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.path:str = path
+        self.speed:float = speed
+        self.repeat:int = repeat
+
+        self.handle_message = None
+
+        self.lines_read:metrics.Counter = metrics.counter("ais_source_lines_total", "Lines passed on by the source", source="file")
+
+    def begin_processing(self):
+        if self.handle_message is None:
+            self.logger.critical("Cannot begin message processing with no message handler")
+            return
+
+        if os.path.getsize(self.path) == 0:
+            self.logger.warning(f"Capture file {self.path} is empty")
+            return
+
+        with open(self.path, "rb") as capture_file:
+            with mmap.mmap(capture_file.fileno(), 0, access=mmap.ACCESS_READ) as capture:
+                for _ in range(self.repeat):
+                    self.__replay(capture)
+
+    async def begin_processing_async(self, executor:any = None):
+        # Replay pacing sleeps, so the whole replay runs in the executor
+        await asyncio.get_running_loop().run_in_executor(executor, self.begin_processing)
+
+    def __replay(self, capture:mmap.mmap):
+        start:float = time.monotonic()
+        first_ts:float|None = None
+        count:int = 0
+
+        size:int = len(capture)
+        pos:int = 0
+        while pos < size:
+            end:int = capture.find(b"\n", pos)
+            if end < 0:
+                end = size
+
+            line:bytes = capture[pos:end].rstrip(b"\r")
+            pos = end + 1
+
+            if not line:
+                continue
+
+            ts, line = self.__split_timestamp(line)
+
+            if self.speed > 0 and ts is not None:
+                if first_ts is None:
+                    first_ts = ts
+
+                delay:float = start + (ts - first_ts) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self.handle_message(line)
+            self.lines_read.inc()
+            count += 1
+
+        elapsed:float = time.monotonic() - start
+        self.logger.info(f"Replayed {count} lines from {self.path} in {elapsed:.2f}s")
+
+    def __split_timestamp(self, line:bytes) -> tuple[float|None,bytes]:
+        if line[:1].isdigit():
+            prefix, _, sentence = line.partition(b" ")
+            try:
+                return (float(prefix), sentence)
+            except ValueError:
+                return (None, line)
+
+        if line.startswith(b"\\"):
+            tag_block:bytes = line[1:line.find(b"\\", 1)].partition(b"*")[0]
+            for param in tag_block.split(b","):
+                if param.startswith(b"c:"):
+                    try:
+                        ts:float = float(param[2:])
+                    except ValueError:
+                        break
+
+                    # Some receivers stamp in milliseconds
+                    return (ts / 1000 if ts > 1e11 else ts, line)
+
+        return (None, line)
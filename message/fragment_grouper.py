@@ -0,0 +1,45 @@
+class FragmentGrouper:
+    """Collects the lines of multipart NMEA sentences from one stream.
+
+    Only a few fields of the raw line are read, so this is much cheaper
+    than parsing. Lines that don't look like fragments are passed straight
+    through as a group of one."""
+
+    def __init__(self):
+        # Fragments of multipart messages, keyed by sequence id and channel
+        self.fragments:dict[tuple[bytes,bytes],list[bytes|None]] = {}
+
+    def put_line(self, line:bytes) -> tuple[bytes,...]|None:
+        """Add a line, returning every line of its message once complete."""
+        fragment:tuple[tuple[bytes,bytes],int,int]|None = self.fragment_info(line)
+        if fragment is None:
+            return (line,)
+
+        slot, number, count = fragment
+        parts:list[bytes|None] = self.fragments.setdefault(slot, [None] * count)
+        if len(parts) != count or not 0 < number <= count:
+            # Doesn't belong with what's buffered, start again from this line
+            parts = self.fragments[slot] = [None] * count
+            if not 0 < number <= count:
+                return None
+
+        parts[number - 1] = line
+        if None in parts:
+            return None
+
+        del self.fragments[slot]
+        return tuple(parts)
+
+    @staticmethod
+    def fragment_info(line:bytes) -> tuple[tuple[bytes,bytes],int,int]|None:
+        # Skip any tag block, then read the fragment count, fragment number,
+        # sequence id and channel. Anything unexpected is left for the
+        # parser to deal with.
+        fields:list[bytes] = line.rsplit(b"\\", 1)[-1].split(b",", 5)
+        if len(fields) < 6 or fields[1] in (b"1", b""):
+            return None
+
+        try:
+            return (fields[3], fields[4]), int(fields[2]), int(fields[1])
+        except ValueError:
+            return None
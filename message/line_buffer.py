@@ -0,0 +1,73 @@
+class LineBuffer:
+    """Preallocated receive buffer that splits a byte stream into lines.
+
+    Bytes are written in place after the last complete line and only the
+    bytes added since the previous scan are searched for the delimiter.
+    When the write position reaches the end, the partial line still being
+    received is moved back to the front, so the buffer wraps round without
+    reallocating."""
+
+    def __init__(self, capacity:int = 4096, delimiter:bytes = b"\r\n"):
+        self.capacity:int = capacity
+        self.delimiter:bytes = delimiter
+
+        self.data:bytearray = bytearray(capacity)
+        self.view:memoryview = memoryview(self.data)
+
+        self.read_pos:int = 0
+        self.write_pos:int = 0
+        self.scan_pos:int = 0
+
+    def __len__(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def free(self) -> int:
+        return self.capacity - len(self)
+
+    def extend(self, data:bytes|bytearray|list[int]) -> bool:
+        """Append received bytes. Returns False if they could not fit."""
+        size:int = len(data)
+        if self.write_pos + size > self.capacity:
+            self.__compact()
+
+            if self.write_pos + size > self.capacity:
+                return False
+
+        self.data[self.write_pos:self.write_pos + size] = data
+        self.write_pos += size
+        return True
+
+    def lines(self):
+        """Yield each complete line received, without the delimiter."""
+        while True:
+            end:int = self.data.find(self.delimiter, self.scan_pos, self.write_pos)
+            if end < 0:
+                break
+
+            line:bytes = bytes(self.view[self.read_pos:end])
+            self.read_pos = end + len(self.delimiter)
+            self.scan_pos = self.read_pos
+            yield line
+
+        if self.read_pos == self.write_pos:
+            self.clear()
+        else:
+            # The delimiter could be split across this read and the next
+            self.scan_pos = max(self.read_pos, self.write_pos - len(self.delimiter) + 1)
+
+    def clear(self):
+        self.read_pos = 0
+        self.write_pos = 0
+        self.scan_pos = 0
+
+    def __compact(self):
+        pending:int = len(self)
+        if self.read_pos == 0:
+            return
+
+        # The two ranges can overlap, which memoryview assignment copies
+        # safely and bytearray slice assignment doesn't promise to
+        self.view[0:pending] = self.view[self.read_pos:self.write_pos]
+        self.scan_pos -= self.read_pos
+        self.read_pos = 0
+        self.write_pos = pending
@@ -1,29 +1,111 @@
 import paho.mqtt.client as mqtt
+import asyncio
 import logging
+import socket
+
+import metrics
+from scheduling import on_loop
 
 class MQTTMessageSource:
-    def __init__(self, mqtt_addr:str, mqtt_port:int, mqtt_topic:str):
+    """Receives NMEA sentences published to one or more MQTT topics.
+
+    A payload may hold a single sentence or a batch of newline separated
+    sentences. Batches go to handle_messages in one call when it's set,
+    otherwise each line goes to handle_message. Dropped connections are
+    retried with a delay that doubles from MIN_RECONNECT_DELAY up to
+    MAX_RECONNECT_DELAY."""
+
+    MISC_INTERVAL = 1
+    MIN_RECONNECT_DELAY = 1
+    MAX_RECONNECT_DELAY = 120
+
+    def __init__(self, mqtt_addr:str, mqtt_port:int, mqtt_topics:str|list[str], qos:int = 0, client:any = None):
         self.logger:logging.Logger = logging.getLogger(__name__)
 
         self.mqtt_addr:str = mqtt_addr
         self.mqtt_port:int = mqtt_port
-        self.mqtt_topic:str = mqtt_topic
+        self.qos:int = qos
+
+        # A comma separated string is accepted so topics can come from .env
+        if isinstance(mqtt_topics, str):
+            mqtt_topics = [topic.strip() for topic in mqtt_topics.split(",") if topic.strip()]
+        self.mqtt_topics:list[str] = mqtt_topics
 
-        self.mqttc:mqtt.Client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.mqttc:mqtt.Client = client if client is not None else mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
         self.mqttc.on_connect = self.__on_connected
         self.mqttc.on_message = self.__on_message
+        self.mqttc.reconnect_delay_set(self.MIN_RECONNECT_DELAY, self.MAX_RECONNECT_DELAY)
+        self.reconnect_delay:float = self.MIN_RECONNECT_DELAY
 
         self.handle_message = None
+        self.handle_messages = None
+
+        self.lines_read:metrics.Counter = metrics.counter("ais_source_lines_total", "Lines passed on by the source", source="mqtt")
 
     def __on_connected(self, client, userdata, flags, reason_code, properties):
         self.logger.info(f"Connected with result code {reason_code}")
-        client.subscribe(self.mqtt_topic)
+        self.reconnect_delay = self.MIN_RECONNECT_DELAY
+        client.subscribe([(topic, self.qos) for topic in self.mqtt_topics])
 
     def __on_message(self, client, userdata, msg):
-        if msg.topic.startswith("/sensor"):
-            self.handle_message(msg.payload)
+        # splitlines copies each line out once and copes with \r\n
+        lines:list[bytes] = [line for line in msg.payload.splitlines() if line]
+        if not lines:
+            return
+
+        self.lines_read.inc(len(lines))
+
+        if self.handle_messages is not None:
+            self.handle_messages(lines)
+        else:
+            for line in lines:
+                self.handle_message(line)
 
     def begin_processing(self):
         self.logger.info(f"Connect to {self.mqtt_addr}:{self.mqtt_port}")
-        self.mqttc.connect(self.mqtt_addr, self.mqtt_port, 60)
-        self.mqttc.loop_forever()
\ No newline at end of file
+
+        # The client retries both the first connection and any dropped
+        # later, backing off as set by reconnect_delay_set
+        self.mqttc.connect_async(self.mqtt_addr, self.mqtt_port, 60)
+        self.mqttc.loop_forever(retry_first_connection=True)
+
+    async def begin_processing_async(self, executor:any = None):
+        """Drive the client from the event loop rather than its own thread.
+
+        The client's socket is watched by the loop, so reads and writes
+        happen as soon as the socket is ready. Connecting, which can block
+        on DNS and TCP, runs in executor."""
+        loop:asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+        def run_on_loop(func, *args):
+            # Socket callbacks fire on the executor thread during connect
+            if on_loop(loop):
+                func(*args)
+            else:
+                loop.call_soon_threadsafe(func, *args)
+
+        def on_socket_open(client, userdata, sock):
+            run_on_loop(loop.add_reader, sock, client.loop_read)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2048)
+
+        self.mqttc.on_socket_open = on_socket_open
+        self.mqttc.on_socket_close = lambda client, userdata, sock: run_on_loop(loop.remove_reader, sock)
+        self.mqttc.on_socket_register_write = lambda client, userdata, sock: run_on_loop(loop.add_writer, sock, client.loop_write)
+        self.mqttc.on_socket_unregister_write = lambda client, userdata, sock: run_on_loop(loop.remove_writer, sock)
+
+        # Only stores the address, the connection is made below
+        self.mqttc.connect_async(self.mqtt_addr, self.mqtt_port, 60)
+
+        while True:
+            # Keepalive pings, and connecting whenever there's no connection
+            if self.mqttc.loop_misc() == mqtt.MQTT_ERR_NO_CONN:
+                try:
+                    self.logger.info(f"Connect to {self.mqtt_addr}:{self.mqtt_port}")
+                    await loop.run_in_executor(executor, self.mqttc.reconnect)
+                except OSError as ex:
+                    self.logger.warning(f"MQTT connect failed, retrying in {self.reconnect_delay}s: {ex}")
+                    await asyncio.sleep(self.reconnect_delay)
+                    self.reconnect_delay = min(self.reconnect_delay * 2, self.MAX_RECONNECT_DELAY)
+                    continue
+
+            await asyncio.sleep(self.MISC_INTERVAL)
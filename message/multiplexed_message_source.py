@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from message.fragment_grouper import FragmentGrouper
+
+
+class MultiplexedMessageSource:
+    """Runs several message sources at once, passing each sentence on once.
+
+    Receivers with overlapping coverage hear the same transmissions, so
+    messages are hashed and any seen within the last window seconds are
+    dropped before they reach the decoder. Multipart messages are grouped
+    per source first and compared whole, as each receiver numbers its own
+    fragments. The talker, sequence id, checksum and any tag block are left
+    out of the hash for the same reason.
+
+    At most max_entries hashes are remembered, oldest dropped first."""
+
+    REPORT_INTERVAL = 300
+
+    def __init__(self, sources:dict[str,any], window:float = 15, max_entries:int = 4096):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.sources:dict[str,any] = sources
+        self.window:float = window
+        self.max_entries:int = max_entries
+
+        self.handle_message = None
+
+        # Sources call in from their own threads and the processor isn't
+        # thread safe, so everything past this point happens under lock
+        self.lock:threading.Lock = threading.Lock()
+        self.seen:OrderedDict[bytes,float] = OrderedDict()
+
+        self.received:dict[str,metrics.Counter] = {}
+        self.duplicates:dict[str,metrics.Counter] = {}
+        self.last_report:float = time.monotonic()
+
+        for name, source in self.sources.items():
+            grouper:FragmentGrouper = FragmentGrouper()
+            source.handle_message = lambda line, name=name, grouper=grouper: self.__handle_line(name, grouper, line)
+
+            self.received[name] = metrics.counter("ais_multiplexer_messages_total", "Messages received by the multiplexer", source=name)
+            self.duplicates[name] = metrics.counter("ais_multiplexer_duplicates_total", "Duplicate messages dropped by the multiplexer", source=name)
+
+    def begin_processing(self):
+        if self.handle_message is None:
+            self.logger.critical("Cannot begin message processing with no message handler")
+            return
+
+        threads:list[threading.Thread] = []
+        for name, source in self.sources.items():
+            thread:threading.Thread = threading.Thread(target=self.__run_source, args=[name, source], daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+    async def begin_processing_async(self, executor:any = None):
+        if self.handle_message is None:
+            self.logger.critical("Cannot begin message processing with no message handler")
+            return
+
+        await asyncio.gather(*[self.__run_source_async(name, source, executor) for name, source in self.sources.items()])
+
+    def __run_source(self, name:str, source:any):
+        try:
+            source.begin_processing()
+        except Exception as ex:
+            self.logger.exception(f"Message source {name} failed", exc_info=ex)
+
+    async def __run_source_async(self, name:str, source:any, executor:any):
+        try:
+            await source.begin_processing_async(executor)
+        except Exception as ex:
+            self.logger.exception(f"Message source {name} failed", exc_info=ex)
+
+    def __handle_line(self, name:str, grouper:FragmentGrouper, line:bytes):
+        line = line.strip()
+        if not line:
+            return
+
+        lines:tuple[bytes,...]|None = grouper.put_line(line)
+        if lines is None:
+            return
+
+        key:bytes = self.__key(lines)
+        now:float = time.monotonic()
+
+        with self.lock:
+            self.received[name].inc()
+
+            # Entries are in the order they were first seen, so anything
+            # past the window is at the front
+            while self.seen and next(iter(self.seen.values())) < now - self.window:
+                self.seen.popitem(last=False)
+
+            if key in self.seen:
+                self.duplicates[name].inc()
+            else:
+                self.seen[key] = now
+                if len(self.seen) > self.max_entries:
+                    self.seen.popitem(last=False)
+
+                for part in lines:
+                    self.handle_message(part)
+
+            if now - self.last_report >= self.REPORT_INTERVAL:
+                self.last_report = now
+                self.logger.info(f"Sources: {self.__summary()}")
+
+    def __key(self, lines:tuple[bytes,...]) -> bytes:
+        digest = hashlib.blake2b(digest_size=8)
+
+        for line in lines:
+            fields:list[bytes] = line.rsplit(b"\\", 1)[-1].split(b",", 5)
+            if len(fields) < 6:
+                digest.update(line)
+                continue
+
+            # Sentence type without the talker, fragment count and number,
+            # channel, then the payload and fill bits without the checksum
+            digest.update(fields[0][-3:])
+            digest.update(b",".join([fields[1], fields[2], fields[4], fields[5].split(b"*", 1)[0]]))
+            digest.update(b"\n")
+
+        return digest.digest()
+
+    def stats(self) -> dict[str,dict[str,float]]:
+        stats:dict[str,dict[str,float]] = {}
+        for name in self.sources:
+            received:float = self.received[name].get()
+            duplicates:float = self.duplicates[name].get()
+            stats[name] = {
+                "received": received,
+                "duplicates": duplicates,
+                "duplicate_rate": duplicates / received if received else 0.0
+            }
+        return stats
+
+    def __summary(self) -> str:
+        return ", ".join(f"{name} {int(s['received'])} received, {s['duplicate_rate']:.1%} duplicate"
+                         for name, s in self.stats().items())
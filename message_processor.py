@@ -1,41 +1,67 @@
-import json
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from pyais.queue import NMEAQueue
 from pyais.stream import TagBlockQueue
 
+import metrics
+from message.ais_record import AISRecord
+from parallel_decoder import ParallelDecoder
+
 
 class MessageProcessor:
-    def __init__(self, message_source:any, message_handler:any):
+    def __init__(self, message_source:any, message_handler:any, decode_workers:int = 0, decode_pool:ProcessPoolExecutor|None = None):
         self.logger:logging.Logger = logging.getLogger(__name__)
 
         self.message_handler:any = message_handler
 
+        self.lines_in:metrics.Counter = metrics.counter("ais_processor_lines_total", "Lines received by the message processor")
+        self.decoded:metrics.Counter = metrics.counter("ais_processor_messages_total", "AIS messages decoded")
+
         self.source = message_source
         self.source.handle_message = self.__handle_message
+        # Sources that receive several lines at once can pass them together
+        self.source.handle_messages = self.__handle_messages
 
         tbq:TagBlockQueue = TagBlockQueue()
         self.message_queue:NMEAQueue = NMEAQueue(tbq=tbq)
 
+        # Lines are parsed and decoded on worker processes when set
+        self.decoder:ParallelDecoder|None = None
+        if decode_workers > 0:
+            self.decoder = ParallelDecoder(message_handler, decode_workers, pool=decode_pool)
+
     def begin_processing(self):
         self.source.begin_processing()
 
+    async def begin_processing_async(self, executor:any = None):
+        await self.source.begin_processing_async(executor)
+
     def __handle_message(self, msg):
+        self.__handle_messages((msg,))
+
+    def __handle_messages(self, lines:list[bytes]):
         if self.message_handler is None:
             raise TypeError("Message handler must be set to a callback function")
 
+        received:float = time.time()
+        self.lines_in.inc(len(lines))
+
+        if self.decoder is not None:
+            for line in lines:
+                self.decoder.put_line(line, received)
+            return
+
         # Use the message queue to help with handling multipart messages
-        self.message_queue.put_line(msg)
-        
+        for line in lines:
+            self.message_queue.put_line(line)
+
         while True:
             ais_message = self.message_queue.get_or_none()
             if not ais_message:
                 break
 
             decoded_sentence:dict[str,any] = ais_message.decode().asdict()
-            
-            for key, value in decoded_sentence.items():
-                if isinstance(value, bytes):
-                    decoded_sentence[key] = value.decode('utf-8', errors='ignore')
-                
-            self.message_handler.put(json.dumps(decoded_sentence))
\ No newline at end of file
+            self.message_handler.put(AISRecord.from_decoded(decoded_sentence, received))
+            self.decoded.inc()
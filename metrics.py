@@ -0,0 +1,206 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Taken as the startup time, as ais.py imports this before any of its own modules
+STARTED:float = time.monotonic()
+
+# Seconds. Wide enough for both a queue hop and a slow e-ink refresh.
+DEFAULT_BUCKETS:tuple[float,...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                                    1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Counter:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value:float = 0
+        self.lock:threading.Lock = threading.Lock()
+
+    def inc(self, amount:float = 1):
+        # += is a read then a write, so two threads could lose a count
+        with self.lock:
+            self.value += amount
+
+    def get(self) -> float:
+        return self.value
+
+
+class Gauge:
+    """A value that is set directly or read from func when collected."""
+
+    __slots__ = ("value", "func")
+
+    def __init__(self, func:any = None):
+        self.value:float = 0
+        self.func:any = func
+
+    def set(self, value:float):
+        self.value = value
+
+    def get(self) -> float:
+        return self.func() if self.func is not None else self.value
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "lock")
+
+    def __init__(self, buckets:tuple[float,...] = DEFAULT_BUCKETS):
+        self.buckets:tuple[float,...] = tuple(sorted(buckets))
+        # One count per bucket plus one for anything above the last
+        self.counts:list[int] = [0] * (len(self.buckets) + 1)
+        self.sum:float = 0
+        self.count:int = 0
+        self.lock:threading.Lock = threading.Lock()
+
+    def observe(self, value:float):
+        index:int = bisect.bisect_left(self.buckets, value)
+
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def get(self) -> dict[str,any]:
+        # Copied together so the buckets always add up to the count
+        with self.lock:
+            return {"count": self.count, "sum": self.sum,
+                    "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts))}
+
+
+class MetricsRegistry:
+    """Holds every metric by name and labels, and formats them for export.
+
+    Asking for a metric that already exists returns the existing one, so
+    components can look up their metrics without being handed them.
+    Metrics are shared by every thread that looks them up, so each one
+    takes its own lock to update. Collection may happen from any thread."""
+
+    def __init__(self):
+        self.lock:threading.Lock = threading.Lock()
+        # name -> (type, help, {labels: metric})
+        self.metrics:dict[str,tuple[str,str,dict[tuple[tuple[str,str],...],any]]] = {}
+
+    def counter(self, name:str, help:str, **labels:str) -> Counter:
+        return self.__get("counter", name, help, labels, Counter)
+
+    def gauge(self, name:str, help:str, func:any = None, **labels:str) -> Gauge:
+        gauge:Gauge = self.__get("gauge", name, help, labels, Gauge)
+        if func is not None:
+            gauge.func = func
+        return gauge
+
+    def histogram(self, name:str, help:str, buckets:tuple[float,...] = DEFAULT_BUCKETS, **labels:str) -> Histogram:
+        return self.__get("histogram", name, help, labels, lambda: Histogram(buckets))
+
+    def __get(self, kind:str, name:str, help:str, labels:dict[str,str], factory:any) -> any:
+        key:tuple[tuple[str,str],...] = tuple(sorted(labels.items()))
+
+        with self.lock:
+            entry = self.metrics.setdefault(name, (kind, help, {}))
+            if entry[0] != kind:
+                raise ValueError(f"Metric {name} is already registered as a {entry[0]}")
+
+            series:dict = entry[2]
+            if key not in series:
+                series[key] = factory()
+
+            return series[key]
+
+    def __items(self) -> list[tuple[str,str,str,list[tuple[tuple[tuple[str,str],...],any]]]]:
+        with self.lock:
+            return [(name, kind, help, list(series.items())) for name, (kind, help, series) in self.metrics.items()]
+
+    def render_prometheus(self) -> str:
+        lines:list[str] = []
+
+        for name, kind, help, series in self.__items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for labels, metric in series:
+                if kind != "histogram":
+                    lines.append(f"{name}{self.__labels(labels)} {metric.get()}")
+                    continue
+
+                values:dict[str,any] = metric.get()
+                cumulative:int = 0
+                for bound, count in values["buckets"].items():
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self.__labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{self.__labels(labels)} {values['sum']}")
+                lines.append(f"{name}_count{self.__labels(labels)} {values['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def __labels(self, labels:tuple[tuple[str,str],...]) -> str:
+        if not labels:
+            return ""
+
+        return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+    def snapshot(self) -> dict[str,any]:
+        snapshot:dict[str,any] = {}
+
+        for name, kind, help, series in self.__items():
+            for labels, metric in series:
+                key:str = name + self.__labels(labels)
+                snapshot[key] = metric.get()
+
+        return snapshot
+
+
+registry:MetricsRegistry = MetricsRegistry()
+
+
+def counter(name:str, help:str, **labels:str) -> Counter:
+    return registry.counter(name, help, **labels)
+
+def gauge(name:str, help:str, func:any = None, **labels:str) -> Gauge:
+    return registry.gauge(name, help, func, **labels)
+
+def histogram(name:str, help:str, buckets:tuple[float,...] = DEFAULT_BUCKETS, **labels:str) -> Histogram:
+    return registry.histogram(name, help, buckets, **labels)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+
+        body:bytes = registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format:str, *args):
+        pass
+
+
+def start_server(port:int, host:str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve the metrics in Prometheus text format at /metrics."""
+    server:ThreadingHTTPServer = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    logging.getLogger(__name__).info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+def start_dump(interval:float) -> threading.Thread:
+    """Log every metric as one line of JSON every interval seconds."""
+    logger:logging.Logger = logging.getLogger(__name__)
+
+    def dump():
+        while True:
+            time.sleep(interval)
+            logger.info(f"METRICS: {json.dumps(registry.snapshot())}")
+
+    thread:threading.Thread = threading.Thread(target=dump, daemon=True)
+    thread.start()
+    return thread
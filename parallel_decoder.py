@@ -0,0 +1,123 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from queue import Empty, Queue
+
+from pyais.queue import NMEAQueue
+from pyais.stream import TagBlockQueue
+
+import metrics
+from message.ais_record import AISRecord
+from message.fragment_grouper import FragmentGrouper
+
+
+def _decode_batch(groups:list[tuple[bytes,...]]) -> list[dict[str,any]|None]:
+    """Parse and decode groups of lines, each holding every fragment of one message."""
+    message_queue:NMEAQueue = NMEAQueue(tbq=TagBlockQueue())
+
+    decoded:list[dict[str,any]|None] = []
+    for lines in groups:
+        for line in lines:
+            message_queue.put_line(line)
+
+        ais_message = message_queue.get_or_none()
+        try:
+            decoded.append(ais_message.decode().asdict() if ais_message else None)
+        except Exception:
+            decoded.append(None)
+
+    return decoded
+
+
+def create_pool(workers:int) -> ProcessPoolExecutor:
+    """Start workers decode processes, forked from this one.
+
+    Fork rather than spawn, as spawn would re-run ais.py in every worker.
+    Forking copies the locks of every thread as they are at that moment,
+    so create the pool before starting any threads."""
+    pool:ProcessPoolExecutor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    # Every worker is started by the first job
+    pool.submit(int).result()
+    return pool
+
+
+class ParallelDecoder:
+    """Decodes AIS sentences on a pool of worker processes.
+
+    Parsing and decoding both happen in the workers. The receiving thread
+    only groups the fragments of multipart messages, by reading a few
+    fields from the raw line. Lines are sent in batches to keep the cost of
+    passing them between processes down, and batches are collected in the
+    order they were sent so messages from each vessel are never reordered.
+
+    Pass in a pool from create_pool if threads may already be running."""
+
+    def __init__(self, message_handler:any, workers:int, batch_size:int = 64, max_delay:float = 0.05, pool:ProcessPoolExecutor|None = None):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.message_handler:any = message_handler
+        self.batch_size:int = batch_size
+        self.max_delay:float = max_delay
+
+        self.decoded:metrics.Counter = metrics.counter("ais_processor_messages_total", "AIS messages decoded")
+        self.batches:metrics.Histogram = metrics.histogram("ais_decode_batch_size", "Sentences per batch sent to the decode workers",
+                                                           (1, 2, 4, 8, 16, 32, 64, 128, 256))
+
+        self.grouper:FragmentGrouper = FragmentGrouper()
+
+        self.executor:ProcessPoolExecutor = pool if pool is not None else create_pool(workers)
+
+        self.incoming:Queue = Queue()
+        # Bounded so the dispatcher waits when every worker is busy
+        self.in_flight:Queue = Queue(maxsize=workers * 2)
+
+        threading.Thread(target=self.__dispatch, daemon=True).start()
+        threading.Thread(target=self.__collect, daemon=True).start()
+
+    def put_line(self, line:bytes, received:float):
+        lines:tuple[bytes,...]|None = self.grouper.put_line(line)
+        if lines is not None:
+            self.incoming.put((lines, received))
+
+    def __dispatch(self):
+        while True:
+            batch:list[tuple[tuple[bytes,...],float]] = [self.incoming.get()]
+
+            # Top the batch up with whatever arrives shortly after, so a
+            # quiet feed isn't held back waiting for a full batch
+            deadline:float = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining:float = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                try:
+                    batch.append(self.incoming.get(timeout=remaining))
+                except Empty:
+                    break
+
+            groups:list[tuple[bytes,...]] = [lines for lines, _ in batch]
+            received:list[float] = [received for _, received in batch]
+            self.batches.observe(len(groups))
+            self.in_flight.put((self.executor.submit(_decode_batch, groups), received))
+
+    def __collect(self):
+        while True:
+            future, received = self.in_flight.get()
+            future:Future
+
+            try:
+                results:list[dict[str,any]|None] = future.result()
+            except Exception as ex:
+                self.logger.exception("Decode batch failed", exc_info=ex)
+                continue
+
+            for decoded, received_at in zip(results, received):
+                if decoded is not None:
+                    self.message_handler.put(AISRecord.from_decoded(decoded, received_at))
+                    self.decoded.inc()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,58 @@
+import importlib
+import logging
+
+
+class Registry:
+    """Maps names to classes given as "module:Class", imported on first use.
+
+    Hardware backends pull in libraries that are slow to import or only
+    exist on the Pi, so nothing is imported until it's asked for. A name
+    that isn't registered may itself be a "module:Class" string, so other
+    implementations can be chosen from config without registering them."""
+
+    def __init__(self, kind:str, targets:dict[str,str]):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.kind:str = kind
+        self.targets:dict[str,str] = dict(targets)
+        self.loaded:dict[str,type] = {}
+
+    def register(self, name:str, target:str):
+        self.targets[name] = target
+        self.loaded.pop(name, None)
+
+    def get(self, name:str) -> type:
+        cls:type|None = self.loaded.get(name)
+        if cls is not None:
+            return cls
+
+        target:str|None = self.targets.get(name, name if ":" in name else None)
+        if target is None:
+            raise ValueError(f"Unknown {self.kind} {name}, expected one of {', '.join(self.targets)} or module:Class")
+
+        module_name, _, class_name = target.partition(":")
+        cls = getattr(importlib.import_module(module_name), class_name)
+        self.loaded[name] = cls
+
+        self.logger.debug(f"Loaded {self.kind} {name} from {target}")
+        return cls
+
+    def create(self, name:str, *args, **kwargs) -> any:
+        return self.get(name)(*args, **kwargs)
+
+
+sources:Registry = Registry("message source", {
+    "daisy": "message.daisy_message_source:DaisyMessageSource",
+    "mqtt": "message.mqtt_message_source:MQTTMessageSource",
+    "file": "message.file_message_source:FileMessageSource",
+})
+
+renderers:Registry = Registry("renderer", {
+    "inky": "renderer.inky_renderer:InkyRenderer",
+    "image": "renderer.image_renderer:ImageRenderer",
+})
+
+inputs:Registry = Registry("input", {
+    "inky": "input.inky_input:InkyInput",
+    "keyboard": "input.keyboard_input:KeyboardInput",
+})
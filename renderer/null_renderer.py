@@ -0,0 +1,22 @@
+class NullRenderer:
+    """Renderer that discards every frame, for running screens headless."""
+
+    def __init__(self, width:int = 800, height:int = 480):
+        self.width: int = width
+        self.height: int = height
+
+        self.frames: int = 0
+        self.last_frame: any = None
+
+    def note_received(self, received:float|None):
+        pass
+
+    def invalidate(self):
+        pass
+
+    def render(self, img:any, force:bool = False):
+        if img is None:
+            return
+
+        self.frames += 1
+        self.last_frame = img
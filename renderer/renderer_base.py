@@ -0,0 +1,154 @@
+import datetime
+import hashlib
+import logging
+import time
+
+import metrics
+from scheduling import ThreadScheduler
+
+
+class RendererBase():
+    # Frames are compared at this fraction of full size. Box averaging
+    # means any solid pixel change still alters the fingerprint.
+    FINGERPRINT_REDUCE:int = 2
+
+    def __init__(self, width:int, height:int, min_render_interval:int = 60, scheduler:any = None):
+        self.logger: logging.Logger = logging.getLogger(type(self).__module__)
+
+        self.height: int = height
+        self.width: int = width
+
+        self.scheduler: any = scheduler if scheduler is not None else ThreadScheduler()
+
+        self.min_render_interval: int = min_render_interval
+        self.last_render: datetime = datetime.datetime.fromtimestamp(0)
+        self.timer: any = None
+        self.pending_render: any = None
+        self.pending_fingerprint: bytes|None = None
+        self.shown_fingerprint: bytes|None = None
+        # Frame handed to the display that hasn't finished going out yet
+        self.showing_fingerprint: bytes|None = None
+
+        self.frames_shown: int = 0
+        self.frames_skipped: int = 0
+
+        # Receive time of the oldest update not yet in a frame on screen
+        self.oldest_received: float|None = None
+        self.first_frame_shown: bool = False
+
+        self.shown_counter: metrics.Counter = metrics.counter("ais_frames_total", "Frames passed to the renderer", result="shown")
+        self.skipped_counter: metrics.Counter = metrics.counter("ais_frames_total", "Frames passed to the renderer", result="skipped")
+        self.render_time: metrics.Histogram = metrics.histogram("ais_render_seconds", "Time spent pushing a frame to the display")
+        self.pixels_latency: metrics.Histogram = metrics.histogram("ais_receive_to_pixels_seconds", "Time from a line being received to a frame with it being shown")
+
+    def note_received(self, received:float|None):
+        """Record that data received at this time is waiting to be shown."""
+        if received is not None and (self.oldest_received is None or received < self.oldest_received):
+            self.oldest_received = received
+
+    def invalidate(self):
+        """Forget what the display shows, so the next frame goes out even
+        if it's the same."""
+        self.shown_fingerprint = None
+        self.showing_fingerprint = None
+
+    def render(self, img:any, force:bool = False):
+        if img is None:
+            img = self.pending_render
+            if img is None:
+                return
+            fingerprint: bytes = self.pending_fingerprint
+        else:
+            fingerprint: bytes = self._fingerprint(img)
+
+        if fingerprint == self.shown_fingerprint or fingerprint == self.showing_fingerprint:
+            # The latest frame is what's already showing, or about to be, so
+            # anything still waiting to go out is out of date too
+            if self.timer:
+                self.timer.cancel()
+            self.timer = None
+            self.pending_render = None
+            self.oldest_received = None
+            self.frames_skipped += 1
+            self.skipped_counter.inc()
+            self.logger.debug(f"Skip unchanged frame ({self.frames_skipped} skipped, {self.frames_shown} shown)")
+            return
+
+        self.pending_render = img
+        self.pending_fingerprint = fingerprint
+        now: datetime = datetime.datetime.now()
+
+        if force:
+            if self.timer:
+                self.timer.cancel()
+        else:
+            time_diff: int = (now - self.last_render).total_seconds()
+
+            if self.timer and time_diff < self.min_render_interval:
+                return
+
+            if time_diff < self.min_render_interval:
+                self.timer = self.scheduler.call_later(self.min_render_interval - time_diff, self.render, None)
+                return
+
+        self.timer = None
+        self.last_render = now
+        self.pending_render = None
+        # Only counted as shown once the display has taken it
+        self.showing_fingerprint = fingerprint
+
+        received: float|None = self.oldest_received
+        self.oldest_received = None
+
+        # Pushing the frame out can block for a long time, so let the
+        # scheduler decide where it runs
+        self.scheduler.run_blocking(self.__show_timed, img, fingerprint, received)
+
+    def __show_timed(self, img:any, fingerprint:bytes, received:float|None):
+        start: float = time.perf_counter()
+        try:
+            self._show(img)
+        except Exception as e:
+            self.logger.exception("Failed to show frame", exc_info=e)
+            self.__retry(img, fingerprint, received)
+            return
+        self.render_time.observe(time.perf_counter() - start)
+
+        self.shown_fingerprint = fingerprint
+        if self.showing_fingerprint == fingerprint:
+            self.showing_fingerprint = None
+        self.frames_shown += 1
+        self.shown_counter.inc()
+
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            startup: float = time.monotonic() - metrics.STARTED
+            metrics.gauge("ais_first_frame_seconds", "Time from startup to the first frame being shown").set(startup)
+            self.logger.info(f"First frame shown {startup:.2f}s after startup")
+
+        if received is not None:
+            self.pixels_latency.observe(time.time() - received)
+
+    def __retry(self, img:any, fingerprint:bytes, received:float|None):
+        # Anything handed over since replaces this frame anyway
+        if self.showing_fingerprint != fingerprint:
+            return
+
+        self.showing_fingerprint = None
+        if self.pending_render is None and self.timer is None:
+            self.pending_render = img
+            self.pending_fingerprint = fingerprint
+            self.note_received(received)
+            self.timer = self.scheduler.call_later(self.min_render_interval, self.render, None)
+
+    def _fingerprint(self, img:any) -> bytes:
+        try:
+            data: bytes = img.reduce(self.FINGERPRINT_REDUCE).tobytes()
+        except ValueError:
+            # Not every image mode can be reduced
+            data = img.tobytes()
+
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _show(self, img:any):
+        pass
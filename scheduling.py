@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor
+
+
+class ThreadScheduler:
+    """Runs deferred calls on their own timer threads and blocking work inline."""
+
+    def call_later(self, delay:float, callback:any, *args) -> threading.Timer:
+        timer:threading.Timer = threading.Timer(delay, callback, args)
+        # A pending redraw shouldn't keep the process alive at shutdown
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def run_blocking(self, func:any, *args):
+        func(*args)
+
+
+class _ThreadsafeHandle:
+    """Cancellable handle for a call scheduled from outside the event loop."""
+
+    def __init__(self):
+        self.handle:asyncio.TimerHandle|None = None
+        self.cancelled:bool = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.handle is not None:
+            self.handle.cancel()
+
+
+class AsyncioScheduler:
+    """Runs deferred calls on an event loop and blocking work in an executor.
+
+    Blocking work goes to a single executor so, for example, display
+    refreshes happen one at a time and in the order they were asked for."""
+
+    def __init__(self, loop:asyncio.AbstractEventLoop, executor:Executor|None = None):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+        self.loop:asyncio.AbstractEventLoop = loop
+        self.executor:Executor|None = executor
+
+    def call_later(self, delay:float, callback:any, *args) -> asyncio.TimerHandle|_ThreadsafeHandle:
+        if on_loop(self.loop):
+            return self.loop.call_later(delay, callback, *args)
+
+        handle:_ThreadsafeHandle = _ThreadsafeHandle()
+        def schedule():
+            if not handle.cancelled:
+                handle.handle = self.loop.call_later(delay, callback, *args)
+        self.loop.call_soon_threadsafe(schedule)
+        return handle
+
+    def run_blocking(self, func:any, *args):
+        if on_loop(self.loop):
+            future:asyncio.Future = self.loop.run_in_executor(self.executor, func, *args)
+            future.add_done_callback(self.__log_failure)
+        else:
+            self.loop.call_soon_threadsafe(self.run_blocking, func, *args)
+
+    def __log_failure(self, future:asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.exception("Blocking call failed", exc_info=future.exception())
+
+
+class AsyncQueue:
+    """Queue read by a coroutine on the event loop and fed from any thread.
+
+    put() never blocks, so it can stand in for queue.Queue on the producer
+    side. Items are held in buffer, which only needs append, popleft and
+    len, so a different buffer can change how items are queued."""
+
+    def __init__(self, loop:asyncio.AbstractEventLoop, buffer:any = None):
+        self.loop:asyncio.AbstractEventLoop = loop
+        self.buffer:any = buffer if buffer is not None else deque()
+        self.ready:asyncio.Event = asyncio.Event()
+
+    def put(self, item:any):
+        if on_loop(self.loop):
+            self.__put(item)
+        else:
+            self.loop.call_soon_threadsafe(self.__put, item)
+
+    def __put(self, item:any):
+        self.buffer.append(item)
+        self.ready.set()
+
+    async def get(self) -> any:
+        while not len(self.buffer):
+            self.ready.clear()
+            await self.ready.wait()
+
+        return self.buffer.popleft()
+
+    def drain(self, limit:int) -> list[any]:
+        """Take up to limit items that are already waiting, without blocking."""
+        items:list[any] = []
+        while len(self.buffer) and len(items) < limit:
+            items.append(self.buffer.popleft())
+        return items
+
+    def qsize(self) -> int:
+        return len(self.buffer)
+
+
+def on_loop(loop:asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
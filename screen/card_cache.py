@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+import metrics
+
+
+class CardCache:
+    """LRU of finished screen images, with a background thread to fill it.
+
+    Cards are looked up by a key that covers everything drawn on them.
+    prefetch queues a card to be drawn ahead of time by render(key, item),
+    keeping only the newest request per group (e.g. per vessel). Background
+    cards are drawn one at a time, interval seconds apart, so prefetching
+    never takes over the CPU from the rest of the pipeline.
+
+    A full screen card is around a megabyte, so keep max_entries small."""
+
+    def __init__(self, render:any, max_entries:int = 16, interval:float = 1.0):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.render:any = render
+        self.max_entries:int = max_entries
+        self.interval:float = interval
+
+        self.lock:threading.Lock = threading.Lock()
+        self.ready:threading.Condition = threading.Condition(self.lock)
+        self.cards:OrderedDict[tuple,Image.Image] = OrderedDict()
+        # group -> (key, item), oldest request first
+        self.pending:OrderedDict[any,tuple[tuple,any]] = OrderedDict()
+        self.thread:threading.Thread|None = None
+
+        self.hits:metrics.Counter = metrics.counter("ais_card_cache_total", "Card cache lookups and background draws", result="hit")
+        self.misses:metrics.Counter = metrics.counter("ais_card_cache_total", "Card cache lookups and background draws", result="miss")
+        self.prefetched:metrics.Counter = metrics.counter("ais_card_cache_total", "Card cache lookups and background draws", result="prefetched")
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def get(self, key:tuple) -> Image.Image|None:
+        """The cached card for key, which callers must not draw on."""
+        with self.lock:
+            card:Image.Image|None = self.cards.get(key)
+            if card is None:
+                self.misses.inc()
+                return None
+
+            self.cards.move_to_end(key)
+
+        self.hits.inc()
+        return card
+
+    def put(self, key:tuple, card:Image.Image):
+        if self.max_entries <= 0:
+            return
+
+        with self.lock:
+            self.cards[key] = card
+            self.cards.move_to_end(key)
+
+            while len(self.cards) > self.max_entries:
+                self.cards.popitem(last=False)
+
+    def prefetch(self, group:any, key:tuple, item:any):
+        if self.max_entries <= 0:
+            return
+
+        with self.lock:
+            if key in self.cards:
+                return
+
+            self.pending[group] = (key, item)
+            self.pending.move_to_end(group)
+
+            # Don't queue up more than the cache could hold anyway
+            while len(self.pending) > self.max_entries:
+                self.pending.popitem(last=False)
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.__run, daemon=True)
+                self.thread.start()
+
+            self.ready.notify()
+
+    def __run(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.ready.wait()
+
+                _, (key, item) = self.pending.popitem(last=False)
+                if key in self.cards:
+                    continue
+
+            try:
+                card:Image.Image|None = self.render(key, item)
+            except Exception as ex:
+                self.logger.exception("Failed to prefetch card", exc_info=ex)
+                card = None
+
+            if card is not None:
+                self.put(key, card)
+                self.prefetched.inc()
+
+            time.sleep(self.interval)
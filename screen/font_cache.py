@@ -0,0 +1,30 @@
+from functools import lru_cache
+
+from font_hanken_grotesk import HankenGroteskBold
+from PIL import ImageFont
+
+TEXT_CACHE_SIZE:int = 4096
+
+
+@lru_cache(maxsize=None)
+def get_font(size:int, path:str = HankenGroteskBold) -> ImageFont.FreeTypeFont:
+    """Process-wide font instance, so every screen shares one per size."""
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _measure(path:str, size:int, text:str) -> tuple[int,int]:
+    _, _, right, bottom = get_font(size, path).getbbox(text)
+    return (right, bottom)
+
+
+def text_size(font:ImageFont.FreeTypeFont, text:str) -> tuple[int,int]:
+    """Width and height of text in font, served from an LRU cache."""
+    return _measure(font.path, font.size, text)
+
+
+def cache_stats() -> str:
+    info = _measure.cache_info()
+    lookups:int = info.hits + info.misses
+    rate:float = info.hits / lookups if lookups else 0.0
+    return f"{info.hits} hits, {info.misses} misses ({rate:.1%}), {info.currsize}/{info.maxsize} entries"
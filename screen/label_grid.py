@@ -0,0 +1,36 @@
+class LabelGrid:
+    """Boxes already drawn on a screen, filed in a uniform grid of cells.
+
+    Checking a new box only looks at the cells it covers, so placing n
+    labels costs about n checks however crowded the screen gets. Boxes
+    are (left, top, right, bottom) and may touch but not overlap."""
+
+    def __init__(self, cell_size:int = 32):
+        self.cell_size:int = cell_size
+        self.cells:dict[tuple[int,int],list[tuple[float,float,float,float]]] = {}
+
+    def __cells(self, box:tuple[float,float,float,float]):
+        left, top, right, bottom = box
+        for row in range(int(top // self.cell_size), int(bottom // self.cell_size) + 1):
+            for col in range(int(left // self.cell_size), int(right // self.cell_size) + 1):
+                yield (row, col)
+
+    def overlaps(self, box:tuple[float,float,float,float]) -> bool:
+        left, top, right, bottom = box
+        for cell in self.__cells(box):
+            for other in self.cells.get(cell, ()):
+                if left < other[2] and other[0] < right and top < other[3] and other[1] < bottom:
+                    return True
+        return False
+
+    def add(self, box:tuple[float,float,float,float]):
+        for cell in self.__cells(box):
+            self.cells.setdefault(cell, []).append(box)
+
+    def place(self, box:tuple[float,float,float,float]) -> bool:
+        """Add box if it's clear of every other box, returning whether it was."""
+        if self.overlaps(box):
+            return False
+
+        self.add(box)
+        return True
@@ -0,0 +1,69 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class MercatorProjection:
+    """Maps lat/lon onto a Web Mercator image of fixed bounds.
+
+    The image is fitted to the bounds the way Mapbox fits a static map to
+    a bounding box: one scale for both axes, as large as still shows all
+    of the bounds, centred on them. Where the bounds' shape differs from
+    the image's, more map shows along one axis, and min/max lat/lon are
+    widened to cover everything the image shows.
+
+    Everything that depends only on the bounds and image size is worked
+    out once, so projecting a point costs one log and one tan. The _many
+    versions take arrays and need NumPy."""
+
+    def __init__(self, bounds:list[float], width:int, height:int):
+        west, south, east, north = (float(value) for value in bounds)
+
+        self.width:int = width
+        self.height:int = height
+
+        # Pixels per radian, in both directions
+        north_y:float = self._mercator_y(north)
+        south_y:float = self._mercator_y(south)
+        scale:float = min(width / math.radians(east - west), height / (north_y - south_y))
+
+        centre_lon:float = (west + east) / 2
+        centre_y:float = (north_y + south_y) / 2
+
+        self.x_scale:float = scale * math.pi / 180
+        self.y_scale:float = scale
+        self.top_y:float = centre_y + height / 2 / scale
+
+        self.min_lon:float = centre_lon - width / 2 / self.x_scale
+        self.max_lon:float = centre_lon + width / 2 / self.x_scale
+        self.max_lat:float = self._latitude(self.top_y)
+        self.min_lat:float = self._latitude(centre_y - height / 2 / scale)
+
+    def _mercator_y(self, lat:float) -> float:
+        return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+    def _latitude(self, mercator_y:float) -> float:
+        return math.degrees(2 * math.atan(math.exp(mercator_y)) - math.pi / 2)
+
+    def contains(self, lat:float, lon:float) -> bool:
+        return self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon
+
+    def project(self, lat:float, lon:float) -> tuple[float,float]:
+        x:float = (lon - self.min_lon) * self.x_scale
+        y:float = (self.top_y - self._mercator_y(lat)) * self.y_scale
+        return (x, y)
+
+    def contains_many(self, lats:any, lons:any) -> any:
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        return (self.min_lat <= lats) & (lats <= self.max_lat) & (self.min_lon <= lons) & (lons <= self.max_lon)
+
+    def project_many(self, lats:any, lons:any) -> tuple[any,any]:
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        xs:np.ndarray = (lons - self.min_lon) * self.x_scale
+        ys:np.ndarray = (self.top_y - np.log(np.tan(np.pi / 4 + np.radians(lats) / 2))) * self.y_scale
+        return (xs, ys)
@@ -1,7 +1,11 @@
 import math
 import os
 
-from PIL import Image
+from PIL import Image, ImageOps
+
+from scheduling import ThreadScheduler
+from screen import font_cache
+from screen.thumbnail_cache import resize_to_fit
 
 VESSEL_TYPES = {
     -1: "Unknown",
@@ -50,11 +54,12 @@ class ScreenBase():
     _LARGE_ICON_SIZE:int = 40
     _SMALL_ICON_SIZE:int = 24
 
-    def __init__(self, img_dir: str, renderer: any, dark_mode: bool = False):
+    def __init__(self, img_dir: str, renderer: any, dark_mode: bool = False, scheduler: any = None):
         self.img_dir: str = img_dir
         self._dark_mode: bool = dark_mode
 
         self.renderer: any = renderer
+        self.scheduler: any = scheduler if scheduler is not None else ThreadScheduler()
 
         self.height: int = self.renderer.width
         self.width: int = self.renderer.height
@@ -62,6 +67,8 @@ class ScreenBase():
         self.active: bool = False
 
         self.icons: dict[str,Image.Image] = {}
+        self._inverted_icons: dict[str,Image.Image] = {}
+        self._chrome_layers: dict[tuple[int,int,bool],Image.Image] = {}
 
     def _load_icon(self, key:str, filename:str, size:int):
         icon:Image.Image = Image.open(os.path.join("icon", filename))
@@ -75,12 +82,45 @@ class ScreenBase():
     def set_mode(self, dark_mode:bool):
         if self._dark_mode != dark_mode:
             self._dark_mode = dark_mode
+            self._chrome_layers.clear()
             if self.active:
                 self._render_screen(True)
 
+    def _colour(self, colour:str) -> str:
+        # Drawing in the inverted colour gives the same result as drawing
+        # normally and inverting the whole frame for dark mode afterwards
+        if not self._dark_mode:
+            return colour
+
+        return f"#{int(colour[1:], 16) ^ 0xFFFFFF:06X}"
+
+    def _icon(self, key:str) -> Image.Image:
+        if not self._dark_mode:
+            return self.icons[key]
+
+        if key not in self._inverted_icons:
+            self._inverted_icons[key] = ImageOps.invert(self.icons[key].convert("RGB"))
+
+        return self._inverted_icons[key]
+
+    def _get_chrome(self) -> Image.Image:
+        """A fresh copy of the screen's static layer, ready to draw on."""
+        key: tuple[int,int,bool] = (self.width, self.height, self._dark_mode)
+        layer: Image.Image|None = self._chrome_layers.get(key)
+
+        if layer is None:
+            layer = self._render_chrome()
+            if self._dark_mode:
+                layer = ImageOps.invert(layer)
+            self._chrome_layers[key] = layer
+
+        return layer.copy()
+
+    def _render_chrome(self) -> Image.Image:
+        return Image.new("RGB", (self.width, self.height), color=self.BLUE)
+
     def _get_text_size(self, font:any, text:str) -> tuple[int,int]:
-        _, _, right, bottom = font.getbbox(text)
-        return (right, bottom)
+        return font_cache.text_size(font, text)
     
     def _get_vessel_type(self, value:int) -> str:
         if value is None:
@@ -106,17 +146,7 @@ class ScreenBase():
         return vessel_type
 
     def _resize_image(self, pic:Image.Image, max_width:int, max_height:int) -> Image.Image:
-        original_width, original_height = pic.size
-
-        width_ratio: float = max_width / original_width
-        height_ratio: float = max_height / original_height
-
-        scale_factor: float = min(width_ratio, height_ratio)
-
-        new_width: int = int(original_width * scale_factor)
-        new_height: int = int(original_height * scale_factor)
-
-        return pic.resize((new_width, new_height), Image.LANCZOS)
+        return resize_to_fit(pic, max_width, max_height)
     
     def _render_screen(self, force:bool = False):
         pass
\ No newline at end of file
@@ -2,17 +2,35 @@ import datetime
 import logging
 import os
 import threading
-import urllib
+import urllib.request
+from array import array
+from collections import OrderedDict
 
-from font_hanken_grotesk import HankenGroteskBold
 from PIL import Image, ImageDraw, ImageFont
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from screen.label_grid import LabelGrid
+from screen.map_projection import MercatorProjection
+from screen.font_cache import cache_stats, get_font
 from screen.screen_base import ScreenBase
+from track_history import Track, TrackHistory
+from vessel_state import VesselSnapshot
 
 
 class ShipMapScreen(ScreenBase):
-    def __init__(self, img_dir:str, renderer:any, api_key:str, bounds:list[int], light_style:str, dark_style:str, time_window:int = 60 * 5, render_interval:int = 60 * 3, max_tracked:int = 20):
-        super().__init__(img_dir, renderer)
+    # Vessel times and positions, gathered up to be filtered and projected
+    # all at once
+    SHIP_DTYPE:list[tuple[str,str]] = [("ts", "f8"), ("lat", "f8"), ("lon", "f8")]
+
+    POINT_SIZE:int = 5
+    TEXT_OFFSET_Y:int = 5
+
+    def __init__(self, img_dir:str, renderer:any, api_key:str, bounds:list[int], light_style:str, dark_style:str, time_window:int = 60 * 5, render_interval:int = 60 * 3, max_tracked:int = 300, scheduler:any = None, map_dir:str|None = None, history:TrackHistory|None = None):
+        super().__init__(img_dir, renderer, scheduler=scheduler)
         self.logger: logging.Logger = logging.getLogger(__name__)
 
         self.api_key:str = api_key
@@ -21,32 +39,50 @@ class ShipMapScreen(ScreenBase):
 
         self.time_window:int = time_window
         self.max_tracked:int = max_tracked
-        self.visible_ships: dict[str,dict[str,any]] = {}
+        # Ordered least to most recently heard from
+        self.visible_ships: OrderedDict[str,VesselSnapshot] = OrderedDict()
+        self.history:TrackHistory|None = history
 
-        self.hanken_bold_8:ImageFont.FreeTypeFont = ImageFont.truetype(HankenGroteskBold, 8)
+        self.hanken_bold_8:ImageFont.FreeTypeFont = get_font(8)
         
         self.render_interval:int = render_interval
-        self.timer:threading.Timer|None = None
+        self.timer:any = None
 
         self.bounds:list[int] = bounds
-        self.min_lon:float = float(bounds[0])
-        self.min_lat:float = float(bounds[1])
-        self.max_lon:float = float(bounds[2])
-        self.max_lat:float = float(bounds[3])
+        self.projection:MercatorProjection = MercatorProjection(bounds, self.width, self.height)
 
-        self.__load_maps()
         self._load_icon("ship", "icon_ship.png", self._LARGE_ICON_SIZE)
 
-        self.map_image:Image.Image = Image.open(os.path.join(self.img_dir, "light.png"))
+        # Decoded basemaps keyed by dark mode. Any that are missing from
+        # map_dir are fetched in the background so startup never waits.
+        self.map_dir:str = map_dir if map_dir else self.img_dir
+        self.basemaps:dict[bool,Image.Image|None] = {False: None, True: None}
+        self.__load_maps()
+
+        if self.basemaps[False] is None or self.basemaps[True] is None:
+            threading.Thread(target=self.__download_maps, daemon=True).start()
 
     def __load_maps(self):
-        for map in [("light",self.light_style),("dark",self.dark_style)]:
-            img_path:str = os.path.join(self.img_dir, map[0]+".png")
+        for dark_mode, name in [(False,"light"),(True,"dark")]:
+            img_path:str = os.path.join(self.map_dir, name+".png")
+            if self.basemaps[dark_mode] is not None or not os.path.exists(img_path):
+                continue
+
+            try:
+                basemap:Image.Image = Image.open(img_path).convert("RGB")
+                if basemap.size != (self.width, self.height):
+                    basemap = basemap.resize((self.width, self.height), Image.LANCZOS)
+                self.basemaps[dark_mode] = basemap
+            except Exception as e:
+                self.logger.exception(f"Failed to load basemap {img_path}", exc_info=e)
+
+    def __download_maps(self):
+        for dark_mode, name, style in [(False,"light",self.light_style),(True,"dark",self.dark_style)]:
+            img_path:str = os.path.join(self.map_dir, name+".png")
             if os.path.exists(img_path):
                 continue
 
             try:
-                style:str = map[1]
                 size:str = f"{self.renderer.height}x{self.renderer.width}"
                 bounds:str = f"[{self.bounds[0]},{self.bounds[1]},{self.bounds[2]},{self.bounds[3]}]"
 
@@ -56,6 +92,10 @@ class ShipMapScreen(ScreenBase):
             except Exception as e:
                 print(f"Failed to download the image. Error: {e}")
 
+        self.__load_maps()
+        if self.active:
+            self._render_screen(True)
+
     def set_active(self, active:bool):
         super().set_active(active)
 
@@ -65,68 +105,112 @@ class ShipMapScreen(ScreenBase):
             self.timer.cancel()
             self.timer = None
 
-    def set_mode(self, dark_mode:bool):
-        img_name:str = "dark.png" if dark_mode else "light.png"
-        self.map_image:Image.Image = Image.open(os.path.join(self.img_dir, img_name))
-
-        # Call super last as it will force a redraw
-        super().set_mode(dark_mode)
-
     def __handle_timer(self):
-        self.timer = threading.Timer(self.render_interval, self.__handle_timer)
-        self.timer.start()
+        self.timer = self.scheduler.call_later(self.render_interval, self.__handle_timer)
         self._render_screen()
 
     def update(self, msg:tuple[str,...]):
         if msg[0] != "update":
             return
         
-        ship:dict[str,any] = msg[1]
+        ship:VesselSnapshot = msg[1]
+
+        self.visible_ships[ship.mmsi] = ship
+        self.visible_ships.move_to_end(ship.mmsi)
 
-        self.visible_ships[ship['mmsi']] = ship
         # Reduce the list down if it's longer than the max we can track
-        self.visible_ships = dict(sorted(self.visible_ships.items(), key=lambda item: item[1]['ts'], reverse=True)[:self.max_tracked])
+        while len(self.visible_ships) > self.max_tracked:
+            self.visible_ships.popitem(last=False)
 
-    def _render_screen(self, force:bool = False):
-        if not self.active:
-            return
-        
-        self.logger.info("Draw Map")
+    def __locate_ships(self, now:float) -> tuple[list[VesselSnapshot],list[tuple[VesselSnapshot,float,float]]]:
+        """Vessels heard from within the time window, newest first, and
+        those of them inside the map bounds with their screen position."""
+        ships:list[VesselSnapshot] = list(reversed(self.visible_ships.values()))
 
-        img:Image.Image = Image.new("RGB", (self.width,self.height), color=self.BLUE)
-        draw:Image.ImageDraw = ImageDraw.Draw(img)
+        if np is None:
+            recent:list[VesselSnapshot] = [ship for ship in ships if now - ship.ts <= self.time_window]
+            return recent, [(ship, *self.projection.project(ship.lat, ship.lon)) for ship in recent
+                            if ship.lat is not None and ship.lon is not None and self.projection.contains(ship.lat, ship.lon)]
 
-        img.paste(self.map_image)
+        nan:float = float("nan")
+        table:np.ndarray = np.array([(ship.ts, nan if ship.lat is None else ship.lat, nan if ship.lon is None else ship.lon) for ship in ships],
+                                    dtype=self.SHIP_DTYPE)
 
-        now:datetime = datetime.datetime.now()
+        # Missing positions are NaN, which is never within the bounds
+        is_recent:np.ndarray = now - table["ts"] <= self.time_window
+        on_map:np.ndarray = np.flatnonzero(is_recent & self.projection.contains_many(table["lat"], table["lon"]))
+        xs, ys = self.projection.project_many(table["lat"][on_map], table["lon"][on_map])
 
-        for ship in self.visible_ships.values():
-            ts:datetime = datetime.datetime.fromtimestamp(ship.get('ts', 0))
+        recent = [ships[i] for i in np.flatnonzero(is_recent).tolist()]
+        return recent, [(ships[i], x, y) for i, x, y in zip(on_map.tolist(), xs.tolist(), ys.tolist())]
 
-            # Don't draw vessels if they haven't been updated within the time window
-            if (now - ts).total_seconds() > self.time_window:
-                continue
+    def __draw_trails(self, draw:ImageDraw.ImageDraw, ships:list[VesselSnapshot]):
+        if self.history is None:
+            return
 
-            point_lat:float = ship.get("lat", 0)
-            point_lon:float = ship.get("lon", 0)
+        colour:str = self.YELLOW if self._dark_mode else self.BLACK
 
-            # Skip any vessels that aren't within the map bounds
-            if point_lat < self.min_lat or point_lat > self.max_lat:
+        # Copied under the lock and drawn after, so the tracker isn't held
+        # up while PIL draws
+        tracks:dict[str,array] = self.history.snapshot([ship.mmsi for ship in ships], min_points=2)
+
+        for data in tracks.values():
+            if np is None:
+                points:list[tuple[float,float]] = [self.projection.project(data[i + 1], data[i + 2]) for i in range(0, len(data), Track.FIELDS)]
+                draw.line(points, colour, 1)
                 continue
 
-            if point_lon < self.min_lon or point_lon > self.max_lon:
+            rows:np.ndarray = np.frombuffer(data, dtype=np.float64).reshape(-1, Track.FIELDS)
+            xs, ys = self.projection.project_many(rows[:, 1], rows[:, 2])
+            draw.line(np.column_stack((xs, ys)).ravel().tolist(), colour, 1)
+
+    def __draw_ships(self, draw:ImageDraw.ImageDraw, located:list[tuple[VesselSnapshot,float,float]]):
+        point_colour:str = self.YELLOW if self._dark_mode else self.BLACK
+        text_colour:str = self.YELLOW if self._dark_mode else self.RED
+        radius:float = self.POINT_SIZE / 2
+
+        for _, x, y in located:
+            draw.ellipse([x - radius, y - radius, x + radius, y + radius], point_colour)
+
+        # Newest vessels get first pick of where their name goes. Names go
+        # above the point if there's room, or else below, right or left,
+        # and are left off if there's no room anywhere.
+        labels:LabelGrid = LabelGrid()
+        for ship, x, y in located:
+            if not ship.name:
                 continue
 
-            # Map lat/lon to x/y image position
-            point_y:int = self.height - (((point_lat - self.min_lat) / (self.max_lat - self.min_lat)) * self.height)
-            point_x:int = ((point_lon - self.min_lon) / (self.max_lon - self.min_lon)) * self.width
+            width, height = self._get_text_size(self.hanken_bold_8, ship.name)
+            gap:float = self.TEXT_OFFSET_Y + radius
+
+            for left, top in ((x - width / 2, y - gap - height),
+                              (x - width / 2, y + gap),
+                              (x + gap, y - height / 2),
+                              (x - gap - width, y - height / 2)):
+                if labels.place((left, top, left + width, top + height)):
+                    draw.text((left, top), ship.name, text_colour, font=self.hanken_bold_8)
+                    break
+
+    def _render_screen(self, force:bool = False):
+        if not self.active:
+            return
+        
+        self.logger.info("Draw Map")
+
+        img:Image.Image = Image.new("RGB", (self.width,self.height), color=self.BLUE)
+        draw:Image.ImageDraw = ImageDraw.Draw(img)
+
+        basemap:Image.Image|None = self.basemaps[self._dark_mode]
+        if basemap is not None:
+            img.paste(basemap)
 
-            point_size:int = 5
-            text_offset_y:int = 5
+        # Don't draw vessels if they haven't been updated within the time
+        # window, or points for any outside the map bounds
+        recent, located = self.__locate_ships(datetime.datetime.now().timestamp())
 
-            draw.ellipse([point_x-point_size/2,point_y-point_size/2,point_x+point_size/2,point_y+point_size/2], self.YELLOW if self._dark_mode else self.BLACK)
-            text_size:tuple[int,int] = self._get_text_size(self.hanken_bold_8, ship.get("name"))
-            draw.text((point_x - (text_size[0]/2), point_y - text_offset_y - (point_size/2) - text_size[1]), ship.get("name"), self.YELLOW if self._dark_mode else self.RED, font=self.hanken_bold_8)
+        self.__draw_trails(draw, recent)
+        self.__draw_ships(draw, located)
 
         img = img.convert("RGB")
+        self.logger.debug(f"Text metrics cache: {cache_stats()}")
         self.renderer.render(img, force)
\ No newline at end of file
@@ -1,26 +1,26 @@
 import datetime
 import logging
-import threading
 
-from font_hanken_grotesk import HankenGroteskBold
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageDraw, ImageFont
 
+from screen.font_cache import cache_stats, get_font
 from screen.screen_base import ScreenBase
+from vessel_state import VesselSnapshot
 
 
 class ShipTableScreen(ScreenBase):
-    def __init__(self,img_dir:str, renderer:any, render_interval:int = 2.5*60, max_tracked:int = 20):
-        super().__init__(img_dir, renderer)
+    def __init__(self,img_dir:str, renderer:any, render_interval:int = 2.5*60, max_tracked:int = 20, scheduler:any = None):
+        super().__init__(img_dir, renderer, scheduler=scheduler)
         self.logger:logging.Logger = logging.getLogger(__name__)
 
         self.max_tracked:int = max_tracked
-        self.visible_ships:dict[str,dict[str,any]] = {}
+        self.visible_ships:dict[str,VesselSnapshot] = {}
 
-        self.hanken_bold_20:ImageFont.FreeTypeFont = ImageFont.truetype(HankenGroteskBold, 20)
-        self.hanken_bold_14:ImageFont.FreeTypeFont = ImageFont.truetype(HankenGroteskBold, 14)
+        self.hanken_bold_20:ImageFont.FreeTypeFont = get_font(20)
+        self.hanken_bold_14:ImageFont.FreeTypeFont = get_font(14)
 
         self.render_interval:int = render_interval
-        self.timer:threading.Timer|None = None
+        self.timer:any = None
 
         self._load_icon("ship", "icon_ship.png", self._LARGE_ICON_SIZE)
 
@@ -33,25 +33,19 @@ class ShipTableScreen(ScreenBase):
             self.timer = None
 
     def __handle_timer(self):
-        self.timer = threading.Timer(self.render_interval, self.__handle_timer)
-        self.timer.start()
+        self.timer = self.scheduler.call_later(self.render_interval, self.__handle_timer)
         self._render_screen()
 
     def update(self, msg:tuple[str,...]):
         if msg[0] != "update":
             return
         
-        ship:dict[str,any] = msg[1]
+        ship:VesselSnapshot = msg[1]
 
-        self.visible_ships[ship['mmsi']] = ship
-        self.visible_ships = dict(sorted(self.visible_ships.items(), key=lambda item: item[1]['ts'], reverse=True)[:self.max_tracked])
-
-    def _render_screen(self, force:bool = False):
-        if not self.active:
-            return
-        
-        self.logger.info("Draw Table")
+        self.visible_ships[ship.mmsi] = ship
+        self.visible_ships = dict(sorted(self.visible_ships.items(), key=lambda item: item[1].ts, reverse=True)[:self.max_tracked])
 
+    def _render_chrome(self) -> Image.Image:
         img:Image.Image = Image.new("RGB", (self.width,self.height), color=self.BLUE)
         draw:Image.ImageDraw = ImageDraw.Draw(img)
 
@@ -73,63 +67,65 @@ class ShipTableScreen(ScreenBase):
         # Draw the title
         draw.text((text_x,text_y), "Ship Tracker", self.BLUE, font=self.hanken_bold_20)
 
-        text_y += 24
+        return img
+
+    def _render_screen(self, force:bool = False):
+        if not self.active:
+            return
+        
+        self.logger.info("Draw Table")
+
+        img:Image.Image = self._get_chrome()
+        draw:Image.ImageDraw = ImageDraw.Draw(img)
+        blue:str = self._colour(self.BLUE)
+
+        screen_padding:int = 10
+        container_padding_horz:int = 30
+        container_padding_vert:int = 10
+        text_x:int = screen_padding+container_padding_horz+self._LARGE_ICON_SIZE
+        text_y:int = screen_padding+container_padding_vert+10+24
 
         # Draw the subtitle
         now:datetime = datetime.datetime.now()
-        draw.text((text_x,text_y), now.strftime("%A - %d/%m/%y %H:%M"), self.BLUE, font=self.hanken_bold_14)
+        draw.text((text_x,text_y), now.strftime("%A - %d/%m/%y %H:%M"), blue, font=self.hanken_bold_14)
 
         text_x -= self._LARGE_ICON_SIZE
         text_y += 35
 
+        # Measure every row once, then lay the columns out from the results
+        rows:list[tuple[str,str,str]] = []
         widest_name:int = 0
         widest_type:int = 0
         widest_time:int = 0
         for ship in self.visible_ships.values():
-            ship_name:str = ship.get("name","Unknown")
-            ship_type:int = self._get_vessel_type(ship.get("type", -1))
-            timestamp:datetime = datetime.datetime.fromtimestamp(ship.get("ts",0)).strftime("%H:%M:%S")
+            ship_name:str = ship.name if ship.name is not None else "Unknown"
+            ship_type:str = self._get_vessel_type(ship.type)
+            timestamp:str = datetime.datetime.fromtimestamp(ship.ts).strftime("%H:%M:%S")
+            rows.append((ship_name, ship_type, timestamp))
 
-            text_size:tuple[int,int] = self._get_text_size(self.hanken_bold_14, ship_name)
-            if text_size[0] > widest_name:
-                widest_name = text_size[0]
-
-            text_size = self._get_text_size(self.hanken_bold_14, ship_type)
-            if text_size[0] > widest_type:
-                widest_type = text_size[0]
-
-            text_size = self._get_text_size(self.hanken_bold_14, timestamp)
-            if text_size[0] > widest_time:
-                widest_time = text_size[0]
+            widest_name = max(widest_name, self._get_text_size(self.hanken_bold_14, ship_name)[0])
+            widest_type = max(widest_type, self._get_text_size(self.hanken_bold_14, ship_type)[0])
+            widest_time = max(widest_time, self._get_text_size(self.hanken_bold_14, timestamp)[0])
 
         gap:int = (self.width-(text_x+text_x+widest_name+widest_type+widest_time))/2
 
         text_size = self._get_text_size(self.hanken_bold_14, "Last Seen")
-        draw.text((text_x,text_y), "Ship Name", self.BLUE, font=self.hanken_bold_14)
-        draw.text((text_x+widest_name+gap,text_y), "Ship Type", self.BLUE, font=self.hanken_bold_14)
-        draw.text((self.width-text_x-text_size[0],text_y), "Last Seen", self.BLUE, font=self.hanken_bold_14)
+        draw.text((text_x,text_y), "Ship Name", blue, font=self.hanken_bold_14)
+        draw.text((text_x+widest_name+gap,text_y), "Ship Type", blue, font=self.hanken_bold_14)
+        draw.text((self.width-text_x-text_size[0],text_y), "Last Seen", blue, font=self.hanken_bold_14)
 
         text_y += text_size[1] + 10
-        draw.line([(text_x,text_y),(self.width-text_x,text_y)], fill=self.BLUE, width=2)
+        draw.line([(text_x,text_y),(self.width-text_x,text_y)], fill=blue, width=2)
         text_y += 10
 
-        ships:list[dict[str,any]] = self.visible_ships.values()
-        for ship in ships:
-            ship_name:str = ship.get("name","Unknown")
-            ship_type:str = self._get_vessel_type(ship.get("type", -1))
-            timestamp:datetime = datetime.datetime.fromtimestamp(ship.get("ts",0)).strftime("%H:%M:%S")
-
-            draw.text((text_x,text_y), ship_name, self.BLUE, font=self.hanken_bold_14)
-            draw.text((text_x+widest_name+gap,text_y), ship_type, self.BLUE, font=self.hanken_bold_14)
-            draw.text((self.width-text_x-widest_time,text_y), timestamp, self.BLUE, font=self.hanken_bold_14)
+        for ship_name, ship_type, timestamp in rows:
+            draw.text((text_x,text_y), ship_name, blue, font=self.hanken_bold_14)
+            draw.text((text_x+widest_name+gap,text_y), ship_type, blue, font=self.hanken_bold_14)
+            draw.text((self.width-text_x-widest_time,text_y), timestamp, blue, font=self.hanken_bold_14)
 
             text_y += text_size[1] + 10
-            draw.line([(text_x,text_y),(self.width-text_x,text_y)], fill=self.BLUE, width=2)
+            draw.line([(text_x,text_y),(self.width-text_x,text_y)], fill=blue, width=2)
             text_y += 10
 
-        if self._dark_mode:
-            img = ImageOps.invert(img)
-
-        img = img.convert("RGB")
-
-        self.renderer.render(img, force)
\ No newline at end of file
+        self.logger.debug(f"Text metrics cache: {cache_stats()}")
+        self.renderer.render(img, force)
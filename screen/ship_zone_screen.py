@@ -1,24 +1,70 @@
 import datetime
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 
-from font_hanken_grotesk import HankenGroteskBold
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 
+from screen.card_cache import CardCache
+from screen.font_cache import get_font
 from screen.screen_base import ScreenBase
+from screen.thumbnail_cache import ThumbnailCache
+from vessel_state import VesselSnapshot
 
 
 class ShipZoneScreen(ScreenBase):
-    def __init__(self,img_dir:str, renderer:any):
-        super().__init__(img_dir, renderer)
+    # Seconds before a vessel's expected arrival to start showing it, so
+    # the slow e-ink refresh is done by the time it gets there
+    REFRESH_LEAD:float = 30
 
-        self.logger:logging.Logger = logging.getLogger(__name__)
+    # Seconds a vessel photo's mtime is trusted before it's looked at again
+    PHOTO_RECHECK:float = 60
+
+    # Height of each row of details under the name
+    _ROW_HEIGHT:int = 30 + 35
 
-        self.visible_ship:dict[str,any]|None = None
+    def __init__(self,img_dir:str, renderer:any, scheduler:any = None, card_cache_size:int = 16, thumb_dir:str|None = None):
+        super().__init__(img_dir, renderer, scheduler=scheduler)
 
-        self.hanken_bold_35:ImageFont.FreeTypeFont = ImageFont.truetype(HankenGroteskBold, 35)
-        self.hanken_bold_20:ImageFont.FreeTypeFont = ImageFont.truetype(HankenGroteskBold, 20)
-        self.hanken_bold_14:ImageFont.FreeTypeFont = ImageFont.truetype(HankenGroteskBold, 14)
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.visible_ship:VesselSnapshot|None = None
+        # Whether what's shown is a prepared card put up before the vessel
+        # arrived, and so may be older than the vessel's arrival
+        self.showing_prepared:bool = False
+        # What was shown before the first prepared card went up, to go back
+        # to if the vessel doesn't arrive after all
+        self.replaced_ship:VesselSnapshot|None = None
+
+        # mmsi -> (ship, prerendered card, dark mode it was drawn in, timer)
+        # for vessels expected to enter a zone soon
+        self.approaching:dict[str,tuple[VesselSnapshot,Image.Image,bool,any]] = {}
+
+        # Prepared cards are shown from scheduler timers, so what's shown
+        # and what's approaching are only changed while holding lock
+        self.lock:threading.RLock = threading.RLock()
+
+        # Cards for vessels in or near a zone, drawn ahead of time so showing
+        # one only has to add the time and speed. Drawing happens on this
+        # thread and the cache's, so it's done under draw_lock.
+        self.draw_lock:threading.Lock = threading.Lock()
+        self.cards:CardCache = CardCache(self.__render_card, card_cache_size)
+
+        # mmsi -> (when it was checked, photo mtime or None), oldest first
+        self.photo_mtimes:OrderedDict[str,tuple[float,int|None]] = OrderedDict()
+        self.max_photo_mtimes:int = max(card_cache_size * 4, 64)
+
+        # Photos resized for this screen. Any not resized yet are done in
+        # the background so the first zone hit for a vessel doesn't wait.
+        self.thumbnails:ThumbnailCache = ThumbnailCache(thumb_dir if thumb_dir else os.path.join(img_dir, ".thumbs"))
+        if os.path.isdir(img_dir):
+            threading.Thread(target=self.thumbnails.warm, args=[img_dir, *self.photo_size(self.width)], daemon=True).start()
+
+        self.hanken_bold_35:ImageFont.FreeTypeFont = get_font(35)
+        self.hanken_bold_20:ImageFont.FreeTypeFont = get_font(20)
+        self.hanken_bold_14:ImageFont.FreeTypeFont = get_font(14)
 
         self._load_icon("ship", "icon_ship.png", self._LARGE_ICON_SIZE)
         self._load_icon("mmsi", "icon_mmsi.png", self._SMALL_ICON_SIZE)
@@ -29,241 +75,426 @@ class ShipZoneScreen(ScreenBase):
 
     def update(self, msg:tuple[str,...]):
         try:
-            if msg[0] == "zone":
-                ship:str = msg[1]
-                zone_prev:str = msg[2]
-
-                self.logger.info(f"{ship['name']} changed zone from {zone_prev} to {ship.get('zone','None')}")
-
-                if ship.get("zone", None) is not None:
-                    self.__display_ship(ship)
+            with self.lock:
+                if msg[0] == "zone":
+                    ship:VesselSnapshot = msg[1]
+                    zone_prev:str = msg[2]
+
+                    self.logger.info(f"{ship.name} changed zone from {zone_prev} to {ship.zone}")
+
+                    if ship.zone is not None:
+                        pending:tuple[VesselSnapshot,Image.Image,bool,any]|None = self.approaching.get(ship.mmsi)
+                        if pending is None:
+                            self.__display_ship(ship)
+                        else:
+                            # Arrived ahead of the prediction, but the card is ready
+                            pending[3].cancel()
+                            self.__show_prepared(ship.mmsi, ship)
+                elif msg[0] == "approaching":
+                    self.__prepare_ship(msg[1], msg[2], msg[3])
+                elif msg[0] == "nearby":
+                    self.__prefetch(msg[1])
         except Exception as e:
             self.logger.exception("Failure in ShipZoneScreen update", exc_info=e)
 
-    def __display_ship(self, ship_data:dict[str,any]):
+    def __display_ship(self, ship_data:VesselSnapshot):
         try:
-            self.logger.info(f"Request to display ship {ship_data.get('mmsi',None)}")
-            if self.visible_ship is not None and self.visible_ship["mmsi"] == ship_data["mmsi"]:
-                self.logger.info("Skip display - ship is already displayed")
-                return
+            self.logger.info(f"Request to display ship {ship_data.mmsi}")
+            if self.visible_ship is not None and self.visible_ship.mmsi == ship_data.mmsi:
+                # A card shown ahead of arrival is brought up to date once
+                # the vessel is actually there
+                if not self.showing_prepared or self.visible_ship.version == ship_data.version:
+                    self.logger.info("Skip display - ship is already displayed")
+                    return
 
             self.visible_ship = ship_data
+            self.showing_prepared = False
+            self.replaced_ship = None
             self._render_screen()
         except Exception as e:
             self.logger.exception("Failure in ShipZoneScreen display_ship")
 
-    def _render_screen(self, force:bool = False):
+    @staticmethod
+    def photo_size(width:int) -> tuple[int,int]:
+        """Size of the box the vessel's photo is fitted into on a screen
+        width pixels wide, following the layout in __draw_card."""
+        return (width - (10 + 30) * 2, 370 - (10 + 10 + 10 + 24 + 35))
+
+    def __prepare_ship(self, ship:VesselSnapshot, zone:str|None, eta:float|None):
+        pending:tuple[VesselSnapshot,Image.Image,bool,any]|None = self.approaching.pop(ship.mmsi, None)
+        if pending is not None:
+            pending[3].cancel()
+
+        if zone is None:
+            if self.showing_prepared and self.visible_ship is not None and self.visible_ship.mmsi == ship.mmsi:
+                self.__restore_replaced()
+            return
+
+        if self.visible_ship is not None and self.visible_ship.mmsi == ship.mmsi:
+            return
+
+        # The card is drawn now, stamped with the time the vessel is due,
+        # and put on screen far enough ahead for the refresh to finish
+        arrival:float = ship.received + eta
+        img:Image.Image|None = self.__draw_ship(ship, datetime.datetime.fromtimestamp(arrival))
+        if img is None:
+            return
+
+        self.logger.info(f"Prepared ship {ship.mmsi} for {zone} in {eta:.0f}s")
+        delay:float = max(0, arrival - time.time() - self.REFRESH_LEAD)
+        timer:any = self.scheduler.call_later(delay, self.__show_prepared, ship.mmsi)
+        self.approaching[ship.mmsi] = (ship, img, self._dark_mode, timer)
+
+    def __show_prepared(self, mmsi:str, arrived:VesselSnapshot|None = None):
+        # Called by the lead timer, or with arrived if the vessel beat it
         try:
-            if not self.active or self.visible_ship is None:
-                return
+            with self.lock:
+                pending:tuple[VesselSnapshot,Image.Image,bool,any]|None = self.approaching.pop(mmsi, None)
+                if pending is None:
+                    return
+
+                ship, img, dark_mode, _ = pending
+                if self.visible_ship is not None and self.visible_ship.mmsi == mmsi:
+                    return
 
-            self.logger.info(f"Draw Ship {self.visible_ship}")
+                if arrived is not None and arrived.version != ship.version:
+                    # It's been heard from since the card was drawn
+                    ship, img = arrived, None
 
-            img:Image.Image = Image.new("RGB", (self.width, self.height), color=self.BLUE)
-            draw:Image.ImageDraw = ImageDraw.Draw(img)
+                if arrived is not None:
+                    self.replaced_ship = None
+                elif not self.showing_prepared:
+                    self.replaced_ship = self.visible_ship
 
-            screen_padding:int = 10
-            container_padding_horz:int = 30
-            container_padding_vert:int = 10
-            text_x:int = screen_padding + container_padding_horz
-            text_y:int = screen_padding + container_padding_vert
+                self.visible_ship = ship
+                self.showing_prepared = arrived is None
+                if not self.active:
+                    return
 
-            # Draw the content container
-            draw.rounded_rectangle([
-                (screen_padding, screen_padding),
-                (self.width - screen_padding, self.height - screen_padding)
-            ], radius=8, fill=self.WHITE)
+                if img is None or dark_mode != self._dark_mode:
+                    img = self.__draw_ship(ship, datetime.datetime.now())
 
-            text_y += 10
+                if img is not None:
+                    self.renderer.render(img)
+        except Exception as e:
+            self.logger.exception("Failure in ShipZoneScreen show_prepared", exc_info=e)
 
-            # Draw the boat icon
-            img.paste(self.icons["ship"], (text_x, text_y))
-            text_x += self._LARGE_ICON_SIZE
+    def __restore_replaced(self):
+        # The prediction lapsed after its card went up
+        self.logger.info(f"Ship {self.visible_ship.mmsi} didn't arrive, going back to the previous ship")
 
-            # Draw the title
-            draw.text((text_x, text_y), "Ship Tracker", self.BLUE, font=self.hanken_bold_20)
+        self.visible_ship = self.replaced_ship
+        self.showing_prepared = False
+        self.replaced_ship = None
 
-            text_y += 24
+        if self.visible_ship is not None:
+            self._render_screen()
+        elif self.active:
+            self.renderer.render(self._get_chrome())
 
-            # Draw the subtitle
-            now:datetime = datetime.datetime.now()
-            draw.text((text_x, text_y), now.strftime("%A - %d/%m/%y %H:%M"), self.BLUE, font=self.hanken_bold_14)
+    def _render_chrome(self) -> Image.Image:
+        img:Image.Image = Image.new("RGB", (self.width, self.height), color=self.BLUE)
+        draw:Image.ImageDraw = ImageDraw.Draw(img)
 
-            text_y += 35
-            image_y = text_y
-
-            # Draw the picture
-            max_width:int = self.width - ((screen_padding + container_padding_horz) * 2)
-            max_height:int = 370 - text_y
-            img_padding:int = 0
-            img_path:str = os.path.join(self.img_dir, self.visible_ship["mmsi"])
-            if os.path.exists(img_path):
-                pic:Image.Image = Image.open(img_path)
-                pic = self._resize_image(pic, max_width, max_height)
-
-                #img.paste(pic, (screen_padding+container_padding_horz, text_y))
-            else:
-                ship_len:int = (self.visible_ship.get("stern", 0) + self.visible_ship.get("bow", 0))
-                ship_wid:int = (self.visible_ship.get("port", 0) + self.visible_ship.get("starboard", 0))
-
-                if ship_len == 0 or ship_wid == 0:
-                    return
+        screen_padding:int = 10
+        container_padding_horz:int = 30
+        container_padding_vert:int = 10
+        text_x:int = screen_padding + container_padding_horz
+        text_y:int = screen_padding + container_padding_vert
 
-                tl:int = (screen_padding + container_padding_horz, text_y)
-                tr:int = (tl[0] + max_width, text_y)
-                bl:int = (tl[0], text_y + max_height)
-                br:int = (tr[0], bl[1])
-
-                draw.line([tl, tr, br, bl, tl], fill=self.BLUE, width=2)
-
-                img_padding:int = 5
-                max_width -= img_padding * 2
-                max_height -= img_padding * 2
-
-                pic:Image.Image = Image.new("RGB", (max_width, max_height), color=self.WHITE)
-                pic_draw:Image.ImageDraw = ImageDraw.Draw(pic)
-
-                text_size = self._get_text_size(self.hanken_bold_14, str(ship_wid))
-                left_reserve:int = 5 + text_size[1]
-
-                inner_padding:int = 30
-                max_width -= (inner_padding * 2) + left_reserve
-                max_height -= inner_padding * 2
-
-                width_ratio = max_width / ship_len
-                height_ratio = max_height / ship_wid
-
-                scale_factor:float = min(width_ratio, height_ratio)
-
-                ship_len:int = int(ship_len * scale_factor)
-                ship_wid:int = int(ship_wid * scale_factor)
-
-                img_centre:int = ((max_width / 2) + left_reserve, max_height / 2)
-
-                wh_ratio:float = 0.6 * (ship_wid / ship_len)
-                nose_len:int = ship_len * wh_ratio
-
-                tl = (inner_padding + img_centre[0] - ship_len / 2, inner_padding + img_centre[1] - ship_wid / 2)
-                tr = (inner_padding + img_centre[0] + ship_len / 2 - nose_len, inner_padding + img_centre[1] - ship_wid / 2)
-                n = (inner_padding + img_centre[0] + ship_len / 2, inner_padding + img_centre[1])
-                bl = (inner_padding + img_centre[0] - ship_len / 2, inner_padding + img_centre[1] + ship_wid / 2)
-                br = (inner_padding + img_centre[0] + ship_len / 2 - nose_len, inner_padding + img_centre[1] + ship_wid / 2)
-
-                pic_draw.line([tl, tr, n, br, bl, tl], fill=self.BLACK, width=2)
-                
-                mast_pos:tuple[int, int] = (tl[0] + self.visible_ship["stern"] * scale_factor, tl[1] + self.visible_ship["port"] * scale_factor)
-                mast_size:int = 10
-                pic_draw.ellipse([
-                    mast_pos[0] - mast_size / 2,
-                    mast_pos[1] - mast_size / 2,
-                    mast_pos[0] + mast_size / 2,
-                    mast_pos[1] + mast_size / 2
-                ], self.BLACK)
-
-                size_spacing:int = 5
-
-                pic_draw.line([
-                    (bl[0], bl[1] + size_spacing),
-                    (bl[0], bl[1] + size_spacing * 2),
-                    (inner_padding + img_centre[0], bl[1] + size_spacing * 2),
-                    (inner_padding + img_centre[0], bl[1] + size_spacing * 3),
-                    (inner_padding + img_centre[0], bl[1] + size_spacing * 2),
-                    (n[0], bl[1] + size_spacing * 2),
-                    (n[0], bl[1] + size_spacing),
-                ], fill=self.BLACK, width=2)
-
-                text_size = self._get_text_size(self.hanken_bold_14, str(ship_len))
-                pic_draw.text((inner_padding + img_centre[0] - (text_size[0] / 2), bl[1] + size_spacing * 4), str(ship_len), self.BLACK, font=self.hanken_bold_14)
-
-                pic_draw.line([
-                    (tl[0] - size_spacing, tl[1]),
-                    (tl[0] - size_spacing * 2, tl[1]),
-                    (tl[0] - size_spacing * 2, n[1]),
-                    (tl[0] - size_spacing * 3, n[1]),
-                    (tl[0] - size_spacing * 2, n[1]),
-                    (tl[0] - size_spacing * 2, bl[1]),
-                    (tl[0] - size_spacing, bl[1]),
-                ], fill=self.BLACK, width=2)
-
-                text_size = self._get_text_size(self.hanken_bold_14, str(ship_wid))
-                pic_draw.text((tl[0] - text_size[0] - size_spacing * 4, n[1] - text_size[1] / 2),str(ship_wid), self.BLACK, font=self.hanken_bold_14)
-
-                if self._dark_mode:
-                    pic = ImageOps.invert(pic)
-
-            text_y += 298
-
-            # Draw the ship name
-            text = self.visible_ship["name"]
-            tx_w, tx_h = self._get_text_size(self.hanken_bold_35,text)
-            draw.text((int(self.width / 2 - tx_w / 2), text_y), text, self.BLUE, font=self.hanken_bold_35)
-
-            text_y += tx_h + 2
-
-            draw.line([
-                (int(self.width / 2 - tx_w / 2), text_y),
-                (int(self.width / 2 + tx_w / 2),text_y)
-            ], fill=self.BLUE, width=2)
-
-            text_y += 45
-
-            lines = [{
-                "icon": self.icons["mmsi"],
-                "name": "MMSI",
-                "value": str(self.visible_ship["mmsi"])
-            },{
-                "icon": self.icons["callsign"],
-                "name": "Callsign",
-                "value": str(self.visible_ship["callsign"])
-            },{
-                "icon": self.icons["shiptype"],
-                "name": "Vessel Type",
-                "value": self._get_vessel_type(self.visible_ship["type"])
-            }]
-
-            if "destination" in self.visible_ship:
-                lines.append({
-                    "icon": self.icons["dest"],
-                    "name": "Destination",
-                    "value": self.visible_ship["destination"]
-                })
-
-            if "speed" in self.visible_ship:
-                lines.append({
-                    "icon": self.icons["speed"],
-                    "name": "Speed",
-                    "value": str(self.visible_ship["speed"])+"kts"
-                })
-
-            # Loop Start
-            for item in lines:
-                text_x = screen_padding + container_padding_horz
-
-                # Draw Icon
-                img.paste(item["icon"], (text_x, text_y))
-
-                text_x += 30
-
-                # Draw Text
-                text = item["value"]
-                tx_w, tx_h = self._get_text_size(self.hanken_bold_20, text)
-                draw.text((text_x, text_y), item["name"], self.BLUE, font=self.hanken_bold_20)
-                draw.text((self.width - screen_padding - container_padding_horz - tx_w, text_y), text, self.BLUE, font=self.hanken_bold_20)
-
-                text_x = screen_padding + container_padding_horz
-                text_y += 30
-                
-                draw.line([(text_x, text_y), (self.width - text_x, text_y)], fill=self.BLUE, width=2)
-
-                text_y += 35
+        # Draw the content container
+        draw.rounded_rectangle([
+            (screen_padding, screen_padding),
+            (self.width - screen_padding, self.height - screen_padding)
+        ], radius=8, fill=self.WHITE)
 
-            if self._dark_mode:
-                img = ImageOps.invert(img)
+        text_y += 10
+
+        # Draw the boat icon
+        img.paste(self.icons["ship"], (text_x, text_y))
+        text_x += self._LARGE_ICON_SIZE
 
-            img.paste(pic, (screen_padding + container_padding_horz + img_padding, image_y + img_padding))
+        # Draw the title
+        draw.text((text_x, text_y), "Ship Tracker", self.BLUE, font=self.hanken_bold_20)
 
-            img = img.convert("RGB")
+        return img
 
-            self.renderer.render(img, force)
+    def _render_screen(self, force:bool = False):
+        try:
+            with self.lock:
+                if not self.active or self.visible_ship is None:
+                    return
+
+                self.logger.info(f"Draw Ship {self.visible_ship}")
+
+                img:Image.Image|None = self.__draw_ship(self.visible_ship, datetime.datetime.now())
+                if img is not None:
+                    self.renderer.render(img, force)
         except Exception as e:
-            self.logger.exception("Failure in ShipZoneScreen render_screen")
\ No newline at end of file
+            self.logger.exception("Failure in ShipZoneScreen render_screen")
+
+    def __draw_ship(self, ship:VesselSnapshot, now:datetime.datetime) -> Image.Image|None:
+        card:Image.Image|None = self.__card(ship)
+        if card is None:
+            return None
+
+        img:Image.Image = card.copy()
+        draw:Image.ImageDraw = ImageDraw.Draw(img)
+
+        screen_padding:int = 10
+        container_padding_horz:int = 30
+        container_padding_vert:int = 10
+        text_x:int = screen_padding + container_padding_horz + self._LARGE_ICON_SIZE
+        text_y:int = screen_padding + container_padding_vert + 10 + 24
+
+        # The time and speed change all the time, so they aren't on the
+        # cached card and are drawn on each copy
+        draw.text((text_x, text_y), now.strftime("%A - %d/%m/%y %H:%M"), self._colour(self.BLUE), font=self.hanken_bold_14)
+
+        if ship.speed is not None:
+            rows_y:int = self.__rows_top(ship) + len(self.__card_rows(ship)) * self._ROW_HEIGHT
+            self.__draw_rows(img, draw, [{
+                "icon": "speed",
+                "name": "Speed",
+                "value": str(ship.speed)+"kts"
+            }], rows_y)
+
+        return img
+
+    def __card(self, ship:VesselSnapshot) -> Image.Image|None:
+        key:tuple = self.__card_key(ship)
+        card:Image.Image|None = self.cards.get(key)
+        if card is None:
+            card = self.__render_card(key, ship)
+            if card is not None:
+                self.cards.put(key, card)
+
+        return card
+
+    def __card_key(self, ship:VesselSnapshot) -> tuple:
+        return (ship.mmsi, ship.static_version, self._dark_mode, ship.destination, self.__photo_mtime(ship.mmsi))
+
+    def __photo_mtime(self, mmsi:str) -> int|None:
+        now:float = time.monotonic()
+        checked:tuple[float,int|None]|None = self.photo_mtimes.get(mmsi)
+        if checked is not None and now - checked[0] < self.PHOTO_RECHECK:
+            return checked[1]
+
+        try:
+            mtime:int|None = os.stat(os.path.join(self.img_dir, mmsi)).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        self.photo_mtimes[mmsi] = (now, mtime)
+        self.photo_mtimes.move_to_end(mmsi)
+        while len(self.photo_mtimes) > self.max_photo_mtimes:
+            self.photo_mtimes.popitem(last=False)
+
+        return mtime
+
+    def __prefetch(self, ship:VesselSnapshot):
+        key:tuple = self.__card_key(ship)
+
+        # Without a photo or dimensions there's no card to draw
+        if key[4] is None and (ship.bow + ship.stern == 0 or ship.port + ship.starboard == 0):
+            return
+
+        self.cards.prefetch(ship.mmsi, key, ship)
+
+    def __render_card(self, key:tuple, ship:VesselSnapshot) -> Image.Image|None:
+        with self.draw_lock:
+            if key[2] != self._dark_mode:
+                return None
+
+            card:Image.Image|None = self.__draw_card(ship)
+
+        # The mode changed while drawing, so the colours may be mixed
+        if key[2] != self._dark_mode:
+            return None
+
+        return card
+
+    def __draw_card(self, ship:VesselSnapshot) -> Image.Image|None:
+        img:Image.Image = self._get_chrome()
+        draw:Image.ImageDraw = ImageDraw.Draw(img)
+        blue:str = self._colour(self.BLUE)
+
+        screen_padding:int = 10
+        container_padding_horz:int = 30
+        container_padding_vert:int = 10
+        text_x:int = screen_padding + container_padding_horz + self._LARGE_ICON_SIZE
+        text_y:int = screen_padding + container_padding_vert + 10 + 24
+
+        text_y += 35
+        image_y = text_y
+
+        # Draw the picture
+        max_width, max_height = self.photo_size(self.width)
+        img_padding:int = 0
+        pic:Image.Image|None = self.thumbnails.get(os.path.join(self.img_dir, ship.mmsi), max_width, max_height)
+        if pic is None:
+            ship_len:int = (ship.stern + ship.bow)
+            ship_wid:int = (ship.port + ship.starboard)
+
+            if ship_len == 0 or ship_wid == 0:
+                return None
+
+            tl:int = (screen_padding + container_padding_horz, text_y)
+            tr:int = (tl[0] + max_width, text_y)
+            bl:int = (tl[0], text_y + max_height)
+            br:int = (tr[0], bl[1])
+
+            draw.line([tl, tr, br, bl, tl], fill=blue, width=2)
+
+            img_padding:int = 5
+            max_width -= img_padding * 2
+            max_height -= img_padding * 2
+
+            pic:Image.Image = Image.new("RGB", (max_width, max_height), color=self.WHITE)
+            pic_draw:Image.ImageDraw = ImageDraw.Draw(pic)
+
+            text_size = self._get_text_size(self.hanken_bold_14, str(ship_wid))
+            left_reserve:int = 5 + text_size[1]
+
+            inner_padding:int = 30
+            max_width -= (inner_padding * 2) + left_reserve
+            max_height -= inner_padding * 2
+
+            width_ratio = max_width / ship_len
+            height_ratio = max_height / ship_wid
+
+            scale_factor:float = min(width_ratio, height_ratio)
+
+            ship_len:int = int(ship_len * scale_factor)
+            ship_wid:int = int(ship_wid * scale_factor)
+
+            img_centre:int = ((max_width / 2) + left_reserve, max_height / 2)
+
+            wh_ratio:float = 0.6 * (ship_wid / ship_len)
+            nose_len:int = ship_len * wh_ratio
+
+            tl = (inner_padding + img_centre[0] - ship_len / 2, inner_padding + img_centre[1] - ship_wid / 2)
+            tr = (inner_padding + img_centre[0] + ship_len / 2 - nose_len, inner_padding + img_centre[1] - ship_wid / 2)
+            n = (inner_padding + img_centre[0] + ship_len / 2, inner_padding + img_centre[1])
+            bl = (inner_padding + img_centre[0] - ship_len / 2, inner_padding + img_centre[1] + ship_wid / 2)
+            br = (inner_padding + img_centre[0] + ship_len / 2 - nose_len, inner_padding + img_centre[1] + ship_wid / 2)
+
+            pic_draw.line([tl, tr, n, br, bl, tl], fill=self.BLACK, width=2)
+            
+            mast_pos:tuple[int, int] = (tl[0] + ship.stern * scale_factor, tl[1] + ship.port * scale_factor)
+            mast_size:int = 10
+            pic_draw.ellipse([
+                mast_pos[0] - mast_size / 2,
+                mast_pos[1] - mast_size / 2,
+                mast_pos[0] + mast_size / 2,
+                mast_pos[1] + mast_size / 2
+            ], self.BLACK)
+
+            size_spacing:int = 5
+
+            pic_draw.line([
+                (bl[0], bl[1] + size_spacing),
+                (bl[0], bl[1] + size_spacing * 2),
+                (inner_padding + img_centre[0], bl[1] + size_spacing * 2),
+                (inner_padding + img_centre[0], bl[1] + size_spacing * 3),
+                (inner_padding + img_centre[0], bl[1] + size_spacing * 2),
+                (n[0], bl[1] + size_spacing * 2),
+                (n[0], bl[1] + size_spacing),
+            ], fill=self.BLACK, width=2)
+
+            text_size = self._get_text_size(self.hanken_bold_14, str(ship_len))
+            pic_draw.text((inner_padding + img_centre[0] - (text_size[0] / 2), bl[1] + size_spacing * 4), str(ship_len), self.BLACK, font=self.hanken_bold_14)
+
+            pic_draw.line([
+                (tl[0] - size_spacing, tl[1]),
+                (tl[0] - size_spacing * 2, tl[1]),
+                (tl[0] - size_spacing * 2, n[1]),
+                (tl[0] - size_spacing * 3, n[1]),
+                (tl[0] - size_spacing * 2, n[1]),
+                (tl[0] - size_spacing * 2, bl[1]),
+                (tl[0] - size_spacing, bl[1]),
+            ], fill=self.BLACK, width=2)
+
+            text_size = self._get_text_size(self.hanken_bold_14, str(ship_wid))
+            pic_draw.text((tl[0] - text_size[0] - size_spacing * 4, n[1] - text_size[1] / 2),str(ship_wid), self.BLACK, font=self.hanken_bold_14)
+
+            if self._dark_mode:
+                pic = ImageOps.invert(pic)
+
+        text_y += 298
+
+        # Draw the ship name
+        text = ship.name
+        tx_w, tx_h = self._get_text_size(self.hanken_bold_35,text)
+        draw.text((int(self.width / 2 - tx_w / 2), text_y), text, blue, font=self.hanken_bold_35)
+
+        text_y += tx_h + 2
+
+        draw.line([
+            (int(self.width / 2 - tx_w / 2), text_y),
+            (int(self.width / 2 + tx_w / 2),text_y)
+        ], fill=blue, width=2)
+
+        self.__draw_rows(img, draw, self.__card_rows(ship), self.__rows_top(ship))
+
+        img.paste(pic, (screen_padding + container_padding_horz + img_padding, image_y + img_padding))
+
+        return img.convert("RGB")
+
+    def __rows_top(self, ship:VesselSnapshot) -> int:
+        # Where the first row of details goes, below the name
+        _, tx_h = self._get_text_size(self.hanken_bold_35, ship.name)
+        return 10 + 10 + 10 + 24 + 35 + 298 + tx_h + 2 + 45
+
+    def __card_rows(self, ship:VesselSnapshot) -> list[dict[str,str]]:
+        lines = [{
+            "icon": "mmsi",
+            "name": "MMSI",
+            "value": str(ship.mmsi)
+        },{
+            "icon": "callsign",
+            "name": "Callsign",
+            "value": str(ship.callsign)
+        },{
+            "icon": "shiptype",
+            "name": "Vessel Type",
+            "value": self._get_vessel_type(ship.type)
+        }]
+
+        if ship.destination is not None:
+            lines.append({
+                "icon": "dest",
+                "name": "Destination",
+                "value": ship.destination
+            })
+
+        return lines
+
+    def __draw_rows(self, img:Image.Image, draw:ImageDraw.ImageDraw, lines:list[dict[str,str]], text_y:int) -> int:
+        blue:str = self._colour(self.BLUE)
+        screen_padding:int = 10
+        container_padding_horz:int = 30
+
+        # Loop Start
+        for item in lines:
+            text_x = screen_padding + container_padding_horz
+
+            # Draw Icon
+            img.paste(self._icon(item["icon"]), (text_x, text_y))
+
+            text_x += 30
+
+            # Draw Text
+            text = item["value"]
+            tx_w, tx_h = self._get_text_size(self.hanken_bold_20, text)
+            draw.text((text_x, text_y), item["name"], blue, font=self.hanken_bold_20)
+            draw.text((self.width - screen_padding - container_padding_horz - tx_w, text_y), text, blue, font=self.hanken_bold_20)
+
+            text_x = screen_padding + container_padding_horz
+            text_y += 30
+            
+            draw.line([(text_x, text_y), (self.width - text_x, text_y)], fill=blue, width=2)
+
+            text_y += 35
+
+        return text_y
\ No newline at end of file
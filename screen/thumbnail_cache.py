@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Pre-resized copies of vessel photos, kept on disk and in memory.
+
+Build the cache for a whole photo directory ahead of time, from the
+repository root:
+    python -m screen.thumbnail_cache img --display 800x480
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+import metrics
+
+# PNG can hold all of these, so derivatives load back pixel for pixel
+_SAVE_MODES:tuple[str,...] = ("1", "L", "LA", "P", "RGB", "RGBA")
+
+
+def resize_to_fit(pic:Image.Image, max_width:int, max_height:int) -> Image.Image:
+    """Scale pic to fit inside max_width x max_height, keeping its shape."""
+    original_width, original_height = pic.size
+
+    width_ratio: float = max_width / original_width
+    height_ratio: float = max_height / original_height
+
+    scale_factor: float = min(width_ratio, height_ratio)
+
+    new_width: int = int(original_width * scale_factor)
+    new_height: int = int(original_height * scale_factor)
+
+    return pic.resize((new_width, new_height), Image.LANCZOS)
+
+
+class ThumbnailCache:
+    """Display-ready derivatives of full size photos.
+
+    Each derivative is saved in cache_dir under a name derived from the
+    source path, its mtime and the target size, so replacing a photo or
+    changing the display size never serves an old one. The last
+    memory_entries derivatives used are also kept decoded in memory.
+
+    Which file is on disk for each photo and size is read from cache_dir
+    once, on first use, and kept up to date as files are saved, so saving
+    a derivative removes the old one without listing the directory."""
+
+    def __init__(self, cache_dir:str, memory_entries:int = 8):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        self.cache_dir:str = cache_dir
+        self.memory_entries:int = memory_entries
+
+        # Screens draw from more than one thread
+        self.lock:threading.Lock = threading.Lock()
+        self.memory:OrderedDict[tuple[str,int,int,int],Image.Image] = OrderedDict()
+        # "photo-WxH" -> file name in cache_dir, or None until first read
+        self.index:dict[str,str]|None = None
+
+        self.memory_hits:metrics.Counter = metrics.counter("ais_thumbnail_cache_total", "Photo thumbnail lookups", result="memory")
+        self.disk_hits:metrics.Counter = metrics.counter("ais_thumbnail_cache_total", "Photo thumbnail lookups", result="disk")
+        self.built:metrics.Counter = metrics.counter("ais_thumbnail_cache_total", "Photo thumbnail lookups", result="built")
+
+    def get(self, path:str, width:int, height:int) -> Image.Image|None:
+        """The photo at path resized to fit width x height, or None if there
+        is no photo. Callers must not draw on the returned image."""
+        try:
+            mtime:int = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        key:tuple[str,int,int,int] = (path, mtime, width, height)
+        with self.lock:
+            pic:Image.Image|None = self.memory.get(key)
+            if pic is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits.inc()
+                return pic
+
+        pic = self.__load(key)
+        if pic is None:
+            return None
+
+        with self.lock:
+            self.memory[key] = pic
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+        return pic
+
+    def build(self, path:str, width:int, height:int) -> bool:
+        """Make sure the derivative is on disk, returning True if it had to
+        be made. Nothing is kept in memory."""
+        try:
+            key:tuple[str,int,int,int] = (path, os.stat(path).st_mtime_ns, width, height)
+        except OSError:
+            return False
+
+        if self.__indexed(key) == os.path.basename(self.__cache_path(key)):
+            return False
+
+        return self.__build(key) is not None
+
+    def warm(self, img_dir:str, width:int, height:int):
+        """Build any missing derivatives for every vessel photo in img_dir.
+
+        Photos are named by MMSI, so anything else there, like the map
+        screen's basemaps, is left alone."""
+        start:float = time.monotonic()
+        built:int = 0
+
+        try:
+            entries:list[os.DirEntry] = [entry for entry in os.scandir(img_dir) if entry.name.isdigit() and entry.is_file()]
+        except OSError as ex:
+            self.logger.warning(f"Can't read photo directory {img_dir}: {ex}")
+            return
+
+        for entry in entries:
+            try:
+                if self.build(entry.path, width, height):
+                    built += 1
+            except Exception as ex:
+                self.logger.warning(f"Can't make a thumbnail of {entry.path}: {ex}")
+
+        if built:
+            self.logger.info(f"Built {built} of {len(entries)} photo thumbnails in {time.monotonic() - start:.1f}s")
+
+    def __cache_path(self, key:tuple[str,int,int,int]) -> str:
+        path, mtime, width, height = key
+        digest:str = hashlib.blake2b(f"{os.path.abspath(path)}\0{mtime}".encode(), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, f"{self.__index_key(key)}-{digest}.png")
+
+    def __index_key(self, key:tuple[str,int,int,int]) -> str:
+        path, _, width, height = key
+        return f"{os.path.basename(path)}-{width}x{height}"
+
+    def __indexed(self, key:tuple[str,int,int,int]) -> str|None:
+        """The file in cache_dir holding any copy of key's photo at key's
+        size, reading the directory the first time it's asked."""
+        with self.lock:
+            if self.index is None:
+                self.index = {}
+                try:
+                    entries:list[os.DirEntry] = list(os.scandir(self.cache_dir))
+                except FileNotFoundError:
+                    entries = []
+
+                # Oldest first, so if a crash between saving and cleaning up
+                # left two copies, the newer one is kept
+                entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+                for entry in entries:
+                    # Names are "photo-WxH-digest.png"
+                    index_key, _, digest = entry.name.rpartition("-")
+                    if index_key and digest.endswith(".png"):
+                        stale:str|None = self.index.get(index_key)
+                        if stale is not None:
+                            self.__remove(stale)
+                        self.index[index_key] = entry.name
+
+            return self.index.get(self.__index_key(key))
+
+    def __remove(self, name:str):
+        try:
+            os.unlink(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def __load(self, key:tuple[str,int,int,int]) -> Image.Image|None:
+        cache_path:str = self.__cache_path(key)
+        try:
+            with Image.open(cache_path) as cached:
+                cached.load()
+                self.disk_hits.inc()
+                return cached
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            self.logger.warning(f"Rebuilding unreadable thumbnail {cache_path}: {ex}")
+
+        return self.__build(key)
+
+    def __build(self, key:tuple[str,int,int,int]) -> Image.Image|None:
+        path, _, width, height = key
+        try:
+            with Image.open(path) as original:
+                pic:Image.Image = resize_to_fit(original, width, height)
+        except OSError as ex:
+            self.logger.warning(f"Can't open photo {path}: {ex}")
+            return None
+
+        if pic.mode not in _SAVE_MODES:
+            pic = pic.convert("RGB")
+
+        self.built.inc()
+
+        try:
+            self.__save(key, pic)
+        except OSError as ex:
+            # Still usable, it just won't be there next time
+            self.logger.warning(f"Can't save thumbnail of {path}: {ex}")
+
+        return pic
+
+    def __save(self, key:tuple[str,int,int,int], pic:Image.Image):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path:str = self.__cache_path(key)
+
+        # Written under a temporary name and renamed, so a reader never sees
+        # half a file, then the one made from an older copy of the photo is
+        # removed
+        stale:str|None = self.__indexed(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pic.save(file, "PNG")
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        name:str = os.path.basename(cache_path)
+        with self.lock:
+            self.index[self.__index_key(key)] = name
+            if stale is not None and stale != name:
+                self.__remove(stale)
+
+
+def main():
+    from screen.ship_zone_screen import ShipZoneScreen
+
+    parser:argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("img_dir")
+    parser.add_argument("--cache-dir", help="defaults to .thumbs inside img_dir")
+    parser.add_argument("--display", default="800x480", help="display size as WIDTHxHEIGHT")
+    args:argparse.Namespace = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # Screens are drawn in portrait, so their width is the display's height
+    _, display_height = (int(value) for value in args.display.lower().split("x"))
+    width, height = ShipZoneScreen.photo_size(display_height)
+
+    cache:ThumbnailCache = ThumbnailCache(args.cache_dir or os.path.join(args.img_dir, ".thumbs"))
+    cache.warm(args.img_dir, width, height)
+    print(f"Thumbnails for {args.img_dir} at {width}x{height} are in {cache.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import logging
-    
+
+import metrics
+
+
 class ScreenManager:
     def __init__(self, screens:list[any], command_queue):
         assert len(screens) != 0, "At least one screen must be passed to Screen Manager"
@@ -14,22 +17,47 @@ class ScreenManager:
         self.screens[self.active_screen].set_active(True)
         self.dark_mode:int = False
 
+        self.commands:dict[str,metrics.Counter] = {}
+
     def begin_processing(self):
         while True:
             msg:tuple[str,...] = self.command_queue.get()
             if msg is None:
                 continue
 
-            # Screen Manager can handle "screen" and "mode" commands.
-            # Anything else we assume is something for the screens to handle.
+            self.__handle_command(msg)
 
-            if msg[0] == "screen":
-                self.__activate_screen(msg[1])
-            elif msg[0] == "mode":
-                self.__set_mode(not self.dark_mode)
-            else:
-                for screen in self.screens:
-                    screen.update(msg)
+    async def begin_processing_async(self):
+        while True:
+            msg:tuple[str,...] = await self.command_queue.get()
+            if msg is None:
+                continue
+
+            self.__handle_command(msg)
+
+    def __handle_command(self, msg:tuple[str,...]):
+        # Screen Manager can handle "screen", "mode" and "refresh" commands.
+        # Anything else we assume is something for the screens to handle.
+        self.__count_command(msg[0])
+
+        if msg[0] == "screen":
+            self.__activate_screen(msg[1])
+        elif msg[0] == "mode":
+            self.__set_mode(not self.dark_mode)
+        elif msg[0] == "refresh":
+            self.__refresh()
+        else:
+            for screen in self.screens:
+                screen.update(msg)
+
+            if msg[0] == "update":
+                self.screens[self.active_screen].renderer.note_received(msg[1].received)
+
+    def __count_command(self, command:str):
+        counter:metrics.Counter|None = self.commands.get(command)
+        if counter is None:
+            counter = self.commands[command] = metrics.counter("ais_screen_commands_total", "Commands handled by the screen manager", command=command)
+        counter.inc()
 
     def __activate_screen(self, index:int):
         if index < len(self.screens) and index >= 0 and index != self.active_screen:
@@ -37,6 +65,13 @@ class ScreenManager:
             self.active_screen = index
             self.screens[self.active_screen].set_active(True)
 
+    def __refresh(self):
+        # Redraw the active screen in full even if nothing has changed,
+        # which clears any ghosting left on an e-ink panel
+        screen:any = self.screens[self.active_screen]
+        screen.renderer.invalidate()
+        screen.set_active(True)
+
     def __set_mode(self, dark_mode:bool):
         if self.dark_mode == dark_mode:
             return
@@ -1,70 +1,127 @@
-import json
+import asyncio
 import logging
-import math
-import sqlite3
 import time
+from collections import OrderedDict
+from queue import Empty
+
+import metrics
+from message.ais_record import AISRecord
+from track_history import TrackHistory
+from vessel_database import VesselDatabase, WriteBehindVesselDatabase
+from vessel_state import VesselSnapshot, VesselState
+from zone_index import ZoneIndex
 
 
 class ShipTracker:
-    def __init__(self, track_limit:int, db_path:str, message_queue:any, vessel_queue:any):
+    # Vessels slower than this, in knots, are treated as stopped, as GPS
+    # jitter gives moored vessels a small speed in a random direction
+    MIN_PREDICT_SPEED:float = 0.5
+
+    # A new approaching event only goes out for the same zone if the
+    # expected arrival moves by more than this many seconds
+    ARRIVAL_TOLERANCE:float = 30
+
+    def __init__(self, track_limit:int, db_path:str, message_queue:any, vessel_queue:any, write_behind:bool = False, flush_interval:float = 5.0, batch_size:int = 200, history:TrackHistory|None = None, predict_horizon:float = 600, nearby_margin:float = 2):
         self.logger = logging.getLogger(__name__)
 
-        self.vessels = {}
+        # Ordered least to most recently seen so the oldest vessel
+        # can be evicted without re-sorting the whole table
+        self.vessels:OrderedDict[int,VesselState] = OrderedDict()
         self.max_tracked = track_limit
 
-        self.zones = []
+        self.zones:ZoneIndex = ZoneIndex()
+        self.history:TrackHistory|None = history
+        self.predict_horizon:float = predict_horizon
+        # km from a zone's edge within which vessels count as nearby
+        self.nearby_margin:float = nearby_margin
 
         self.message_queue = message_queue
         self.vessel_queue = vessel_queue
 
-        self.__init_database(db_path)
+        self.records_in:metrics.Counter = metrics.counter("ais_tracker_records_total", "Decoded messages taken by the tracker")
+        self.updates_out:metrics.Counter = metrics.counter("ais_tracker_updates_total", "Vessel updates sent to the screens")
+        self.approaching_out:metrics.Counter = metrics.counter("ais_tracker_approaching_total", "Approaching events sent to the screens")
+        self.nearby_out:metrics.Counter = metrics.counter("ais_tracker_nearby_total", "Nearby events sent to the screens")
+        self.receive_latency:metrics.Histogram = metrics.histogram("ais_receive_to_tracker_seconds", "Time from a line being received to the tracker handling it")
+        metrics.gauge("ais_tracked_vessels", "Vessels held by the tracker", lambda: len(self.vessels))
+
+        if write_behind:
+            self.db:VesselDatabase = WriteBehindVesselDatabase(db_path, flush_interval, batch_size)
+        else:
+            self.db:VesselDatabase = VesselDatabase(db_path)
 
     def __del__(self):
-        self.db_conn.close()
-
-    def __init_database(self, db_path:str):
-        self.db_conn = sqlite3.connect(db_path)
-        self.db_conn.row_factory = sqlite3.Row
-        self.db_cur = self.db_conn.cursor()
-
-        self.db_cur.execute("""
-            CREATE TABLE IF NOT EXISTS vessels (
-                mmsi TEXT PRIMARY KEY,
-                imo TEXT,
-                name TEXT,
-                callsign TEXT,
-                type INTEGER,
-                bow INTEGER,
-                stern INTEGER,
-                port INTEGER,
-                starboard INTEGER,
-                first_sight INTEGER,
-                last_sight INTEGER
-            );""")
-    
+        self.close()
+
+    def close(self):
+        self.__flush_positions(True)
+        self.db.close()
+
+    def __flush_positions(self, force:bool = False):
+        if self.history is None or not self.history.persist:
+            return
+
+        if force or self.history.pending_due():
+            self.db.record_positions(self.history.take_pending())
+
     def begin_processing(self):
         while True:
-            msg = self.message_queue.get()
+            try:
+                # Wake up periodically so queued database writes still
+                # go out when the feed goes quiet
+                msg = self.message_queue.get(timeout=self.db.flush_interval)
+            except Empty:
+                msg = None
+
+            self.db.flush_if_due()
+            self.__flush_positions()
 
             if msg is None:
                 continue
 
+            self.update_vessel(msg)
+
+    async def begin_processing_async(self, executor:any = None, batch_size:int = 50):
+        """Consume an AsyncQueue, with database work in executor.
+
+        Messages already waiting are handed to the executor together so
+        a burst doesn't pay for a thread hop per message."""
+        loop:asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+        while True:
             try:
-                data = json.loads(msg)
-            except json.JSONDecodeError as e:
-                self.logger.exception("Error decoding JSON", exc_info=e)
+                msg = await asyncio.wait_for(self.message_queue.get(), timeout=self.db.flush_interval)
+                batch:list[AISRecord] = [msg] + self.message_queue.drain(batch_size - 1)
+            except TimeoutError:
+                batch = []
+
+            await loop.run_in_executor(executor, self.__process_batch, batch)
+
+    def __process_batch(self, batch:list[AISRecord]):
+        self.db.flush_if_due()
+        self.__flush_positions()
+
+        for msg in batch:
+            if msg is None:
                 continue
 
-            self.update_vessel(data)
+            try:
+                self.update_vessel(msg)
+            except Exception as ex:
+                self.logger.exception("Failed to update vessel", exc_info=ex)
+
+    def update_vessel(self, record:AISRecord):
+        message:dict[str,any] = record.fields
+        msg_type = record.msg_type
+        mmsi = record.mmsi
 
-    def update_vessel(self, message:dict[str,any]):
-        msg_type = message["msg_type"]
-        mmsi = message["mmsi"]
+        self.records_in.inc()
+        self.receive_latency.observe(time.time() - record.received)
 
         # Ship MMSI should be 9 or more digits. Under 9 means it's
         # probably a base station, navigation aid etc
         if len(str(mmsi)) < 9:
-            self.logger.info(f"MMSI {str(mmsi)} is not a ship. Skip update.")
+            self.logger.info("MMSI %s is not a ship. Skip update.", mmsi, extra={"rate_key": "not_ship"})
             return
         
         # If the first 3 values of MMSI are 111 this is a SAR aircraft
@@ -75,103 +132,117 @@ class ShipTracker:
         has_static_data = msg_type == 5# or msg_type == 24
 
         # Make sure the database has a record of this ship.
-        ship = self.__record_ship(message, has_static_data)
+        row:dict[str,any]|None = self.db.record_ship(message, has_static_data)
+
+        state:VesselState|None = self.vessels.get(mmsi)
+        if state is None:
+            state = VesselState(str(mmsi))
+            has_static_data = True
 
-        # Filter out known static data keys to leave only dynamic data
-        keyFilter = ["mmsi", "msg_type", "sentences", "callsign", "shipname",
-                     "ship_type", "to_bow", "to_stern", "to_port", "to_starboard"]
-        dynamic_data = {k: v for k, v in message.items() if k not in keyFilter}
+        if row is not None:
+            if has_static_data:
+                state.apply_static(row)
+            else:
+                state.last_sight = row.get("last_sight")
 
-        ship_prev = self.vessels.get(mmsi, {})
-        zone_prev = ship_prev.get("zone", None)
+        state.apply_dynamic(message)
+        zone_prev:str|None = state.zone
 
-        lat = dynamic_data.get("lat")
-        lon = dynamic_data.get("lon")
+        lat = message.get("lat")
+        lon = message.get("lon")
         if lat is not None and lon is not None:
-            ship["zone"] = self.check_zones(lat, lon)
-        
-        self.vessels[mmsi] = {**ship_prev, **ship, **dynamic_data, **{"ts": int(time.time())}}
+            state.zone = self.check_zones(lat, lon)
 
-        # Trim the tracked vessel list down if it's over the max size
-        self.vessels = dict(sorted(self.vessels.items(), key=lambda item: item[1]['ts'], reverse=True)[:self.max_tracked])
+            if self.history is not None:
+                self.history.add(state.mmsi, record.received, lat, lon, message.get("speed"), message.get("course"))
+
+        # received is kept so the screens can time how long it takes
+        # for the update to reach the display
+        state.ts = int(time.time())
+        state.received = record.received
+        state.version += 1
+        self.__track_vessel(mmsi, state)
+
+        # The screens get a snapshot, so the state can keep changing
+        # underneath them while they're still drawing
+        ship:VesselSnapshot = state.snapshot()
 
-        ship = self.vessels[mmsi]
         if self.vessel_queue is not None:
-            if ship.get("zone", None) != zone_prev:
+            if ship.zone != zone_prev:
                 self.vessel_queue.put(("zone",ship,zone_prev))
 
-        self.logger.info(f"SHIP: {ship.get('name','Unknown')} {mmsi}, Zone: {ship.get('zone', 'None')}")
+            self.__predict_zone(state, ship)
+            self.__check_nearby(state, ship)
+
+        self.logger.info("SHIP: %s %s, Zone: %s", ship.name or "Unknown", mmsi, ship.zone, extra={"rate_key": "ship"})
         self.vessel_queue.put(("update",ship))
+        self.updates_out.inc()
+
+    def __predict_zone(self, state:VesselState, ship:VesselSnapshot):
+        # ("approaching", ship, zone, eta) goes out when the vessel is due in
+        # a zone within predict_horizon seconds of ship.received, and again
+        # with zone and eta None if it turns away or stops before arriving
+        prediction:tuple[str,float]|None = None
+
+        if (ship.zone is None and self.predict_horizon > 0 and len(self.zones) > 0
+                and ship.lat is not None and ship.lon is not None
+                # 102.3 knots and 360 degrees mean not available
+                and ship.speed is not None and self.MIN_PREDICT_SPEED <= ship.speed < 102.3
+                and ship.course is not None and ship.course < 360):
+            prediction = self.zones.predict(ship.lat, ship.lon, ship.speed, ship.course, self.predict_horizon)
+
+        if prediction is None:
+            if state.approaching is not None:
+                state.approaching = None
+                if ship.zone is None:
+                    self.vessel_queue.put(("approaching",ship,None,None))
+            return
+
+        zone, eta = prediction
+        arrival:float = ship.received + eta
+        if zone == state.approaching and abs(arrival - state.arrival) <= self.ARRIVAL_TOLERANCE:
+            return
 
-    def add_zone(self, zone_data:list[dict[str,any]]):
-        self.zones.append(zone_data)
+        state.approaching = zone
+        state.arrival = arrival
+
+        self.logger.info("%s expected in %s in %.0fs", ship.name or ship.mmsi, zone, eta, extra={"rate_key": "approaching"})
+        self.vessel_queue.put(("approaching",ship,zone,eta))
+        self.approaching_out.inc()
+
+    def __check_nearby(self, state:VesselState, ship:VesselSnapshot):
+        # ("nearby", ship) goes out when a vessel comes near a zone, and again
+        # if its details change while it's there, so the screens can get its
+        # card ready in case it arrives without a usable prediction
+        near:bool = (ship.zone is None and self.nearby_margin > 0 and len(self.zones) > 0
+                     and ship.lat is not None and ship.lon is not None
+                     and self.zones.near(ship.lat, ship.lon, self.nearby_margin))
+        if not near:
+            state.nearby = None
+            return
+
+        details:tuple[int,str|None] = (ship.static_version, ship.destination)
+        if state.nearby == details:
+            return
+
+        state.nearby = details
+        self.vessel_queue.put(("nearby",ship))
+        self.nearby_out.inc()
+
+    def __track_vessel(self, mmsi:int, state:VesselState):
+        self.vessels[mmsi] = state
+        self.vessels.move_to_end(mmsi)
+
+        # Trim the tracked vessel list down if it's over the max size
+        while len(self.vessels) > self.max_tracked:
+            self.vessels.popitem(last=False)
+
+    def add_zone(self, zone_data:tuple[str,float,float,float]):
+        self.zones.add(*zone_data)
 
     def check_zones(self, ship_lat:float, ship_lon:float):
         if len(self.zones) == 0:
-            self.logger.info("Zone check request but no zones present")
+            self.logger.debug("Zone check request but no zones present")
             return None
-        
-        for zone in self.zones:
-            name, zone_lat, zone_lon, radius = zone
-
-            zone_lat, zone_lon, ship_lat, ship_lon = map(math.radians, [zone_lat, zone_lon, ship_lat, ship_lon])
-            a:float = math.sin((ship_lat - zone_lat) / 2)**2 + math.cos(zone_lat) * math.cos(ship_lat) * math.sin((ship_lon - zone_lon) / 2)**2
-            c:float = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-            EARTH_RADIUS:float = 6371
-            distance:float = EARTH_RADIUS * c
-            
-            self.logger.info(f"Distance {distance} Radius {radius}")
-            if distance <= radius:
-                return name
-
-        return None
-
-    def __record_ship(self, message:dict[str,any], allow_update:bool):
-        values = {
-            'mmsi': message["mmsi"],
-            'imo': message.get("imo", "0"),
-            'name': message.get("shipname", "Unknown"),
-            'callsign': message.get("callsign", "????"),
-            'ship_type': message.get("ship_type", "-1"),
-            'bow': message.get("to_bow", 0),
-            'stern': message.get("to_stern", 0),
-            'port': message.get("to_port", 0),
-            'starboard': message.get("to_starboard", 0)
-        }
-
-        query = """
-            INSERT INTO vessels (mmsi, imo, name, callsign, type, bow, stern, port, starboard, first_sight, last_sight)
-            VALUES(:mmsi, :imo, :name, :callsign, :ship_type, :bow, :stern, :port, :starboard, strftime('%s', 'now'), strftime('%s', 'now'))
-            ON CONFLICT(mmsi) DO UPDATE SET 
-        """
-
-        if allow_update:
-            query += """
-                    imo = excluded.imo,
-                    name = excluded.name,
-                    callsign = excluded.callsign,
-                    type = excluded.type,
-                    bow = excluded.bow,
-                    stern = excluded.stern,
-                    port = excluded.port,
-                    starboard = excluded.starboard,
-        """
-            
-        query += "last_sight = excluded.last_sight RETURNING *;"
-
-        try:
-            self.db_cur.execute(query, values)
-
-            result = self.db_cur.fetchone()
-            self.db_conn.commit()
-
-            if result is not None:
-                result = dict(result)
-
-            return result
-        except sqlite3.Error as e:
-            self.logger.exception("SQLite error", exc_info=e)
-            self.db_conn.rollback()
-
-        return None
\ No newline at end of file
+
+        return self.zones.lookup(ship_lat, ship_lon)
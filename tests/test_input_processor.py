@@ -0,0 +1,86 @@
+import queue
+import time
+
+from input_processor import InputProcessor
+
+A:int = 0
+D:int = 3
+
+
+def run(edges:list[tuple[int,bool,float]]) -> tuple[InputProcessor,list[tuple]]:
+    """Feed edges to a processor in one go, returning it and the commands
+    it sent. Edges are timed relative to a long press ago."""
+    commands:queue.SimpleQueue = queue.SimpleQueue()
+    processor:InputProcessor = InputProcessor(None, commands, long_press=1.0)
+
+    start:float = time.monotonic() - 5
+    processor.handle_events([(button, pressed, start + offset) for button, pressed, offset in edges])
+
+    sent:list[tuple] = []
+    while not commands.empty():
+        sent.append(commands.get())
+    return processor, sent
+
+
+def test_each_tap_sends_a_command():
+    _, sent = run([(A, True, 0), (A, False, 0.1), (A, True, 0.3), (A, False, 0.4), (A, True, 0.6), (A, False, 0.7)])
+    assert sent == [("screen", 0)] * 3
+
+
+def test_release_soon_after_press_is_kept():
+    # Used to be dropped as bounce, leaving the button held so every later
+    # press was taken for key repeat
+    processor, sent = run([(A, True, 0), (A, False, 0.01), (A, True, 0.3), (A, False, 0.31)])
+    assert sent == [("screen", 0)] * 2
+    assert processor.held == {}
+
+
+def test_quick_tap_on_long_press_button_is_a_short_press():
+    processor, sent = run([(D, True, 0), (D, False, 0.01)])
+    assert sent == [("mode",)]
+    assert processor.held == {}
+
+    processor, sent = run([(D, True, 0), (D, False, 0.01), (D, True, 0.2), (D, False, 0.21)])
+    assert sent == [("mode",)] * 2
+
+
+def test_key_repeat_is_one_press():
+    processor, sent = run([(A, True, 0), (A, True, 0.5), (A, True, 0.55), (A, False, 0.6)])
+    assert sent == [("screen", 0)]
+
+    processor, sent = run([(D, True, 0), (D, True, 0.1), (D, True, 0.2), (D, False, 0.3)])
+    assert sent == [("mode",)]
+
+
+def test_release_without_press_is_ignored():
+    processor, sent = run([(A, False, 0), (D, False, 0.1)])
+    assert sent == []
+    assert processor.held == {}
+
+
+def test_hold_sends_long_press_once():
+    # Still held, and held for longer than long_press
+    processor, sent = run([(D, True, 0)])
+    assert sent == [("refresh",)]
+
+    processor.handle_events([(D, False, time.monotonic())])
+    assert processor.command_queue.empty()
+    assert processor.held == {}
+
+
+def test_hold_read_late_is_a_long_press():
+    _, sent = run([(D, True, 0), (D, False, 1.5)])
+    assert sent == [("refresh",)]
+
+
+def test_waits_for_edges_unless_a_long_press_is_due():
+    commands:queue.SimpleQueue = queue.SimpleQueue()
+    processor:InputProcessor = InputProcessor(None, commands, long_press=1.0)
+    assert processor._InputProcessor__timeout() is None
+
+    processor.handle_events([(D, True, time.monotonic())])
+    assert 0 < processor._InputProcessor__timeout() <= 1.0
+
+    processor.handle_events([(A, True, time.monotonic())])
+    assert commands.get_nowait() == ("screen", 0)
+    assert 0 < processor._InputProcessor__timeout() <= 1.0
@@ -0,0 +1,79 @@
+from message.line_buffer import LineBuffer
+
+
+def test_splits_lines_across_reads():
+    buffer:LineBuffer = LineBuffer(64)
+
+    assert buffer.extend(b"!AIVDM,1\r\n!AIV")
+    assert list(buffer.lines()) == [b"!AIVDM,1"]
+
+    assert buffer.extend(b"DM,2\r\n")
+    assert list(buffer.lines()) == [b"!AIVDM,2"]
+    assert len(buffer) == 0
+
+
+def test_delimiter_split_across_reads():
+    buffer:LineBuffer = LineBuffer(64)
+
+    buffer.extend(b"one\r")
+    assert list(buffer.lines()) == []
+
+    buffer.extend(b"\ntwo\r")
+    assert list(buffer.lines()) == [b"one"]
+
+    buffer.extend(b"\n")
+    assert list(buffer.lines()) == [b"two"]
+
+
+def test_list_of_ints_is_accepted():
+    buffer:LineBuffer = LineBuffer(16)
+    buffer.extend([ord(c) for c in "abc\r\n"])
+    assert list(buffer.lines()) == [b"abc"]
+
+
+def test_partial_line_is_moved_to_front_when_full():
+    buffer:LineBuffer = LineBuffer(16)
+
+    buffer.extend(b"0123456789\r\nabc")
+    assert list(buffer.lines()) == [b"0123456789"]
+
+    # Doesn't fit after "abc" without moving it back to the front
+    assert buffer.extend(b"defghijk")
+    assert buffer.read_pos == 0
+    buffer.extend(b"\r\n")
+    assert list(buffer.lines()) == [b"abcdefghijk"]
+
+
+def test_compaction_with_overlapping_ranges():
+    # The partial line is longer than the gap it moves back by, so the
+    # copy overlaps itself
+    buffer:LineBuffer = LineBuffer(32)
+
+    buffer.extend(b"ab\r\n" + bytes(range(65, 65 + 20)))
+    assert list(buffer.lines()) == [b"ab"]
+
+    assert buffer.extend(b"0123456789")
+    assert buffer.extend(b"\r\n")
+    assert list(buffer.lines()) == [bytes(range(65, 65 + 20)) + b"0123456789"]
+
+
+def test_delimiter_split_over_compaction():
+    buffer:LineBuffer = LineBuffer(16)
+
+    buffer.extend(b"xy\r\nline\r")
+    assert list(buffer.lines()) == [b"xy"]
+
+    assert buffer.extend(b"\n012345678")
+    assert list(buffer.lines()) == [b"line"]
+    assert len(buffer) == 9
+
+
+def test_overflow_is_refused():
+    buffer:LineBuffer = LineBuffer(8)
+
+    assert buffer.extend(b"12345")
+    assert not buffer.extend(b"6789")
+    # Nothing was lost or added
+    assert len(buffer) == 5
+    assert buffer.extend(b"\r\n")
+    assert list(buffer.lines()) == [b"12345"]
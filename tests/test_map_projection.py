@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+from screen.map_projection import MercatorProjection
+
+
+def mercator_y(lat:float) -> float:
+    return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+
+def test_square_bounds_fill_the_image():
+    north:float = math.degrees(2 * math.atan(math.exp(math.radians(1))) - math.pi / 2)
+    projection:MercatorProjection = MercatorProjection([-1, -north, 1, north], 200, 200)
+
+    assert projection.project(north, -1) == pytest.approx((0, 0), abs=1e-6)
+    assert projection.project(-north, 1) == pytest.approx((200, 200), abs=1e-6)
+
+
+def test_wide_bounds_keep_the_aspect_and_centre():
+    # Twice as wide as it is tall, on a portrait screen
+    bounds:list[float] = [-122.6, 37.7, -122.2, 37.9]
+    projection:MercatorProjection = MercatorProjection(bounds, 480, 800)
+
+    west, north = projection.project(bounds[3], bounds[0])
+    east, south = projection.project(bounds[1], bounds[2])
+
+    # The width is what limits the scale, so the bounds span it exactly
+    # and sit in the middle vertically
+    assert west == pytest.approx(0, abs=1e-6)
+    assert east == pytest.approx(480, abs=1e-6)
+    assert (north + south) / 2 == pytest.approx(400, abs=1e-6)
+    assert 0 < north < south < 800
+
+    # One scale for both axes, as on the basemap
+    x_per_radian:float = (east - west) / math.radians(bounds[2] - bounds[0])
+    y_per_radian:float = (south - north) / (mercator_y(bounds[3]) - mercator_y(bounds[1]))
+    assert x_per_radian == pytest.approx(y_per_radian)
+
+
+def test_widened_extent_covers_the_whole_image():
+    projection:MercatorProjection = MercatorProjection([-122.6, 37.7, -122.2, 37.9], 480, 800)
+
+    assert projection.min_lat < 37.7 and projection.max_lat > 37.9
+    assert projection.project(projection.max_lat, projection.min_lon) == pytest.approx((0, 0), abs=1e-6)
+    assert projection.project(projection.min_lat, projection.max_lon) == pytest.approx((480, 800), abs=1e-6)
+    assert projection.contains(37.6, -122.4)
+    assert not projection.contains(37.8, -122.7)
+
+
+def test_project_many_matches_project():
+    np = pytest.importorskip("numpy")
+    projection:MercatorProjection = MercatorProjection([-5, 50, 2, 51], 800, 480)
+
+    lats:list[float] = [50.0, 50.5, 51.2]
+    lons:list[float] = [-5.0, -1.5, 2.3]
+    xs, ys = projection.project_many(lats, lons)
+
+    for lat, lon, x, y in zip(lats, lons, xs, ys):
+        assert projection.project(lat, lon) == pytest.approx((x, y), abs=1e-6)
+    assert projection.contains_many(lats, lons).tolist() == [projection.contains(lat, lon) for lat, lon in zip(lats, lons)]
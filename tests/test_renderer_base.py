@@ -0,0 +1,91 @@
+import datetime
+
+from PIL import Image
+
+from renderer.renderer_base import RendererBase
+
+
+class ManualScheduler:
+    """Runs blocking work inline and keeps deferred calls until run."""
+
+    def __init__(self):
+        self.calls:list[tuple] = []
+
+    def call_later(self, delay:float, callback:any, *args) -> any:
+        call:list = [callback, args, False]
+        self.calls.append(call)
+
+        class Handle:
+            def cancel(self):
+                call[2] = True
+        return Handle()
+
+    def run_blocking(self, func:any, *args):
+        func(*args)
+
+    def run_pending(self, renderer:RendererBase):
+        # As if min_render_interval had passed
+        renderer.last_render = datetime.datetime.fromtimestamp(0)
+
+        calls:list = self.calls
+        self.calls = []
+        for callback, args, cancelled in calls:
+            if not cancelled:
+                callback(*args)
+
+
+class FlakyRenderer(RendererBase):
+    def __init__(self, failures:int):
+        super().__init__(10, 10, min_render_interval=60, scheduler=ManualScheduler())
+        self.failures:int = failures
+        self.panel:list[Image.Image] = []
+
+    def _show(self, img:Image.Image):
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("refresh failed")
+        self.panel.append(img)
+
+
+def frame(colour:str) -> Image.Image:
+    return Image.new("RGB", (10, 10), colour)
+
+
+def test_shown_frame_is_skipped_when_repeated():
+    renderer:FlakyRenderer = FlakyRenderer(0)
+    renderer.render(frame("red"), force=True)
+    renderer.render(frame("red"), force=True)
+
+    assert len(renderer.panel) == 1
+    assert renderer.frames_skipped == 1
+
+
+def test_failed_frame_is_not_counted_as_shown():
+    renderer:FlakyRenderer = FlakyRenderer(1)
+    renderer.render(frame("red"), force=True)
+    assert renderer.panel == []
+    assert renderer.frames_shown == 0
+
+    # The same frame again isn't taken for what's on the panel
+    renderer.render(frame("red"), force=True)
+    assert len(renderer.panel) == 1
+    assert renderer.frames_skipped == 0
+
+
+def test_failed_frame_is_retried():
+    renderer:FlakyRenderer = FlakyRenderer(1)
+    renderer.render(frame("red"), force=True)
+    assert renderer.panel == []
+
+    renderer.scheduler.run_pending(renderer)
+    assert len(renderer.panel) == 1
+    assert renderer.panel[0].getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_newer_frame_replaces_retry():
+    renderer:FlakyRenderer = FlakyRenderer(1)
+    renderer.render(frame("red"), force=True)
+    renderer.render(frame("blue"), force=True)
+    renderer.scheduler.run_pending(renderer)
+
+    assert [img.getpixel((0, 0)) for img in renderer.panel] == [(0, 0, 255)]
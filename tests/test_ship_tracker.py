@@ -0,0 +1,121 @@
+import math
+import queue
+
+from message.ais_record import AISRecord
+from ship_tracker import ShipTracker
+from zone_index import EARTH_RADIUS
+
+# Degrees of latitude per km
+KM:float = math.degrees(1 / EARTH_RADIUS)
+MMSI:int = 235000001
+
+
+def make_tracker(**kwargs:any) -> tuple[ShipTracker,queue.SimpleQueue]:
+    events:queue.SimpleQueue = queue.SimpleQueue()
+    tracker:ShipTracker = ShipTracker(100, ":memory:", None, events, **kwargs)
+    tracker.add_zone(("Z", 50.0, 0.0, 1))
+    return tracker, events
+
+
+def report(tracker:ShipTracker, lat:float, lon:float = 0.0, speed:float = 0.0, course:float = 0.0, received:float = 1000.0):
+    tracker.update_vessel(AISRecord(1, MMSI, {"msg_type": 1, "mmsi": MMSI, "lat": lat, "lon": lon, "speed": speed, "course": course}, received))
+
+
+def sent(events:queue.SimpleQueue, kind:str) -> list[tuple]:
+    found:list[tuple] = []
+    while not events.empty():
+        msg:tuple = events.get()
+        if msg[0] == kind:
+            found.append(msg)
+    return found
+
+
+def test_nearby_sent_once_when_vessel_comes_near():
+    tracker, events = make_tracker()
+
+    report(tracker, 50.0 - 10 * KM)
+    assert sent(events, "nearby") == []
+
+    report(tracker, 50.0 - 2.5 * KM)
+    report(tracker, 50.0 - 2.4 * KM)
+    nearby:list[tuple] = sent(events, "nearby")
+    assert len(nearby) == 1
+    assert nearby[0][1].mmsi == str(MMSI)
+
+    # Leaving and coming back sends it again
+    report(tracker, 50.0 - 10 * KM)
+    report(tracker, 50.0 - 2.5 * KM)
+    assert len(sent(events, "nearby")) == 1
+
+
+def test_nearby_not_sent_inside_zone_or_without_margin():
+    tracker, events = make_tracker()
+    report(tracker, 50.0)
+    assert sent(events, "nearby") == []
+
+    tracker, events = make_tracker(nearby_margin=0)
+    report(tracker, 50.0 - 2.5 * KM)
+    assert sent(events, "nearby") == []
+
+
+# 10 kn in km/s
+SPEED:float = 10 * 1.852 / 3600
+
+
+def test_approaching_sent_once_then_lapse_once():
+    tracker, events = make_tracker(predict_horizon=1200, nearby_margin=0)
+
+    report(tracker, 50.0 - 5.56 * KM, speed=10, course=0, received=1000)
+    approaching:list[tuple] = sent(events, "approaching")
+    assert len(approaching) == 1
+    _, ship, zone, eta = approaching[0]
+    assert zone == "Z"
+    assert abs(eta - 4.56 / SPEED) < 1
+
+    # Still on course, so the arrival time hasn't moved
+    report(tracker, 50.0 - (5.56 - 60 * SPEED) * KM, speed=10, course=0, received=1060)
+    assert sent(events, "approaching") == []
+
+    # Turns away
+    report(tracker, 50.0 - (5.56 - 120 * SPEED) * KM, speed=10, course=180, received=1120)
+    report(tracker, 50.0 - (5.56 - 110 * SPEED) * KM, speed=10, course=180, received=1180)
+    lapsed:list[tuple] = sent(events, "approaching")
+    assert len(lapsed) == 1
+    assert lapsed[0][2:] == (None, None)
+
+
+def test_new_approaching_when_arrival_moves():
+    tracker, events = make_tracker(predict_horizon=1200, nearby_margin=0)
+
+    report(tracker, 50.0 - 5.56 * KM, speed=10, course=0, received=1000)
+    # Slowed down, so it's due later
+    report(tracker, 50.0 - 5.5 * KM, speed=8, course=0, received=1060)
+
+    approaching:list[tuple] = sent(events, "approaching")
+    assert len(approaching) == 2
+    assert approaching[1][1].received + approaching[1][3] > approaching[0][1].received + approaching[0][3] + tracker.ARRIVAL_TOLERANCE
+
+
+def test_arrival_sends_zone_without_lapse():
+    tracker, events = make_tracker(predict_horizon=1200, nearby_margin=0)
+
+    report(tracker, 50.0 - 5.56 * KM, speed=10, course=0, received=1000)
+    sent(events, "approaching")
+
+    report(tracker, 50.0 - 0.5 * KM, speed=10, course=0, received=1900)
+    arrived:bool = False
+    while not events.empty():
+        msg:tuple = events.get()
+        assert msg[0] != "approaching"
+        if msg[0] == "zone":
+            assert msg[1].zone == "Z"
+            arrived = True
+    assert arrived
+
+
+def test_no_prediction_when_stopped_or_unknown_course():
+    tracker, events = make_tracker(predict_horizon=1200, nearby_margin=0)
+
+    report(tracker, 50.0 - 5.56 * KM, speed=0.2, course=0)
+    report(tracker, 50.0 - 5.56 * KM, speed=10, course=360)
+    assert sent(events, "approaching") == []
@@ -0,0 +1,151 @@
+import time
+
+from renderer.null_renderer import NullRenderer
+from screen.ship_zone_screen import ShipZoneScreen
+from vessel_state import VesselSnapshot
+
+
+class RecordingRenderer(NullRenderer):
+    def __init__(self):
+        super().__init__()
+        self.frames:list = []
+
+    def render(self, img:any, force:bool = False):
+        self.frames.append(img)
+
+
+class ManualTimer:
+    def __init__(self, callback:any, args:tuple):
+        self.callback:any = callback
+        self.args:tuple = args
+        self.cancelled:bool = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.callback(*self.args)
+
+
+class ManualScheduler:
+    def __init__(self):
+        self.timers:list[ManualTimer] = []
+
+    def call_later(self, delay:float, callback:any, *args) -> ManualTimer:
+        timer:ManualTimer = ManualTimer(callback, args)
+        self.timers.append(timer)
+        return timer
+
+
+def ship(mmsi:str, zone:str|None = None, version:int = 0) -> VesselSnapshot:
+    fields:dict = dict.fromkeys(VesselSnapshot._fields)
+    fields.update(mmsi=mmsi, name=f"VESSEL {mmsi}", callsign="ABC", type=70, imo="0", bow=50, stern=20, port=5, starboard=6,
+                  first_sight=0, last_sight=0, lat=50.5, lon=-1.0, speed=10.5, zone=zone, received=time.time(),
+                  static_version=0, version=version)
+    return VesselSnapshot(**fields)
+
+
+def make_screen(tmp_path) -> tuple[ShipZoneScreen,RecordingRenderer,ManualScheduler]:
+    renderer:RecordingRenderer = RecordingRenderer()
+    scheduler:ManualScheduler = ManualScheduler()
+    screen:ShipZoneScreen = ShipZoneScreen(str(tmp_path), renderer, scheduler=scheduler, card_cache_size=0)
+    screen.active = True
+    return screen, renderer, scheduler
+
+
+def test_lapse_after_lead_timer_goes_back_to_previous_ship(tmp_path):
+    screen, renderer, scheduler = make_screen(tmp_path)
+
+    screen.update(("zone", ship("1", "Z"), None))
+    screen.update(("approaching", ship("2"), "Z", 600))
+    scheduler.timers[-1].fire()
+    assert screen.visible_ship.mmsi == "2"
+    assert screen.showing_prepared
+
+    shown:int = len(renderer.frames)
+    screen.update(("approaching", ship("2"), None, None))
+
+    assert screen.visible_ship.mmsi == "1"
+    assert not screen.showing_prepared
+    assert len(renderer.frames) == shown + 1
+
+
+def test_lapse_with_nothing_shown_before_clears_the_card(tmp_path):
+    screen, renderer, scheduler = make_screen(tmp_path)
+
+    screen.update(("approaching", ship("2"), "Z", 600))
+    scheduler.timers[-1].fire()
+    screen.update(("approaching", ship("2"), None, None))
+
+    assert screen.visible_ship is None
+    assert len(renderer.frames) == 2
+
+
+def test_lapse_of_second_prepared_card_goes_back_to_arrived_ship(tmp_path):
+    screen, _, scheduler = make_screen(tmp_path)
+
+    screen.update(("zone", ship("1", "Z"), None))
+    screen.update(("approaching", ship("2"), "Z", 600))
+    screen.update(("approaching", ship("3"), "Z", 600))
+    scheduler.timers[0].fire()
+    scheduler.timers[1].fire()
+    screen.update(("approaching", ship("3"), None, None))
+
+    assert screen.visible_ship.mmsi == "1"
+
+
+def test_early_arrival_shows_prepared_card(tmp_path):
+    screen, renderer, scheduler = make_screen(tmp_path)
+
+    screen.update(("approaching", ship("2"), "Z", 600))
+    prepared:any = screen.approaching["2"][1]
+    screen.update(("zone", ship("2", "Z"), None))
+
+    assert scheduler.timers[-1].cancelled
+    assert screen.visible_ship.mmsi == "2"
+    assert not screen.showing_prepared
+    assert renderer.frames == [prepared]
+
+    # Arrived, so a late lapse leaves it up
+    screen.update(("approaching", ship("2"), None, None))
+    assert screen.visible_ship.mmsi == "2"
+
+
+def test_early_arrival_after_moving_redraws(tmp_path):
+    screen, renderer, _ = make_screen(tmp_path)
+
+    screen.update(("approaching", ship("2"), "Z", 600))
+    prepared:any = screen.approaching["2"][1]
+    screen.update(("zone", ship("2", "Z", version=5), None))
+
+    assert screen.visible_ship.version == 5
+    assert len(renderer.frames) == 1 and renderer.frames[0] is not prepared
+
+
+def test_arrival_after_lead_timer_updates_card(tmp_path):
+    screen, renderer, scheduler = make_screen(tmp_path)
+
+    screen.update(("approaching", ship("2"), "Z", 600))
+    scheduler.timers[-1].fire()
+    screen.update(("zone", ship("2", "Z", version=3), None))
+
+    assert screen.visible_ship.version == 3
+    assert not screen.showing_prepared
+    assert len(renderer.frames) == 2
+
+
+def test_nearby_vessel_card_is_drawn_in_background(tmp_path):
+    screen:ShipZoneScreen = ShipZoneScreen(str(tmp_path), RecordingRenderer(), scheduler=ManualScheduler(), card_cache_size=4)
+
+    screen.update(("nearby", ship("2")))
+    deadline:float = time.monotonic() + 10
+    while len(screen.cards) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(screen.cards) == 1
+
+    # So arriving only needs a copy of the cached card
+    screen.active = True
+    screen.update(("zone", ship("2", "Z"), None))
+    assert screen.cards.hits.get() >= 1
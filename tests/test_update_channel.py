@@ -0,0 +1,148 @@
+import random
+from collections import namedtuple
+
+import pytest
+
+from update_channel import CoalescingBuffer, CoalescingQueue
+
+Ship = namedtuple("Ship", ["mmsi", "version"])
+
+
+def update(mmsi:str, version:int = 0) -> tuple:
+    return ("update", Ship(mmsi, version))
+
+
+def drain(buffer:CoalescingBuffer) -> list[tuple]:
+    out:list[tuple] = []
+    while len(buffer):
+        out.append(buffer.popleft())
+    return out
+
+
+def test_waiting_update_is_replaced_in_place():
+    buffer:CoalescingBuffer = CoalescingBuffer()
+    buffer.append(update("1", 1))
+    buffer.append(update("2", 1))
+    buffer.append(update("1", 2))
+
+    assert len(buffer) == 2
+    assert drain(buffer) == [update("1", 2), update("2", 1)]
+
+
+def test_update_is_not_moved_ahead_of_a_command():
+    buffer:CoalescingBuffer = CoalescingBuffer()
+    buffer.append(update("1", 1))
+    buffer.append(("zone", Ship("1", 1), None))
+    buffer.append(update("1", 2))
+
+    # The old slot is dead and the new update waits behind the zone event
+    assert len(buffer) == 2
+    assert drain(buffer) == [("zone", Ship("1", 1), None), update("1", 2)]
+
+
+def test_update_behind_a_command_still_coalesces():
+    buffer:CoalescingBuffer = CoalescingBuffer()
+    buffer.append(update("1", 1))
+    buffer.append(("mode",))
+    buffer.append(update("1", 2))
+    buffer.append(update("1", 3))
+    buffer.append(("screen", 1))
+    buffer.append(update("2", 1))
+
+    assert drain(buffer) == [("mode",), update("1", 3), ("screen", 1), update("2", 1)]
+
+
+def test_dead_slots_are_skipped():
+    buffer:CoalescingBuffer = CoalescingBuffer()
+    buffer.append(update("1", 1))
+    buffer.append(update("2", 1))
+    buffer.append(("mode",))
+    buffer.append(update("1", 2))
+    buffer.append(update("2", 2))
+
+    # Both leading slots are dead
+    assert buffer.popleft() == ("mode",)
+    assert buffer.popleft() == update("1", 2)
+    assert buffer.popleft() == update("2", 2)
+    assert len(buffer) == 0
+    assert not buffer.entries
+
+
+def test_popped_update_is_no_longer_replaced():
+    buffer:CoalescingBuffer = CoalescingBuffer()
+    buffer.append(update("1", 1))
+    assert buffer.popleft() == update("1", 1)
+
+    buffer.append(update("1", 2))
+    assert drain(buffer) == [update("1", 2)]
+
+
+def test_len_after_mixed_appends_and_pops():
+    buffer:CoalescingBuffer = CoalescingBuffer()
+    buffer.append(update("1"))
+    buffer.append(update("2"))
+    buffer.append(update("1"))
+    assert len(buffer) == 2
+
+    buffer.append(("zone", Ship("2", 0), None))
+    buffer.append(update("2"))
+    assert len(buffer) == 3
+
+    buffer.popleft()
+    assert len(buffer) == 2
+    buffer.append(update("1"))
+    assert len(buffer) == 3
+
+    drain(buffer)
+    assert len(buffer) == 0
+    with pytest.raises(IndexError):
+        buffer.popleft()
+
+
+def test_random_sequences_keep_order():
+    rand:random.Random = random.Random(1)
+
+    for _ in range(200):
+        buffer:CoalescingBuffer = CoalescingBuffer()
+        sent:list[tuple] = []
+        received:list[tuple] = []
+
+        for step in range(rand.randrange(1, 40)):
+            if len(buffer) and rand.random() < 0.3:
+                received.append(buffer.popleft())
+            elif rand.random() < 0.7:
+                msg:tuple = update(rand.choice("123"), step)
+                sent.append(msg)
+                buffer.append(msg)
+            else:
+                msg = ("mode", step)
+                sent.append(msg)
+                buffer.append(msg)
+        received += drain(buffer)
+
+        # Every command arrives, in order
+        assert [msg for msg in received if msg[0] != "update"] == [msg for msg in sent if msg[0] != "update"]
+
+        # Every vessel's newest update arrives, and updates never overtake
+        # a command queued before them
+        for mmsi in "123":
+            updates:list[tuple] = [msg for msg in sent if msg[0] == "update" and msg[1].mmsi == mmsi]
+            if updates:
+                assert updates[-1] in received
+        for index, msg in enumerate(received):
+            if msg[0] != "update":
+                continue
+            commands_before:int = sum(1 for other in received[:index] if other[0] != "update")
+            commands_sent_before:int = sum(1 for other in sent[:sent.index(msg)] if other[0] != "update")
+            assert commands_before >= commands_sent_before
+
+
+def test_queue_coalesces():
+    channel:CoalescingQueue = CoalescingQueue()
+    channel.put(update("1", 1))
+    channel.put(update("1", 2))
+    channel.put(("mode",))
+
+    assert channel.qsize() == 2
+    assert channel.get_nowait() == update("1", 2)
+    assert channel.get_nowait() == ("mode",)
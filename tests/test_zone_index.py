@@ -0,0 +1,74 @@
+import math
+
+from zone_index import EARTH_RADIUS, ZoneIndex
+
+# Degrees of latitude per km
+KM:float = math.degrees(1 / EARTH_RADIUS)
+
+
+def zones(*entries:tuple[str,float,float,float]) -> ZoneIndex:
+    index:ZoneIndex = ZoneIndex()
+    for entry in entries:
+        index.add(*entry)
+    return index
+
+
+def test_near_within_margin_of_edge():
+    index:ZoneIndex = zones(("Z", 50.0, 0.0, 1))
+
+    assert index.near(50.0, 0.0, 2)
+    assert index.near(50.0 + 2.9 * KM, 0.0, 2)
+    assert not index.near(50.0 + 3.1 * KM, 0.0, 2)
+
+
+def test_near_finds_zone_filed_under_another_cell():
+    # The zone sits across a cell boundary from the position
+    index:ZoneIndex = zones(("Z", 50.049, 0.0, 0.1))
+
+    assert index.near(50.051 + 1.5 * KM, 0.0, 2)
+    assert not index.near(50.051 + 5 * KM, 0.0, 2)
+
+
+def test_predict_head_on():
+    # 10 kn due north, 5.56 km from the centre of a 1 km zone, so 4.56 km
+    # from its edge
+    index:ZoneIndex = zones(("Z", 50.0, 0.0, 1))
+
+    zone, eta = index.predict(50.0 - 5.56 * KM, 0.0, 10, 0, 1200)
+    assert zone == "Z"
+    assert abs(eta - 4.56 / (10 * 1.852 / 3600)) < 1
+
+
+def test_predict_beyond_horizon():
+    index:ZoneIndex = zones(("Z", 50.0, 0.0, 1))
+    assert index.predict(50.0 - 5.56 * KM, 0.0, 10, 0, 600) is None
+
+
+def test_predict_heading_away():
+    index:ZoneIndex = zones(("Z", 50.0, 0.0, 1))
+    assert index.predict(50.0 - 5.56 * KM, 0.0, 10, 180, 1200) is None
+    assert index.predict(50.0 - 5.56 * KM, 0.0, 10, 90, 1200) is None
+
+
+def test_predict_not_moving_or_inside():
+    index:ZoneIndex = zones(("Z", 50.0, 0.0, 1))
+    assert index.predict(50.0 - 5.56 * KM, 0.0, 0, 0, 1200) is None
+    assert index.predict(50.0, 0.0, 10, 0, 1200) is None
+
+
+def test_predict_zone_beside_path_in_another_cell():
+    # The path runs east along grid row 999 and the zone's centre is in
+    # row 1000, but its edge crosses the path
+    index:ZoneIndex = zones(("B", 50.0 + 0.5 * KM, 0.08, 1))
+    assert index._cell(49.999, 0.0)[0] != index._cell(50.0 + 0.5 * KM, 0.08)[0]
+
+    zone, eta = index.predict(49.999, 0.0, 10, 90, 1200)
+    assert zone == "B"
+    assert 900 < eta < 1000
+
+
+def test_predict_first_zone_reached():
+    index:ZoneIndex = zones(("Far", 50.0, 0.0, 1), ("Near", 50.0 - 3 * KM, 0.0, 0.5))
+
+    zone, _ = index.predict(50.0 - 5.56 * KM, 0.0, 10, 0, 1200)
+    assert zone == "Near"
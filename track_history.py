@@ -0,0 +1,167 @@
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from zone_index import EARTH_RADIUS
+
+
+class Track:
+    """Ring buffer of (ts, lat, lon, sog, cog) points for one vessel.
+
+    Points are stored flat in one array of doubles, which grows until it
+    reaches capacity and is then overwritten oldest first."""
+
+    FIELDS:int = 5
+
+    __slots__ = ("capacity", "data", "head")
+
+    def __init__(self, capacity:int):
+        self.capacity:int = capacity
+        self.data:array = array("d")
+        # Index of the oldest point once the buffer has wrapped
+        self.head:int = 0
+
+    def __len__(self) -> int:
+        return len(self.data) // self.FIELDS
+
+    def append(self, ts:float, lat:float, lon:float, sog:float, cog:float) -> int:
+        """Add a point, returning how many points the buffer grew by."""
+        if len(self) < self.capacity:
+            self.data.extend((ts, lat, lon, sog, cog))
+            return 1
+
+        i:int = self.head * self.FIELDS
+        data:array = self.data
+        data[i] = ts
+        data[i + 1] = lat
+        data[i + 2] = lon
+        data[i + 3] = sog
+        data[i + 4] = cog
+        self.head = (self.head + 1) % self.capacity
+        return 0
+
+    def last(self) -> tuple[float,float,float]:
+        """Time and position of the newest point."""
+        i:int = ((self.head - 1) % len(self)) * self.FIELDS
+        return self.data[i], self.data[i + 1], self.data[i + 2]
+
+    def points(self):
+        """Yield points oldest first, read straight from the buffer."""
+        data:array = self.data
+        count:int = len(self)
+        for n in range(count):
+            i:int = ((self.head + n) % count) * self.FIELDS
+            yield data[i], data[i + 1], data[i + 2], data[i + 3], data[i + 4]
+
+    def copy(self) -> array:
+        """The points flattened into a new array, oldest first."""
+        split:int = self.head * self.FIELDS
+        return self.data[split:] + self.data[:split]
+
+
+class TrackHistory:
+    """Recent positions of every vessel, within a fixed memory budget.
+
+    A point is only kept if at least min_interval seconds have passed since
+    the last one, and the vessel has either moved min_distance metres or
+    max_interval seconds have passed. When the budget is used up, the
+    tracks of the vessels heard from least recently are dropped.
+
+    The tracker writes and the screens read from different threads, so
+    hold lock while reading a track, or take a snapshot of the tracks. With persist set, kept points are
+    also queued up for the database; collect them with take_pending."""
+
+    POINT_SIZE:int = Track.FIELDS * array("d").itemsize
+
+    def __init__(self, points_per_track:int = 240, memory_budget:int = 2 * 1024 * 1024,
+                 min_interval:float = 30, min_distance:float = 50, max_interval:float = 300,
+                 persist:bool = False, persist_batch:int = 200, persist_interval:float = 30):
+        self.lock:threading.Lock = threading.Lock()
+
+        self.points_per_track:int = points_per_track
+        self.max_points:int = memory_budget // self.POINT_SIZE
+        self.total_points:int = 0
+
+        self.min_interval:float = min_interval
+        self.min_distance:float = min_distance
+        self.max_interval:float = max_interval
+
+        # Ordered least to most recently heard from
+        self.tracks:OrderedDict[str,Track] = OrderedDict()
+
+        self.persist:bool = persist
+        self.persist_batch:int = persist_batch
+        self.persist_interval:float = persist_interval
+        self.pending:list[tuple[str,int,float,float,float,float]] = []
+        self.last_taken:float = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def add(self, mmsi:str, ts:float, lat:float, lon:float, sog:float|None, cog:float|None) -> bool:
+        """Offer a position report, returning True if it was kept."""
+        # 91 and 181 are what AIS sends when the position isn't available
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return False
+
+        sog = float("nan") if sog is None else sog
+        cog = float("nan") if cog is None else cog
+
+        with self.lock:
+            track:Track|None = self.tracks.get(mmsi)
+            if track is None:
+                track = self.tracks[mmsi] = Track(self.points_per_track)
+            else:
+                self.tracks.move_to_end(mmsi)
+                if not self.__should_keep(track, ts, lat, lon):
+                    return False
+
+            self.total_points += track.append(ts, lat, lon, sog, cog)
+
+            while self.total_points > self.max_points and len(self.tracks) > 1:
+                _, evicted = self.tracks.popitem(last=False)
+                self.total_points -= len(evicted)
+
+            if self.persist:
+                self.pending.append((mmsi, int(ts), lat, lon, sog, cog))
+
+        return True
+
+    def __should_keep(self, track:Track, ts:float, lat:float, lon:float) -> bool:
+        last_ts, last_lat, last_lon = track.last()
+
+        elapsed:float = ts - last_ts
+        if elapsed < self.min_interval:
+            return False
+
+        if elapsed >= self.max_interval:
+            return True
+
+        # Equirectangular distance is plenty at these ranges
+        d_lat:float = math.radians(lat - last_lat)
+        d_lon:float = math.radians(lon - last_lon) * math.cos(math.radians((lat + last_lat) / 2))
+        return EARTH_RADIUS * 1000 * math.hypot(d_lat, d_lon) >= self.min_distance
+
+    def get(self, mmsi:str) -> Track|None:
+        """The vessel's track. Only read it while holding lock."""
+        return self.tracks.get(mmsi)
+
+    def snapshot(self, mmsis:list[str], min_points:int = 1) -> dict[str,array]:
+        """Copies of the tracks of mmsis with at least min_points points,
+        as from Track.copy, to read without holding lock."""
+        with self.lock:
+            tracks:list[tuple[str,Track|None]] = [(mmsi, self.tracks.get(mmsi)) for mmsi in mmsis]
+            return {mmsi: track.copy() for mmsi, track in tracks if track is not None and len(track) >= min_points}
+
+    def pending_due(self) -> bool:
+        return len(self.pending) >= self.persist_batch or (len(self.pending) > 0 and time.monotonic() - self.last_taken >= self.persist_interval)
+
+    def take_pending(self) -> list[tuple[str,int,float,float,float,float]]:
+        with self.lock:
+            pending:list[tuple[str,int,float,float,float,float]] = self.pending
+            self.pending = []
+            self.last_taken = time.monotonic()
+
+        return pending
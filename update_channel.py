@@ -0,0 +1,79 @@
+from collections import deque
+from queue import Queue
+
+
+class CoalescingBuffer:
+    """FIFO of screen commands that keeps only the latest update per vessel.
+
+    An "update" for a vessel that is still waiting to be read replaces the
+    waiting one in place. Every other command ("zone", "screen", "mode"
+    and so on) is kept and delivered strictly in order. If such a command
+    was queued after a vessel's waiting update, a newer update for that
+    vessel goes to the back instead, so no update is ever delivered ahead
+    of a command that was queued before it."""
+
+    def __init__(self):
+        # Entries are [command, live, barrier count when queued]
+        self.entries:deque[list[any]] = deque()
+        self.waiting:dict[any,list[any]] = {}
+        self.barriers:int = 0
+        self.size:int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, msg:tuple[str,...]):
+        if msg[0] != "update":
+            self.barriers += 1
+            self.entries.append([msg, True, None])
+            self.size += 1
+            return
+
+        key:any = msg[1].mmsi
+        entry:list[any]|None = self.waiting.get(key)
+        if entry is not None:
+            if entry[2] == self.barriers:
+                entry[0] = msg
+                return
+
+            # Leave the old slot behind to be skipped when it's reached
+            entry[1] = False
+            self.size -= 1
+
+        entry = [msg, True, self.barriers]
+        self.waiting[key] = entry
+        self.entries.append(entry)
+        self.size += 1
+
+    def popleft(self) -> tuple[str,...]:
+        while True:
+            entry:list[any] = self.entries.popleft()
+            if entry[1]:
+                break
+
+        msg:tuple[str,...] = entry[0]
+        self.size -= 1
+
+        if msg[0] == "update" and self.waiting.get(msg[1].mmsi) is entry:
+            del self.waiting[msg[1].mmsi]
+
+        if self.size == 0:
+            self.entries.clear()
+
+        return msg
+
+
+class CoalescingQueue(Queue):
+    """Thread safe Queue over a CoalescingBuffer."""
+
+    def _init(self, maxsize:int):
+        self.queue:CoalescingBuffer = CoalescingBuffer()
+
+    def _qsize(self) -> int:
+        return len(self.queue)
+
+    def _put(self, item:tuple[str,...]):
+        self.queue.append(item)
+
+    def _get(self) -> tuple[str,...]:
+        return self.queue.popleft()
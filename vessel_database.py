@@ -0,0 +1,265 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+
+class VesselDatabase:
+    """Registry of every vessel seen, committed to SQLite on each message."""
+
+    flush_interval:float|None = None
+
+    def __init__(self, db_path:str):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        # The connection is shared with whichever thread shuts us down
+        self.lock:threading.Lock = threading.Lock()
+        self.db_conn:sqlite3.Connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.db_conn.row_factory = sqlite3.Row
+        self.db_cur:sqlite3.Cursor = self.db_conn.cursor()
+        self.closed:bool = False
+
+        self.write_time:metrics.Histogram = metrics.histogram("ais_db_write_seconds", "Time spent writing vessel rows to SQLite")
+
+        self.db_cur.execute("""
+            CREATE TABLE IF NOT EXISTS vessels (
+                mmsi TEXT PRIMARY KEY,
+                imo TEXT,
+                name TEXT,
+                callsign TEXT,
+                type INTEGER,
+                bow INTEGER,
+                stern INTEGER,
+                port INTEGER,
+                starboard INTEGER,
+                first_sight INTEGER,
+                last_sight INTEGER
+            );""")
+
+        self.db_cur.execute("""
+            CREATE TABLE IF NOT EXISTS positions (
+                mmsi TEXT,
+                ts INTEGER,
+                lat REAL,
+                lon REAL,
+                sog REAL,
+                cog REAL
+            );""")
+        self.db_cur.execute("CREATE INDEX IF NOT EXISTS positions_mmsi_ts ON positions (mmsi, ts);")
+
+    def _values(self, message:dict[str,any]) -> dict[str,any]:
+        return {
+            'mmsi': message["mmsi"],
+            'imo': message.get("imo", "0"),
+            'name': message.get("shipname", "Unknown"),
+            'callsign': message.get("callsign", "????"),
+            'ship_type': message.get("ship_type", "-1"),
+            'bow': message.get("to_bow", 0),
+            'stern': message.get("to_stern", 0),
+            'port': message.get("to_port", 0),
+            'starboard': message.get("to_starboard", 0)
+        }
+
+    def record_ship(self, message:dict[str,any], allow_update:bool) -> dict[str,any]|None:
+        query = """
+            INSERT INTO vessels (mmsi, imo, name, callsign, type, bow, stern, port, starboard, first_sight, last_sight)
+            VALUES(:mmsi, :imo, :name, :callsign, :ship_type, :bow, :stern, :port, :starboard, strftime('%s', 'now'), strftime('%s', 'now'))
+            ON CONFLICT(mmsi) DO UPDATE SET 
+        """
+
+        if allow_update:
+            query += """
+                    imo = excluded.imo,
+                    name = excluded.name,
+                    callsign = excluded.callsign,
+                    type = excluded.type,
+                    bow = excluded.bow,
+                    stern = excluded.stern,
+                    port = excluded.port,
+                    starboard = excluded.starboard,
+        """
+            
+        query += "last_sight = excluded.last_sight RETURNING *;"
+
+        with self.lock:
+            try:
+                start:float = time.perf_counter()
+                self.db_cur.execute(query, self._values(message))
+
+                result = self.db_cur.fetchone()
+                self.db_conn.commit()
+                self.write_time.observe(time.perf_counter() - start)
+
+                if result is not None:
+                    result = dict(result)
+
+                return result
+            except sqlite3.Error as e:
+                self.logger.exception("SQLite error", exc_info=e)
+                self.db_conn.rollback()
+
+        return None
+
+    def record_positions(self, rows:list[tuple[str,int,float,float,float,float]]):
+        """Write a batch of (mmsi, ts, lat, lon, sog, cog) rows in one transaction."""
+        with self.lock:
+            if self.closed or not rows:
+                return
+
+            try:
+                start:float = time.perf_counter()
+                self.db_cur.executemany("INSERT INTO positions (mmsi, ts, lat, lon, sog, cog) VALUES (?, ?, ?, ?, ?, ?);", rows)
+                self.db_conn.commit()
+                self.write_time.observe(time.perf_counter() - start)
+            except sqlite3.Error as e:
+                self.logger.exception("SQLite error", exc_info=e)
+                self.db_conn.rollback()
+
+    def flush_if_due(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.db_conn.close()
+
+
+class WriteBehindVesselDatabase(VesselDatabase):
+    """Vessel registry served from memory, written to SQLite in batches.
+
+    Rows are cached by MMSI and every change, including last_sight bumps,
+    is queued and written as one transaction per batch. Call flush_if_due
+    regularly from the owning thread and close on shutdown so queued rows
+    are not lost."""
+
+    def __init__(self, db_path:str, flush_interval:float = 5.0, batch_size:int = 200, cache_size:int = 10000):
+        super().__init__(db_path)
+
+        self.flush_interval:float = flush_interval
+        self.batch_size:int = batch_size
+        self.cache_size:int = cache_size
+
+        self.cache:OrderedDict[str,dict[str,any]] = OrderedDict()
+        self.dirty:dict[str,dict[str,any]] = {}
+        self.last_flush:float = time.monotonic()
+
+        # Readers are never blocked by the batch writer in WAL mode and
+        # NORMAL sync only fsyncs at checkpoints rather than every commit
+        self.db_cur.execute("PRAGMA journal_mode=WAL;")
+        self.db_cur.execute("PRAGMA synchronous=NORMAL;")
+
+    def record_ship(self, message:dict[str,any], allow_update:bool) -> dict[str,any]|None:
+        values:dict[str,any] = self._values(message)
+        mmsi:str = str(values["mmsi"])
+        now:int = int(time.time())
+
+        with self.lock:
+            row:dict[str,any]|None = self.__get_row(mmsi)
+            if row is None:
+                row = {"mmsi": mmsi, "first_sight": now}
+                self.__set_static(row, values)
+            elif allow_update:
+                self.__set_static(row, values)
+
+            row["last_sight"] = now
+
+            self.cache[mmsi] = row
+            self.cache.move_to_end(mmsi)
+            self.dirty[mmsi] = row
+
+            # Rows waiting to be written are still held by the dirty
+            # list, so only the cache's reference is dropped here
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+            full:bool = len(self.dirty) >= self.batch_size
+
+        if full:
+            self.flush()
+
+        return dict(row)
+
+    def __get_row(self, mmsi:str) -> dict[str,any]|None:
+        row:dict[str,any]|None = self.dirty.get(mmsi) or self.cache.get(mmsi)
+        if row is not None:
+            return row
+
+        try:
+            self.db_cur.execute("SELECT * FROM vessels WHERE mmsi = ?;", (mmsi,))
+            result = self.db_cur.fetchone()
+        except sqlite3.Error as e:
+            self.logger.exception("SQLite error", exc_info=e)
+            return None
+
+        return dict(result) if result is not None else None
+
+    def __set_static(self, row:dict[str,any], values:dict[str,any]):
+        # Match the column affinities SQLite would have applied
+        row["imo"] = str(values["imo"])
+        row["name"] = str(values["name"])
+        row["callsign"] = str(values["callsign"])
+        row["type"] = self.__to_int(values["ship_type"])
+        row["bow"] = self.__to_int(values["bow"])
+        row["stern"] = self.__to_int(values["stern"])
+        row["port"] = self.__to_int(values["port"])
+        row["starboard"] = self.__to_int(values["starboard"])
+
+    def __to_int(self, value:any) -> any:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+
+    def flush_if_due(self):
+        if self.dirty and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        query = """
+            INSERT INTO vessels (mmsi, imo, name, callsign, type, bow, stern, port, starboard, first_sight, last_sight)
+            VALUES(:mmsi, :imo, :name, :callsign, :type, :bow, :stern, :port, :starboard, :first_sight, :last_sight)
+            ON CONFLICT(mmsi) DO UPDATE SET
+                imo = excluded.imo,
+                name = excluded.name,
+                callsign = excluded.callsign,
+                type = excluded.type,
+                bow = excluded.bow,
+                stern = excluded.stern,
+                port = excluded.port,
+                starboard = excluded.starboard,
+                last_sight = excluded.last_sight;
+        """
+
+        with self.lock:
+            self.last_flush = time.monotonic()
+            if self.closed or not self.dirty:
+                return
+
+            rows:list[dict[str,any]] = list(self.dirty.values())
+            self.dirty.clear()
+            start:float = time.perf_counter()
+
+            for i in range(0, len(rows), self.batch_size):
+                batch:list[dict[str,any]] = rows[i:i + self.batch_size]
+                try:
+                    self.db_cur.executemany(query, batch)
+                    self.db_conn.commit()
+                except sqlite3.Error as e:
+                    self.logger.exception("SQLite error", exc_info=e)
+                    self.db_conn.rollback()
+
+                    # Keep anything unwritten for the next attempt
+                    for row in rows[i:]:
+                        self.dirty.setdefault(row["mmsi"], row)
+                    return
+
+            self.write_time.observe(time.perf_counter() - start)
+            self.logger.debug(f"Flushed {len(rows)} vessel rows")
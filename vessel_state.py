@@ -0,0 +1,115 @@
+from typing import NamedTuple
+
+
+class VesselSnapshot(NamedTuple):
+    """Immutable copy of a vessel's state, as handed to the screens."""
+
+    mmsi:str
+    name:str|None
+    callsign:str|None
+    type:int|None
+    imo:str|None
+    bow:int
+    stern:int
+    port:int
+    starboard:int
+    first_sight:int|None
+    last_sight:int|None
+    lat:float|None
+    lon:float|None
+    speed:float|None
+    course:float|None
+    heading:int|None
+    destination:str|None
+    zone:str|None
+    ts:int
+    received:float
+    static_version:int
+    version:int
+
+
+class VesselState:
+    """Latest known state of one vessel, updated in place as messages arrive.
+
+    Only the fields the screens use are kept. version goes up on every
+    update and static_version only when the static details change, so
+    readers can tell whether anything they cached is out of date.
+
+    approaching and arrival are the tracker's own record of the zone the
+    vessel is expected to enter next and when, and nearby the static
+    details it last had while near a zone. None of them are in snapshots."""
+
+    STATIC_FIELDS:tuple[str,...] = ("name", "callsign", "type", "imo", "bow", "stern", "port", "starboard")
+
+    __slots__ = ("mmsi", "name", "callsign", "type", "imo", "bow", "stern", "port", "starboard",
+                 "first_sight", "last_sight", "lat", "lon", "speed", "course", "heading", "destination",
+                 "zone", "ts", "received", "static_version", "version", "approaching", "arrival", "nearby")
+
+    def __init__(self, mmsi:str):
+        self.mmsi:str = mmsi
+
+        self.name:str|None = None
+        self.callsign:str|None = None
+        self.type:int|None = None
+        self.imo:str|None = None
+        self.bow:int = 0
+        self.stern:int = 0
+        self.port:int = 0
+        self.starboard:int = 0
+        self.first_sight:int|None = None
+        self.last_sight:int|None = None
+
+        self.lat:float|None = None
+        self.lon:float|None = None
+        self.speed:float|None = None
+        self.course:float|None = None
+        self.heading:int|None = None
+        self.destination:str|None = None
+
+        self.zone:str|None = None
+        self.ts:int = 0
+        self.received:float = 0
+
+        self.static_version:int = 0
+        self.version:int = 0
+
+        self.approaching:str|None = None
+        self.arrival:float = 0
+        self.nearby:tuple[int,str|None]|None = None
+
+    def apply_static(self, row:dict[str,any]):
+        """Take the static details from a vessel database row."""
+        changed:bool = False
+        for field in self.STATIC_FIELDS:
+            value:any = row.get(field)
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+
+        self.first_sight = row.get("first_sight")
+        self.last_sight = row.get("last_sight")
+
+        if changed:
+            self.static_version += 1
+
+    def apply_dynamic(self, fields:dict[str,any]):
+        """Take whichever position and voyage fields a decoded message has."""
+        if "lat" in fields:
+            self.lat = fields["lat"]
+        if "lon" in fields:
+            self.lon = fields["lon"]
+        if "speed" in fields:
+            self.speed = fields["speed"]
+        if "course" in fields:
+            self.course = fields["course"]
+        if "heading" in fields:
+            self.heading = fields["heading"]
+        if "destination" in fields:
+            self.destination = fields["destination"]
+
+    def snapshot(self) -> VesselSnapshot:
+        return VesselSnapshot(self.mmsi, self.name, self.callsign, self.type, self.imo,
+                              self.bow, self.stern, self.port, self.starboard,
+                              self.first_sight, self.last_sight,
+                              self.lat, self.lon, self.speed, self.course, self.heading, self.destination,
+                              self.zone, self.ts, self.received, self.static_version, self.version)
@@ -0,0 +1,264 @@
+import logging
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS:float = 6371
+
+
+class ZoneIndex:
+    """Notification zones held in a uniform lat/lon grid.
+
+    Zone centres are converted to radians once when added and each zone is
+    filed under every grid cell its bounding box touches. A lookup only runs
+    the haversine test against zones filed under the position's cell, in the
+    order the zones were added, so the first matching zone wins."""
+
+    # Zones covering more cells than this are checked for every position
+    # rather than bloating the grid
+    MAX_ZONE_CELLS:int = 1024
+
+    def __init__(self, cell_size:float = 0.05):
+        self.logger:logging.Logger = logging.getLogger(__name__)
+
+        # Grid cell size in degrees
+        self.cell_size:float = cell_size
+
+        self.names:list[str] = []
+        self.lat_rad:list[float] = []
+        self.lon_rad:list[float] = []
+        self.cos_lat:list[float] = []
+        self.radius:list[float] = []
+        self.boxes:list[tuple[float,float,float,float]|None] = []
+
+        self.cells:dict[tuple[int,int],list[int]] = {}
+        self.unbounded:list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name:str, lat:float, lon:float, radius:float):
+        index:int = len(self.names)
+        lat_rad:float = math.radians(lat)
+
+        self.names.append(name)
+        self.lat_rad.append(lat_rad)
+        self.lon_rad.append(math.radians(lon))
+        self.cos_lat.append(math.cos(lat_rad))
+        self.radius.append(radius)
+
+        box:tuple[float,float,float,float]|None = self.__bounding_box(lat, lon, radius)
+        self.boxes.append(box)
+
+        if box is None:
+            self.unbounded.append(index)
+            return
+
+        min_lat, min_lon, max_lat, max_lon = box
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > self.MAX_ZONE_CELLS:
+            self.unbounded.append(index)
+            return
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                self.cells.setdefault((row, col), []).append(index)
+
+    def __bounding_box(self, lat:float, lon:float, radius:float) -> tuple[float,float,float,float]|None:
+        # Angular radius of the zone, padded so rounding can never leave a
+        # point that passes the exact test outside of its box
+        angle:float = radius / EARTH_RADIUS * 1.0001 + 1e-9
+        lat_rad:float = math.radians(lat)
+
+        if abs(lat_rad) + angle >= math.pi / 2:
+            return None
+
+        # Widest longitude reached by a circle of this size on the sphere
+        lon_span:float = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(lat_rad))))
+        lat_span:float = math.degrees(angle)
+
+        if lon - lon_span < -180 or lon + lon_span > 180:
+            return None
+
+        return (lat - lat_span, lon - lon_span, lat + lat_span, lon + lon_span)
+
+    def _cell(self, lat:float, lon:float) -> tuple[int,int]:
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def candidates(self, lat:float, lon:float) -> list[int]:
+        """Indexes of zones that might contain the position, in the order added."""
+        cell:list[int] = self.cells.get(self._cell(lat, lon), [])
+        if not self.unbounded:
+            return cell
+
+        return sorted(cell + self.unbounded)
+
+    def _distance(self, index:int, lat_rad:float, lon_rad:float, cos_lat:float) -> float:
+        zone_lat:float = self.lat_rad[index]
+        a:float = math.sin((lat_rad - zone_lat) / 2)**2 + self.cos_lat[index] * cos_lat * math.sin((lon_rad - self.lon_rad[index]) / 2)**2
+        c:float = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return EARTH_RADIUS * c
+
+    def lookup(self, lat:float, lon:float) -> str|None:
+        """Name of the first zone containing the position, if any."""
+        candidates:list[int] = self.candidates(lat, lon)
+        if not candidates:
+            return None
+
+        lat_rad:float = math.radians(lat)
+        lon_rad:float = math.radians(lon)
+        cos_lat:float = math.cos(lat_rad)
+
+        for index in candidates:
+            box:tuple[float,float,float,float]|None = self.boxes[index]
+            if box is not None and not (box[0] <= lat <= box[2] and box[1] <= lon <= box[3]):
+                continue
+
+            distance:float = self._distance(index, lat_rad, lon_rad, cos_lat)
+            self.logger.debug("Distance %s Radius %s", distance, self.radius[index], extra={"rate_key": "distance"})
+            if distance <= self.radius[index]:
+                return self.names[index]
+
+        return None
+
+    def near(self, lat:float, lon:float, margin:float) -> bool:
+        """Whether the position is inside a zone or within margin km of one."""
+        box:tuple[float,float,float,float]|None = self.__bounding_box(lat, lon, margin)
+        if box is None:
+            candidates:list[int] = list(range(len(self.names)))
+        else:
+            # A zone within margin has its box overlap the margin's box
+            candidates = self.__path_candidates(box[0], box[1], box[2], box[3])
+
+        lat_rad:float = math.radians(lat)
+        lon_rad:float = math.radians(lon)
+        cos_lat:float = math.cos(lat_rad)
+
+        return any(self._distance(index, lat_rad, lon_rad, cos_lat) <= self.radius[index] + margin for index in candidates)
+
+    def predict(self, lat:float, lon:float, speed:float, course:float, horizon:float) -> tuple[str,float]|None:
+        """Zone the vessel will enter first if it holds its course and speed.
+
+        Returns the zone's name and the seconds until it crosses the edge,
+        or None if it won't reach a zone within horizon seconds. Zones the
+        position is already inside are left out. Only zones filed under the
+        cells the projected path passes over are tested. The path is worked
+        out on a local flat projection, which is close enough over the
+        few kilometres a horizon of minutes covers."""
+        # Speed in knots to km/s
+        velocity:float = speed * 1.852 / 3600
+        reach:float = velocity * horizon
+        if reach <= 0:
+            return None
+
+        lat_rad:float = math.radians(lat)
+        cos_lat:float = math.cos(lat_rad)
+        if cos_lat < 1e-6:
+            return None
+
+        # Course is clockwise from north, so east is x and north is y
+        course_rad:float = math.radians(course)
+        vx:float = velocity * math.sin(course_rad)
+        vy:float = velocity * math.cos(course_rad)
+
+        end_lat:float = lat + math.degrees(vy * horizon / EARTH_RADIUS)
+        end_lon:float = lon + math.degrees(vx * horizon / (EARTH_RADIUS * cos_lat))
+
+        best:tuple[str,float]|None = None
+        for index in self.__path_candidates(lat, lon, end_lat, end_lon):
+            # Zone centre relative to the vessel, in km
+            x:float = (self.lon_rad[index] - math.radians(lon)) * cos_lat * EARTH_RADIUS
+            y:float = (self.lat_rad[index] - lat_rad) * EARTH_RADIUS
+            radius:float = self.radius[index]
+
+            outside:float = x * x + y * y - radius * radius
+            if outside <= 0:
+                continue
+
+            # First time the vessel is radius away from the centre
+            along:float = x * vx + y * vy
+            if along <= 0:
+                continue
+
+            v2:float = vx * vx + vy * vy
+            disc:float = along * along - v2 * outside
+            if disc < 0:
+                continue
+
+            eta:float = (along - math.sqrt(disc)) / v2
+            if eta <= horizon and (best is None or eta < best[1]):
+                best = (self.names[index], eta)
+
+        return best
+
+    def __path_candidates(self, lat:float, lon:float, end_lat:float, end_lon:float) -> list[int]:
+        # Any zone the path enters has its box overlap the path's box, so
+        # it's filed under at least one of the cells the path's box covers
+        if not (-180 <= end_lon <= 180 and -90 <= end_lat <= 90):
+            return list(range(len(self.names)))
+
+        min_row, min_col = self._cell(min(lat, end_lat), min(lon, end_lon))
+        max_row, max_col = self._cell(max(lat, end_lat), max(lon, end_lon))
+
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > self.MAX_ZONE_CELLS:
+            return list(range(len(self.names)))
+
+        found:set[int] = set(self.unbounded)
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                found.update(self.cells.get((row, col), ()))
+
+        return sorted(found)
+
+    def lookup_many(self, lats:any, lons:any) -> list[str|None]:
+        """Classify many positions at once, with the same result as lookup."""
+        if np is None:
+            return [self.lookup(lat, lon) for lat, lon in zip(lats, lons)]
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        result:np.ndarray = np.full(lats.shape, -1, dtype=np.int64)
+
+        valid:np.ndarray = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        if len(self.names) == 0 or valid.size == 0:
+            return [None] * len(result)
+
+        # Group the positions by grid cell so each cell's candidates are
+        # tested against all of its positions in one go
+        rows:np.ndarray = np.floor(lats[valid] / self.cell_size).astype(np.int64)
+        cols:np.ndarray = np.floor(lons[valid] / self.cell_size).astype(np.int64)
+        cells, inverse = np.unique(np.stack((rows, cols), axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order:np.ndarray = np.argsort(inverse, kind="stable")
+        groups:list[np.ndarray] = np.split(valid[order], np.cumsum(np.bincount(inverse))[:-1])
+
+        lat_rad:np.ndarray = np.radians(lats)
+        lon_rad:np.ndarray = np.radians(lons)
+        cos_lat:np.ndarray = np.cos(lat_rad)
+
+        zone_lat:np.ndarray = np.asarray(self.lat_rad)
+        zone_lon:np.ndarray = np.asarray(self.lon_rad)
+        zone_cos:np.ndarray = np.asarray(self.cos_lat)
+
+        for (row, col), points in zip(cells.tolist(), groups):
+            candidates:list[int] = self.cells.get((row, col), [])
+            if self.unbounded:
+                candidates = sorted(candidates + self.unbounded)
+
+            for index in candidates:
+                if points.size == 0:
+                    break
+
+                a:np.ndarray = np.sin((lat_rad[points] - zone_lat[index]) / 2)**2 + zone_cos[index] * cos_lat[points] * np.sin((lon_rad[points] - zone_lon[index]) / 2)**2
+                c:np.ndarray = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+                inside:np.ndarray = EARTH_RADIUS * c <= self.radius[index]
+
+                result[points[inside]] = index
+                points = points[~inside]
+
+        return [self.names[index] if index >= 0 else None for index in result.tolist()]